@@ -0,0 +1,318 @@
+import asyncio
+import datetime
+import json
+import threading
+import time
+from quart import Blueprint, Response, g, request, jsonify
+from api.controllers.async_controllers import (AsyncDAGController, AsyncLogController, AsyncScriptController,
+                                               AsyncTaskController)
+from api.controllers.log_controller import LogController
+from config import MONITOR_DAG_ID, EXEC_RESULTS_CONFIG, LOG_STREAM_CONFIG, REQUEST_TIMING_CONFIG
+from services.metrics import observe_request
+from services.request_timing import (end_request_timing, finish_profile, get_request_timings, span, start_profile,
+                                     start_request_timing)
+from utils import logger
+
+# 创建Blueprint，路由与api.routes中的同名接口保持相同的URL和JSON结构
+api_async_bp = Blueprint('api_async', __name__, url_prefix='/api')
+
+# 控制器实例
+dag_controller = AsyncDAGController()
+task_controller = AsyncTaskController()
+log_controller = AsyncLogController()
+script_controller = AsyncScriptController()
+sync_log_controller = LogController()
+
+_STREAM_END = object()
+
+@api_async_bp.before_request
+async def _start_request_timer():
+    g.request_started_at = time.perf_counter()
+    start_request_timing()
+    if REQUEST_TIMING_CONFIG['profile_enabled'] and request.args.get('profile') == '1':
+        g.profile_requested = True
+        g.profiler = start_profile()
+
+@api_async_bp.after_request
+async def _record_request_metrics(response):
+    """
+    与api.routes相同，按路由模板记录请求数和耗时，并添加Server-Timing响应头；
+    流式响应只计到响应头返回为止
+    """
+    if g.pop('profile_requested', False):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            summary = {'error': '另一个请求正在进行性能分析，请稍后重试'}
+        else:
+            summary = finish_profile(profiler)
+            # cProfile分析的是事件循环线程，期间并发处理的其他请求也会计入
+            summary['note'] = '异步接口的分析结果包含同一事件循环中并发处理的其他请求'
+        response = await _attach_profile(response, summary)
+
+    timings = get_request_timings()
+    if timings is not None:
+        response.headers['Server-Timing'] = timings.server_timing_header()
+
+    started_at = g.pop('request_started_at', None)
+    if started_at is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        observe_request(endpoint, request.method, response.status_code, time.perf_counter() - started_at)
+    return response
+
+@api_async_bp.teardown_request
+async def _end_request_timer(exc):
+    # 视图抛出异常时after_request不会执行，在这里停止性能分析并释放分析锁
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        finish_profile(profiler)
+    end_request_timing()
+
+async def _attach_profile(response, summary):
+    """与api.routes._attach_profile相同：JSON对象增加_profile键，数组等其他响应包装为{"data": ..., "_profile": ...}"""
+    if response.mimetype != 'application/json':
+        logger.info("性能分析结果（非JSON响应，未附加到响应体）: %s", json.dumps(summary, ensure_ascii=False))
+        return response
+
+    data = await response.get_json()
+    if isinstance(data, dict):
+        payload = {**data, '_profile': summary}
+    else:
+        payload = {'data': data, '_profile': summary}
+    response.set_data(json.dumps(payload, ensure_ascii=False))
+    return response
+
+async def _iter_in_thread(chunks):
+    """在线程中逐块迭代同步生成器，避免文件/网络读取阻塞事件循环"""
+    # 请求被取消时next可能仍在线程中执行，此时直接close会抛出ValueError并泄漏文件/连接；
+    # next与close在线程中按锁串行执行，close在正在执行的next结束后进行
+    lock = threading.Lock()
+
+    def step():
+        with lock:
+            return next(chunks, _STREAM_END)
+
+    def close():
+        with lock:
+            chunks.close()
+
+    try:
+        while True:
+            chunk = await asyncio.to_thread(step)
+            if chunk is _STREAM_END:
+                return
+            yield chunk
+    finally:
+        if hasattr(chunks, 'close'):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # 由垃圾回收在事件循环之外结束，此时没有正在执行的next
+                close()
+            else:
+                # 不等待关闭完成，避免取消时在这里再次被中断
+                loop.run_in_executor(None, close)
+
+@api_async_bp.route('/dags/exec-results', methods=['GET'])
+async def get_dag_execution_results():
+    """
+    获取配置的DAG在指定执行日期（或日期区间）的执行结果
+
+    URL参数:
+        exec_date: 执行日期（中国时区，格式YYYY-MM-DD）
+        start_date: 区间开始日期（中国时区，格式YYYY-MM-DD），与end_date同时提供时替代exec_date
+        end_date: 区间结束日期（中国时区，格式YYYY-MM-DD）
+
+    区间查询返回JSON数组，每个元素为一天的结果:
+        [{"exec_date": "YYYY-MM-DD", "results": [...]}, ...]
+    """
+    # 获取查询参数
+    exec_date = request.args.get('exec_date')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+
+    if start_date or end_date:
+        return await _get_dag_execution_results_by_range(start_date, end_date)
+
+    # 参数验证
+    if not exec_date:
+        return jsonify({'error': '缺少必需的参数exec_date'}), 400
+
+    try:
+        # 调用控制器方法
+        results = await dag_controller.get_execution_results(MONITOR_DAG_ID, exec_date)
+        with span('format'):
+            return jsonify(results)
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+async def _get_dag_execution_results_by_range(start_date, end_date):
+    """
+    按天返回日期区间内的执行结果
+
+    Args:
+        start_date: 区间开始日期（中国时区，格式YYYY-MM-DD）
+        end_date: 区间结束日期（中国时区，格式YYYY-MM-DD）
+    """
+    # 参数验证
+    if not start_date or not end_date:
+        return jsonify({'error': 'start_date和end_date必须同时提供'}), 400
+
+    try:
+        start = datetime.datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.datetime.strptime(end_date, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': '日期格式错误，应为YYYY-MM-DD'}), 400
+
+    if end < start:
+        return jsonify({'error': 'end_date不能早于start_date'}), 400
+
+    max_days = EXEC_RESULTS_CONFIG['max_range_days']
+    if (end - start).days + 1 > max_days:
+        return jsonify({'error': f'日期区间不能超过{max_days}天'}), 400
+
+    try:
+        day_results = await dag_controller.get_execution_results_by_range(MONITOR_DAG_ID, start_date, end_date)
+        with span('format'):
+            return jsonify(day_results)
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_async_bp.route('/dags/exec-results/tasks', methods=['POST'])
+async def get_tasks_by_state():
+    """
+    获取指定状态的任务列表
+
+    请求体参数:
+        dag_id: DAG ID (必需)
+        run_id: DAG Run ID (必需)
+        state: 状态参数（如'success,failed'或'all'），可选，默认为'all'
+    """
+    # 获取请求体数据
+    data = await request.get_json()
+
+    # 参数验证
+    if not data:
+        return jsonify({'error': '缺少请求体数据'}), 400
+
+    if 'dag_id' not in data:
+        return jsonify({'error': '缺少必需的参数dag_id'}), 400
+
+    if 'run_id' not in data:
+        return jsonify({'error': '缺少必需的参数run_id'}), 400
+
+    try:
+        # 调用控制器方法
+        results = await task_controller.get_tasks_by_state(data['dag_id'], data['run_id'], data.get('state', 'all'))
+        with span('format'):
+            return jsonify(results)
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_async_bp.route('/dags/exec-results/task-logs', methods=['POST'])
+async def get_task_logs():
+    """
+    获取指定任务的日志内容
+
+    请求体参数:
+        dag_id: DAG ID (必需)
+        run_id: DAG Run ID (必需)
+        task_id: 任务 ID (必需)
+        try_number: 尝试次数，可选，默认为1
+    """
+    # 获取请求体数据
+    data = await request.get_json()
+
+    # 参数验证
+    if not data:
+        return jsonify({'error': '缺少请求体数据'}), 400
+
+    if 'dag_id' not in data:
+        return jsonify({'error': '缺少必需的参数dag_id'}), 400
+
+    if 'run_id' not in data:
+        return jsonify({'error': '缺少必需的参数run_id'}), 400
+
+    if 'task_id' not in data:
+        return jsonify({'error': '缺少必需的参数task_id'}), 400
+
+    try:
+        # 调用控制器方法
+        result, error = await log_controller.get_task_log(
+            data['dag_id'], data['run_id'], data['task_id'], data.get('try_number', 1))
+
+        if error:
+            return jsonify({'error': error}), 404
+
+        with span('format'):
+            return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_async_bp.route('/dags/<dag_id>/dagRuns/<dag_run_id>/taskInstances/<task_id>/log', methods=['GET'])
+async def get_task_log(dag_id, dag_run_id, task_id):
+    """
+    获取指定任务的日志内容，参数与api.routes中的同名接口相同
+
+    指定stream、offset、limit或tail_lines任一参数时以流式返回，否则返回JSON
+    """
+    # 获取查询参数
+    try_number = request.args.get('try_number', 1, type=int)
+
+    if any(name in request.args for name in ('stream', 'offset', 'limit', 'tail_lines')):
+        return await _stream_task_log(dag_id, dag_run_id, task_id, try_number)
+
+    try:
+        # 调用控制器方法
+        result, error = await log_controller.get_task_log(dag_id, dag_run_id, task_id, try_number)
+
+        if error:
+            return jsonify({'error': error}), 404
+
+        with span('format'):
+            return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+async def _stream_task_log(dag_id, dag_run_id, task_id, try_number):
+    """
+    以分块传输的纯文本流式返回任务日志，分块读取复用同步LogController，在线程中执行
+    """
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', None, type=int)
+    tail_lines = request.args.get('tail_lines', None, type=int)
+
+    # 参数验证
+    if offset < 0 or (limit is not None and limit < 0):
+        return jsonify({'error': 'offset和limit不能为负数'}), 400
+
+    max_tail_lines = LOG_STREAM_CONFIG['max_tail_lines']
+    if tail_lines is not None and not 0 < tail_lines <= max_tail_lines:
+        return jsonify({'error': f'tail_lines必须在1到{max_tail_lines}之间'}), 400
+
+    try:
+        chunks, error = await asyncio.to_thread(
+            sync_log_controller.open_task_log_stream,
+            dag_id, dag_run_id, task_id, try_number, offset=offset, limit=limit, tail_lines=tail_lines)
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+    if error:
+        return jsonify({'error': error}), 404
+
+    return Response(_iter_in_thread(chunks), mimetype='text/plain; charset=utf-8')
+
+@api_async_bp.route('/dags/unscheduled-scripts', methods=['GET'])
+async def get_unscheduled_scripts():
+    """
+    获取所有未调度的脚本及其目标表信息
+
+    返回:
+        包含未调度脚本及目标表信息的列表
+    """
+    try:
+        # 调用控制器方法
+        scripts_list = await script_controller.get_unscheduled_scripts()
+        return jsonify(scripts_list)
+    except Exception as e:
+        logger.error(f"获取未调度脚本失败: {e}")
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
@@ -0,0 +1,202 @@
+import asyncio
+from api.controllers.dag_controller import DAGController
+from api.controllers.task_controller import TaskController
+from config import EXEC_RESULTS_CONFIG
+from services.async_db_service import AsyncDBService
+from services.async_log_service import AsyncLogService
+from services.async_neo4j_service import AsyncNeo4jService
+from utils import (convert_cn_date_to_utc_range, convert_utc_to_cn_date, get_actual_states_by_category,
+                   iter_cn_dates, logger, parse_state_parameter)
+
+
+async def _wait_for(coro, timeout, default, description):
+    """
+    在超时时间内等待协程结果，超时或异常时返回默认值
+
+    Args:
+        coro: 待等待的协程
+        timeout: 超时时间（秒）
+        default: 超时或异常时的返回值
+        description: 用于日志的查询描述
+    """
+    try:
+        return await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"{description}超时({timeout}s)，按无结果处理")
+    except Exception as e:
+        logger.error(f"{description}失败: {e}")
+    return default
+
+
+class AsyncDAGController(DAGController):
+    """
+    DAGController的异步版本，数据库与Neo4j查询在事件循环中并发执行；
+    本地存储（SQLite）读写及结果格式化复用同步版本，在线程中执行，避免阻塞事件循环
+    """
+
+    def __init__(self):
+        self.db_service = AsyncDBService()
+        self.neo4j_service = AsyncNeo4jService()
+
+    async def _fetch(self, dag_ids, start_date, end_date):
+        """
+        并发查询Neo4j未调度数量和所有DAG的运行记录，各自使用独立的超时时间
+
+        Returns:
+            unscheduled_count: 未调度节点数量
+            summaries: 以DAG ID为键、DAG Run统计列表为值的字典，查询失败或超时时为None
+        """
+        neo4j_task = _wait_for(self.neo4j_service.get_unscheduled_count(),
+                               EXEC_RESULTS_CONFIG['neo4j_timeout'], 0, "Neo4j未调度数量查询")
+        if not dag_ids:
+            return await neo4j_task, {}
+
+        db_task = _wait_for(self.db_service.get_dag_run_summaries(dag_ids, start_date, end_date),
+                            EXEC_RESULTS_CONFIG['db_timeout'], None, "DAG运行记录查询")
+        unscheduled_count, summaries = await asyncio.gather(neo4j_task, db_task)
+        return unscheduled_count, summaries
+
+    async def get_execution_results(self, dag_ids, execution_date):
+        """
+        获取指定DAG在指定执行日期的执行结果，返回结构与DAGController.get_execution_results相同
+        """
+        logger.info(f"获取DAG执行结果: dag_ids={dag_ids}, execution_date={execution_date}")
+        start_date, end_date = convert_cn_date_to_utc_range(execution_date)
+
+        sealed = await self._get_valid_sealed_days(dag_ids, [execution_date])
+        pending_dag_ids = [dag_id for dag_id in dag_ids if (dag_id, execution_date) not in sealed]
+        unscheduled_count, summaries = await self._fetch(pending_dag_ids, start_date, end_date)
+        logger.info(f"未调度节点数量: {unscheduled_count}")
+
+        day_result = await asyncio.to_thread(
+            self._build_fetched_day, execution_date, dag_ids, summaries, sealed, unscheduled_count)
+        return day_result['results']
+
+    async def get_execution_results_by_range(self, dag_ids, start_date, end_date):
+        """
+        获取指定DAG在日期区间内每天的执行结果
+
+        Returns:
+            day_results: 每天一项的列表，结构与DAGController.iter_execution_results_by_range的产出相同
+        """
+        logger.info(f"获取DAG区间执行结果: dag_ids={dag_ids}, start_date={start_date}, end_date={end_date}")
+        days = list(iter_cn_dates(start_date, end_date))
+        sealed = await self._get_valid_sealed_days(dag_ids, days)
+
+        pending_days = [day for day in days if any((dag_id, day) not in sealed for dag_id in dag_ids)]
+        pending_dag_ids = [dag_id for dag_id in dag_ids if any((dag_id, day) not in sealed for day in pending_days)]
+        utc_start = utc_end = None
+        if pending_days:
+            utc_start, _ = convert_cn_date_to_utc_range(pending_days[0])
+            _, utc_end = convert_cn_date_to_utc_range(pending_days[-1])
+        unscheduled_count, summaries = await self._fetch(pending_dag_ids, utc_start, utc_end)
+        return await asyncio.to_thread(self._build_fetched_days, days, dag_ids, summaries, sealed, unscheduled_count)
+
+    async def _get_valid_sealed_days(self, dag_ids, exec_dates):
+        """与DAGController._get_sealed_days相同，本地存储读写在线程中执行，校验查询使用asyncpg"""
+        stored = await asyncio.to_thread(self._get_stored_seals, dag_ids, exec_dates)
+        if not stored:
+            return set()
+        marks = await _wait_for(self.db_service.get_run_update_marks(*self._seal_probe_range(stored)),
+                                EXEC_RESULTS_CONFIG['db_timeout'], None, "封存记录校验查询")
+        return await asyncio.to_thread(self._validate_sealed_days, stored, marks)
+
+    def _build_fetched_days(self, days, dag_ids, summaries, sealed, unscheduled_count):
+        """按天构建区间结果，读写本地存储，在线程中调用"""
+        if summaries is None:
+            return [self._build_fetched_day(day, dag_ids, None, sealed, unscheduled_count) for day in days]
+
+        # 按中国时区的开始日期分组
+        by_day = {}
+        for dag_id, run_summaries in summaries.items():
+            for run_summary in run_summaries:
+                run_day = convert_utc_to_cn_date(run_summary['dag_run_start_date'])
+                by_day.setdefault(run_day, {}).setdefault(dag_id, []).append(run_summary)
+
+        return [
+            self._build_fetched_day(day, dag_ids, by_day.get(day, {}), sealed, unscheduled_count)
+            for day in days
+        ]
+
+    def _build_fetched_day(self, exec_date, dag_ids, day_summaries, sealed, unscheduled_count):
+        """
+        构建单日结果，读写本地存储，在线程中调用；
+        数据库查询失败（day_summaries为None）时，未封存的DAG返回空runs且不写入本地存储
+        """
+        if day_summaries is not None:
+            return self._build_day_result(exec_date, dag_ids, day_summaries, sealed, unscheduled_count)
+
+        results = []
+        for dag_id in dag_ids:
+            run_summaries = self._load_stored_runs(dag_id, exec_date) if (dag_id, exec_date) in sealed else []
+            results.append(self._build_dag_result(dag_id, run_summaries, unscheduled_count))
+        return {
+            "exec_date": exec_date,
+            "results": results
+        }
+
+
+class AsyncTaskController(TaskController):
+    """TaskController的异步版本，任务过滤规则复用同步版本"""
+
+    def __init__(self):
+        self.db_service = AsyncDBService()
+        self.neo4j_service = AsyncNeo4jService()
+
+    async def get_tasks_by_state(self, dag_id, run_id, state_param):
+        """
+        获取指定状态的任务列表，返回结构与TaskController.get_tasks_by_state相同
+        """
+        state_categories = parse_state_parameter(state_param)
+        if 'all' in state_categories or not state_categories:
+            tasks = await self.db_service.get_tasks_by_run_id(dag_id, run_id)
+        else:
+            tasks = await self.db_service.get_tasks_by_run_id(
+                dag_id, run_id, get_actual_states_by_category(state_categories))
+
+        task_names = self._task_names(tasks)
+        nodes = await self.neo4j_service.check_nodes_by_en_names([en_name for _, en_name in task_names if en_name])
+        return {
+            'dag_id': dag_id,
+            'run_id': run_id,
+            'tasks': self._filter_tasks_by_nodes(task_names, nodes)
+        }
+
+
+class AsyncLogController:
+    """LogController.get_task_log的异步版本"""
+
+    def __init__(self):
+        self.log_service = AsyncLogService()
+
+    async def get_task_log(self, dag_id, dag_run_id, task_id, try_number=1):
+        """
+        获取任务的日志内容，返回结构与LogController.get_task_log相同
+        """
+        log_content, error = await self.log_service.get_task_log(dag_id, task_id, dag_run_id, try_number)
+        if error:
+            return None, error
+
+        logger.info(f"成功获取日志: dag_id={dag_id}, task_id={task_id}, 日志长度={len(log_content) if log_content else 0}")
+        return {
+            "dag_id": dag_id,
+            "dag_run_id": dag_run_id,
+            "task_id": task_id,
+            "try_number": try_number,
+            "log": log_content or ""
+        }, None
+
+
+class AsyncScriptController:
+    """ScriptController的异步版本"""
+
+    def __init__(self):
+        self.neo4j_service = AsyncNeo4jService()
+
+    async def get_unscheduled_scripts(self):
+        """
+        获取所有未调度的脚本及其目标表信息
+        """
+        scripts_list = await self.neo4j_service.get_unscheduled_list()
+        logger.info(f"找到 {len(scripts_list)} 个未调度脚本")
+        return scripts_list
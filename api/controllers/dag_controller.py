@@ -1,80 +1,473 @@
+import datetime
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from config import EXEC_RESULTS_CONFIG, RUN_SUMMARY_STORE_CONFIG
 from services.db_service import DBService
 from services.neo4j_service import Neo4jService
-from utils import convert_cn_date_to_utc_range, convert_utc_to_cn_time, format_dag_run_result, logger
+from services.request_timing import timed_span
+from services.run_summary_store import get_run_summary_store
+from services.worker_pool import get_worker_pool
+from utils import (categorize_task_state, change_fingerprint, convert_cn_date_to_utc_range, convert_utc_to_cn_time,
+                   convert_utc_to_cn_date, decode_watermark_cursor, encode_watermark_cursor, format_dag_run_summary,
+                   get_cn_today, iter_cn_dates, logger)
 
 class DAGController:
     def __init__(self):
         self.db_service = DBService()
         self.neo4j_service = Neo4jService()
-    
+
     def get_execution_results(self, dag_ids, execution_date):
         """
         获取指定DAG在指定执行日期的执行结果
-        
+
         Args:
             dag_ids: DAG ID 列表
             execution_date: 执行日期（中国时区，格式YYYY-MM-DD）
-                
+
         Returns:
             results: API响应结果
         """
         logger.info(f"获取DAG执行结果: dag_ids={dag_ids}, execution_date={execution_date}")
-        
+
         # 转换日期范围
         start_date, end_date = convert_cn_date_to_utc_range(execution_date)
-        logger.debug(f"转换后的UTC时间范围: {start_date} - {end_date}")
-        
-        # 查询Neo4j中未调度节点的数量
-        logger.info("开始查询Neo4j中未调度节点的数量")
-        unscheduled_count = self.neo4j_service.get_unscheduled_count()
+        logger.debug("转换后的UTC时间范围: %s - %s", start_date, end_date)
+
+        # 已封存的日期直接从本地存储读取，只有其余DAG需要查询Airflow数据库
+        sealed = self._get_sealed_days(dag_ids, [execution_date])
+        pending_dag_ids = [dag_id for dag_id in dag_ids if (dag_id, execution_date) not in sealed]
+
+        if EXEC_RESULTS_CONFIG['concurrent']:
+            unscheduled_count, summaries = self._fetch_concurrently(pending_dag_ids, start_date, end_date)
+        else:
+            unscheduled_count, summaries = self._fetch_serially(pending_dag_ids, start_date, end_date)
         logger.info(f"未调度节点数量: {unscheduled_count}")
-        
-        # 最终结果数组
+
+        # 按dag_ids的顺序构建结果数组
         results = []
-        
-        # 对每个DAG ID进行处理
         for dag_id in dag_ids:
-            # 查询数据库
-            dag_runs, tasks = self.db_service.get_dag_runs_with_tasks(dag_id, start_date, end_date)
-            
-            # 构建结果
-            runs = []
-            scheduled_total = 0  # 初始化为0
-            
-            if dag_runs and tasks:
-                for run_id, dag_run in dag_runs.items():
-                    # 将dag_run_start_date转换为中国时区
-                    local_exec_time = convert_utc_to_cn_time(dag_run['dag_run_start_date'])
-                    
-                    # 获取该DAG Run的任务列表
-                    task_list = tasks.get(run_id, [])
-                    
-                    # 计算任务总数（用于提取scheduled_total）
-                    task_count = len(task_list)
-                    if task_count > scheduled_total:
-                        scheduled_total = task_count  # 使用最大的任务数作为scheduled_total
-                    
-                    # 格式化该DAG Run的结果
-                    formatted_result = format_dag_run_result(dag_run, task_list)
-                    
-                    # 添加local_exec_time字段
-                    formatted_result['local_exec_time'] = local_exec_time
-                    
-                    # 添加total和unscheduled_total
-                    formatted_result['total'] = (scheduled_total or 0) + unscheduled_count
-                    formatted_result['unscheduled_total'] = unscheduled_count
-                    
-                    # 将结果添加到runs数组
-                    runs.append(formatted_result)
-            
-            # 构建单个DAG的响应
-            dag_result = {
-                "dag_id": dag_id,
-                "runs": runs
-            }
-            
-            # 添加到结果数组
-            results.append(dag_result)
-        
+            if (dag_id, execution_date) in sealed:
+                run_summaries = self._load_stored_runs(dag_id, execution_date)
+            elif summaries is not None:
+                run_summaries = summaries.get(dag_id, [])
+                self._store_finished_runs(dag_id, execution_date, run_summaries)
+            else:
+                run_summaries = []
+            results.append(self._build_dag_result(dag_id, run_summaries, unscheduled_count))
+
         logger.info("API响应结果构建完成")
-        return results
\ No newline at end of file
+        return results
+
+    def iter_execution_results_by_range(self, dag_ids, start_date, end_date):
+        """
+        按天流式返回指定DAG在日期区间内的执行结果
+
+        已封存的日期从本地存储读取，其余日期只执行一次数据库范围查询，结果按中国时区的开始日期分组，
+        每完成一天即返回该天的结果，没有运行记录的日期返回空runs
+
+        Args:
+            dag_ids: DAG ID 列表
+            start_date: 开始日期（中国时区，格式YYYY-MM-DD）
+            end_date: 结束日期（中国时区，格式YYYY-MM-DD）
+
+        Yields:
+            day_result: 包含exec_date和results的字典，results结构与get_execution_results的返回值相同
+        """
+        logger.info(f"获取DAG区间执行结果: dag_ids={dag_ids}, start_date={start_date}, end_date={end_date}")
+
+        unscheduled_count = self.neo4j_service.get_unscheduled_count()
+        logger.info(f"未调度节点数量: {unscheduled_count}")
+
+        days = list(iter_cn_dates(start_date, end_date))
+        sealed = self._get_sealed_days(dag_ids, days)
+
+        # 只对包含未封存日期的最小区间查询Airflow数据库
+        pending_days = [day for day in days if any((dag_id, day) not in sealed for dag_id in dag_ids)]
+        run_summaries = iter(())
+        if pending_days:
+            pending_dag_ids = [dag_id for dag_id in dag_ids if any((dag_id, day) not in sealed for day in pending_days)]
+            utc_start, _ = convert_cn_date_to_utc_range(pending_days[0])
+            _, utc_end = convert_cn_date_to_utc_range(pending_days[-1])
+            logger.debug("转换后的UTC时间范围: %s - %s", utc_start, utc_end)
+            run_summaries = self.db_service.iter_dag_run_summaries(pending_dag_ids, utc_start, utc_end)
+        else:
+            logger.info("日期区间内的运行记录均已保存在本地，无需查询数据库")
+
+        day_index = 0
+        day_summaries = {}
+
+        for run_summary in run_summaries:
+            run_day = convert_utc_to_cn_date(run_summary['dag_run_start_date'])
+            # 查询结果按开始时间排序，遇到更晚的日期时先输出之前已完成的日期
+            while day_index < len(days) - 1 and days[day_index] < run_day:
+                yield self._build_day_result(days[day_index], dag_ids, day_summaries, sealed, unscheduled_count)
+                day_summaries = {}
+                day_index += 1
+            day_summaries.setdefault(run_summary['dag_id'], []).append(run_summary)
+
+        while day_index < len(days):
+            yield self._build_day_result(days[day_index], dag_ids, day_summaries, sealed, unscheduled_count)
+            day_summaries = {}
+            day_index += 1
+
+        logger.info("区间执行结果输出完成")
+
+    def get_changes(self, dag_ids, cursor=None):
+        """
+        获取游标之后发生变化的DAG Run和任务
+
+        不带游标调用时只返回当前水位对应的游标，客户端应在获取游标后再加载全量数据，
+        之后使用返回的游标轮询变化
+
+        Args:
+            dag_ids: DAG ID 列表
+            cursor: 上次调用返回的游标，默认为None
+
+        Returns:
+            result: 包含cursor、dag_runs和task_instances的字典
+
+        Raises:
+            ValueError: 游标格式无效
+        """
+        if cursor is None:
+            dag_run_watermark, task_watermark = self.db_service.get_update_watermarks(dag_ids)
+            logger.info(f"初始化增量游标: dag_run={dag_run_watermark}, task_instance={task_watermark}")
+            return {
+                'cursor': encode_watermark_cursor({'dag_run': dag_run_watermark, 'task_instance': task_watermark}),
+                'dag_runs': [],
+                'task_instances': []
+            }
+
+        watermarks, seen = decode_watermark_cursor(cursor)
+        dag_run_watermark = watermarks.get('dag_run')
+        task_watermark = watermarks.get('task_instance')
+
+        # 水位回退一小段时间，避免遗漏updated_at较早但提交较晚的记录；
+        # 回退窗口内上次已返回的记录按游标中的指纹过滤，不会重复返回
+        overlap = datetime.timedelta(seconds=EXEC_RESULTS_CONFIG['changes_overlap_seconds'])
+        dag_runs, tasks = self.db_service.get_changes_since(
+            dag_ids,
+            dag_run_watermark - overlap if dag_run_watermark else None,
+            task_watermark - overlap if task_watermark else None
+        )
+
+        dag_runs, dag_run_watermark, dag_run_seen = self._filter_returned_changes(
+            dag_runs, ('dag_id', 'run_id'), dag_run_watermark, seen.get('dag_run', set()), overlap)
+        tasks, task_watermark, task_seen = self._filter_returned_changes(
+            tasks, ('dag_id', 'run_id', 'task_id'), task_watermark, seen.get('task_instance', set()), overlap)
+
+        return {
+            'cursor': encode_watermark_cursor(
+                {'dag_run': dag_run_watermark, 'task_instance': task_watermark},
+                {'dag_run': dag_run_seen, 'task_instance': task_seen}
+            ),
+            'dag_runs': [
+                {
+                    'dag_id': row['dag_id'],
+                    'run_id': row['run_id'],
+                    'state': row['state'],
+                    'logical_date_local': convert_utc_to_cn_time(row['execution_date']),
+                    'local_exec_time': convert_utc_to_cn_time(row['start_date']),
+                    'local_end_time': convert_utc_to_cn_time(row['end_date']),
+                    'updated_at': convert_utc_to_cn_time(row['updated_at'])
+                }
+                for row in dag_runs
+            ],
+            'task_instances': [
+                {
+                    'dag_id': row['dag_id'],
+                    'run_id': row['run_id'],
+                    'task_id': row['task_id'],
+                    'raw_state': row['state'],
+                    'state': categorize_task_state(row['state']),
+                    'try_number': row['try_number'],
+                    'local_start_time': convert_utc_to_cn_time(row['start_date']),
+                    'local_end_time': convert_utc_to_cn_time(row['end_date']),
+                    'updated_at': convert_utc_to_cn_time(row['updated_at'])
+                }
+                for row in tasks
+            ]
+        }
+
+    def _filter_returned_changes(self, rows, key_fields, watermark, seen, overlap):
+        """
+        去掉上次调用已返回的变化记录，并推进水位
+
+        记录以(主键, updated_at)的指纹标识，同一记录再次更新后updated_at改变，指纹随之改变
+
+        Args:
+            rows: 回退查询得到的记录列表
+            key_fields: 主键字段名
+            watermark: 上次的水位
+            seen: 上次返回的指纹集合
+            overlap: 水位回退时长
+
+        Returns:
+            changed: 未返回过的记录列表
+            watermark: 新的水位
+            seen: 新水位回退窗口内全部记录的指纹列表，供下一次调用过滤
+        """
+        changed = []
+        fingerprints = []
+        for row in rows:
+            fingerprint = change_fingerprint(row, key_fields)
+            fingerprints.append((row['updated_at'], fingerprint))
+            if fingerprint not in seen:
+                changed.append(row)
+            if row['updated_at'] and (watermark is None or row['updated_at'] > watermark):
+                watermark = row['updated_at']
+
+        window_start = watermark - overlap if watermark else None
+        seen = sorted({
+            fingerprint for updated_at, fingerprint in fingerprints
+            if window_start is None or (updated_at and updated_at > window_start)
+        })
+        return changed, watermark, seen
+
+    def _build_day_result(self, exec_date, dag_ids, day_summaries, sealed, unscheduled_count):
+        """
+        构建单日的响应结果
+
+        Args:
+            exec_date: 执行日期（中国时区，格式YYYY-MM-DD）
+            dag_ids: DAG ID 列表
+            day_summaries: 以DAG ID为键、当天从数据库查询到的DAG Run统计列表为值的字典
+            sealed: 已封存的(dag_id, exec_date)集合，这些组合从本地存储读取
+            unscheduled_count: 未调度节点数量
+
+        Returns:
+            day_result: 包含exec_date和按dag_ids顺序排列的results的字典
+        """
+        results = []
+        for dag_id in dag_ids:
+            if (dag_id, exec_date) in sealed:
+                run_summaries = self._load_stored_runs(dag_id, exec_date)
+            else:
+                run_summaries = day_summaries.get(dag_id, [])
+                self._store_finished_runs(dag_id, exec_date, run_summaries)
+            results.append(self._build_dag_result(dag_id, run_summaries, unscheduled_count))
+
+        return {
+            "exec_date": exec_date,
+            "results": results
+        }
+
+    def _get_sealed_days(self, dag_ids, exec_dates):
+        """
+        查询本地存储中已封存且仍然有效的(DAG, 日期)组合
+
+        封存时记录的DAG Run数量和最大updated_at与Airflow数据库比对（只查询dag_run表），
+        运行被清除重跑或新增运行时解除封存，该日期重新从数据库查询
+
+        Returns:
+            sealed: 有效的已封存(dag_id, exec_date)集合，本地存储不可用时返回空集合
+        """
+        stored = self._get_stored_seals(dag_ids, exec_dates)
+        if not stored:
+            return set()
+        marks = self.db_service.get_run_update_marks(*self._seal_probe_range(stored))
+        return self._validate_sealed_days(stored, marks)
+
+    def _get_stored_seals(self, dag_ids, exec_dates):
+        """
+        读取本地存储中的封存记录
+
+        Returns:
+            stored: 以(dag_id, exec_date)为键、(run_count, max_updated_at)为值的字典，本地存储不可用时返回空字典
+        """
+        store = get_run_summary_store()
+        if store is None:
+            return {}
+        try:
+            return store.get_sealed_days(dag_ids, exec_dates)
+        except Exception as e:
+            logger.error(f"查询本地DAG Run统计存储失败: {e}")
+            return {}
+
+    def _seal_probe_range(self, stored):
+        """返回校验封存记录需要查询的DAG ID列表和UTC时间范围"""
+        dag_ids = sorted({dag_id for dag_id, _ in stored})
+        days = sorted({exec_date for _, exec_date in stored})
+        utc_start, _ = convert_cn_date_to_utc_range(days[0])
+        _, utc_end = convert_cn_date_to_utc_range(days[-1])
+        return dag_ids, utc_start, utc_end
+
+    def _validate_sealed_days(self, stored, marks):
+        """
+        比对封存记录与数据库中当天的DAG Run数量和最大updated_at，不一致的解除封存
+
+        Args:
+            stored: _get_stored_seals的返回值
+            marks: DBService.get_run_update_marks的返回值，查询失败时为None
+
+        Returns:
+            sealed: 仍然有效的(dag_id, exec_date)集合；校验查询失败时沿用全部封存记录
+        """
+        if marks is None:
+            logger.warning("校验本地封存记录失败，沿用本地存储的统计")
+            return set(stored)
+
+        current = {}
+        for mark in marks:
+            key = (mark['dag_id'], convert_utc_to_cn_date(mark['start_date']))
+            run_count, latest = current.get(key, (0, None))
+            updated_at = mark['updated_at']
+            if updated_at is not None and (latest is None or updated_at > latest):
+                latest = updated_at
+            current[key] = (run_count + 1, latest)
+
+        store = get_run_summary_store()
+        sealed = set()
+        for key, fingerprint in stored.items():
+            if current.get(key, (0, None)) == fingerprint:
+                sealed.add(key)
+                continue
+            try:
+                store.unseal_day(*key)
+            except Exception as e:
+                logger.error(f"解除本地封存失败: {e}")
+        return sealed
+
+    def _load_stored_runs(self, dag_id, exec_date):
+        """从本地存储读取已封存日期的DAG Run统计"""
+        run_summaries = get_run_summary_store().get_runs(dag_id, exec_date)
+        logger.info(f"从本地存储读取DAG {dag_id} 在 {exec_date} 的 {len(run_summaries)} 个DAG Run")
+        return run_summaries
+
+    def _store_finished_runs(self, dag_id, exec_date, run_summaries):
+        """
+        将已结束的DAG Run统计写入本地存储；日期已过去且所有运行均已结束时封存该日期
+
+        Args:
+            dag_id: DAG ID
+            exec_date: 执行日期（中国时区，格式YYYY-MM-DD）
+            run_summaries: 从数据库查询到的该DAG当天的DAG Run统计列表
+        """
+        store = get_run_summary_store()
+        if store is None:
+            return
+
+        terminal_states = RUN_SUMMARY_STORE_CONFIG['terminal_states']
+        finished = [summary for summary in run_summaries if summary['dag_run_state'] in terminal_states]
+        try:
+            store.save_runs(exec_date, finished)
+            if exec_date < get_cn_today() and len(finished) == len(run_summaries):
+                updated = [summary['dag_run_updated_at'] for summary in run_summaries
+                           if summary.get('dag_run_updated_at') is not None]
+                store.seal_day(dag_id, exec_date, len(run_summaries), max(updated) if updated else None)
+        except Exception as e:
+            logger.error(f"写入本地DAG Run统计存储失败: {e}")
+
+    def _fetch_serially(self, dag_ids, start_date, end_date):
+        """
+        依次查询Neo4j未调度数量和所有DAG的运行记录
+
+        Returns:
+            unscheduled_count: 未调度节点数量
+            summaries: 以DAG ID为键、DAG Run统计列表为值的字典，查询失败时为None
+        """
+        logger.info("开始查询Neo4j中未调度节点的数量")
+        unscheduled_count = self.neo4j_service.get_unscheduled_count()
+
+        if not dag_ids:
+            return unscheduled_count, {}
+
+        # 所有DAG合并为一次数据库查询，任务状态在SQL中聚合
+        summaries = self.db_service.get_dag_run_summaries(dag_ids, start_date, end_date)
+        return unscheduled_count, summaries
+
+    def _fetch_concurrently(self, dag_ids, start_date, end_date):
+        """
+        在共享线程池中并发查询Neo4j未调度数量和所有DAG的运行记录
+
+        各后端使用独立的超时时间（从提交时开始计算），超时的查询按无结果处理，
+        总耗时约为较慢一次查询的耗时而不是两者之和
+
+        Returns:
+            unscheduled_count: 未调度节点数量
+            summaries: 以DAG ID为键、DAG Run统计列表为值的字典，查询失败或超时时为None
+        """
+        executor = get_worker_pool('exec-results', EXEC_RESULTS_CONFIG['max_workers'])
+        submitted_at = time.monotonic()
+
+        neo4j_future = executor.submit(self.neo4j_service.get_unscheduled_count)
+        # 所有DAG合并为一次数据库查询，任务状态在SQL中聚合
+        db_future = None
+        if dag_ids:
+            db_future = executor.submit(self.db_service.get_dag_run_summaries, dag_ids, start_date, end_date)
+
+        unscheduled_count = self._wait_result(
+            neo4j_future, submitted_at, EXEC_RESULTS_CONFIG['neo4j_timeout'], 0, "Neo4j未调度数量查询")
+        if db_future is None:
+            return unscheduled_count, {}
+        summaries = self._wait_result(
+            db_future, submitted_at, EXEC_RESULTS_CONFIG['db_timeout'], None, "DAG运行记录查询")
+        return unscheduled_count, summaries
+
+    def _wait_result(self, future, submitted_at, timeout, default, description):
+        """
+        在剩余超时时间内等待future结果，超时或异常时返回默认值
+
+        Args:
+            future: 待等待的Future
+            submitted_at: 提交时间（time.monotonic()）
+            timeout: 从提交开始计算的超时时间（秒）
+            default: 超时或异常时的返回值
+            description: 用于日志的查询描述
+
+        Returns:
+            result: 查询结果或默认值
+        """
+        remaining = max(0, timeout - (time.monotonic() - submitted_at))
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning(f"{description}超时({timeout}s)，按无结果处理")
+        except Exception as e:
+            logger.error(f"{description}失败: {e}")
+        return default
+
+    @timed_span('format')
+    def _build_dag_result(self, dag_id, run_summaries, unscheduled_count):
+        """
+        构建单个DAG的响应结果
+
+        Args:
+            dag_id: DAG ID
+            run_summaries: 按开始时间排序的DAG Run统计列表
+            unscheduled_count: 未调度节点数量
+
+        Returns:
+            dag_result: 包含dag_id和runs的字典
+        """
+        runs = []
+        scheduled_total = 0  # 初始化为0
+
+        for run_summary in run_summaries:
+            # 将dag_run_start_date转换为中国时区
+            local_exec_time = convert_utc_to_cn_time(run_summary['dag_run_start_date'])
+
+            # 计算任务总数（用于提取scheduled_total）
+            task_count = run_summary['total']
+            if task_count > scheduled_total:
+                scheduled_total = task_count  # 使用最大的任务数作为scheduled_total
+
+            # 格式化该DAG Run的结果
+            formatted_result = format_dag_run_summary(run_summary)
+
+            # 添加local_exec_time字段
+            formatted_result['local_exec_time'] = local_exec_time
+
+            # 添加total和unscheduled_total
+            formatted_result['total'] = (scheduled_total or 0) + unscheduled_count
+            formatted_result['unscheduled_total'] = unscheduled_count
+
+            # 将结果添加到runs数组
+            runs.append(formatted_result)
+
+        # 构建单个DAG的响应
+        return {
+            "dag_id": dag_id,
+            "runs": runs
+        }
@@ -0,0 +1,99 @@
+import datetime
+from services.error_index import get_error_indexer
+from utils import convert_utc_to_cn_time, logger
+
+class ErrorController:
+    def _indexer(self):
+        indexer = get_error_indexer()
+        if indexer is None:
+            raise RuntimeError("错误签名索引未启用")
+        return indexer
+    
+    def _since(self, days):
+        return datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+    
+    def _format_time(self, value):
+        """将索引中的UTC ISO时间转换为中国时区时间字符串"""
+        if not value:
+            return None
+        return convert_utc_to_cn_time(datetime.datetime.fromisoformat(value))
+    
+    def get_signature_groups(self, days=7, dag_id=None, limit=50):
+        """
+        按错误签名分组获取最近的失败任务
+        
+        Args:
+            days: 统计最近多少天开始的DAG Run
+            dag_id: 只统计指定DAG，默认为None表示全部
+            limit: 最多返回的签名数量
+            
+        Returns:
+            result: 包含时间窗口和签名分组列表的字典
+            
+        Raises:
+            RuntimeError: 错误签名索引未启用
+        """
+        groups = self._indexer().index.get_signature_groups(self._since(days), dag_id=dag_id, limit=limit)
+        for group in groups:
+            group['first_seen'] = self._format_time(group['first_seen'])
+            group['last_seen'] = self._format_time(group['last_seen'])
+        
+        logger.info(f"查询错误签名分组: days={days}, dag_id={dag_id}, 签名数={len(groups)}")
+        return {
+            "days": days,
+            "dag_id": dag_id,
+            "signatures": groups
+        }
+    
+    def get_signature_detail(self, signature, days=7, dag_id=None, limit=200):
+        """
+        获取某个错误签名及其失败记录
+        
+        Args:
+            signature: 错误签名
+            days: 查询最近多少天开始的DAG Run
+            dag_id: 只查询指定DAG，默认为None表示全部
+            limit: 最多返回的失败记录数
+            
+        Returns:
+            result: 签名信息及失败记录列表，签名不存在时返回None
+            
+        Raises:
+            RuntimeError: 错误签名索引未启用
+        """
+        index = self._indexer().index
+        detail = index.get_signature(signature)
+        if detail is None:
+            return None
+        
+        occurrences = index.get_occurrences(signature, self._since(days), dag_id=dag_id, limit=limit)
+        for occurrence in occurrences:
+            occurrence['occurred_at'] = self._format_time(occurrence['occurred_at'])
+        detail['occurrences'] = occurrences
+        return detail
+    
+    def get_index_stats(self):
+        """
+        获取错误签名索引的运行状态
+        
+        Returns:
+            stats: 状态字典，未启用时只包含enabled=False
+        """
+        indexer = get_error_indexer()
+        if indexer is None:
+            return {'enabled': False}
+        return {'enabled': True, **indexer.stats()}
+    
+    def run_index_now(self):
+        """
+        立即执行一个索引周期
+        
+        Returns:
+            result: 包含本次解析日志数量的字典，已有周期（包括其他进程中的周期）在执行时parsed为None
+            
+        Raises:
+            RuntimeError: 错误签名索引未启用
+        """
+        parsed = self._indexer().run_once()
+        logger.info(f"手动执行错误签名索引: 解析日志 {parsed} 份")
+        return {'parsed': parsed, 'already_running': parsed is None}
@@ -1,6 +1,17 @@
 # api/controllers/log_controller.py
+import queue
+import threading
+import time
+from concurrent.futures import as_completed
+from config import BULK_LOG_CONFIG, LOG_SEARCH_CONFIG
 from services.log_service import LogService
-from utils import logger
+from services.worker_pool import get_worker_pool
+from utils import categorize_task_state, get_actual_states_by_category, logger, parse_state_parameter
+
+# 工作线程完成一个任务日志搜索后放入队列的唤醒标记（完成计数由信号量记录）
+_SEARCH_DONE = object()
+# 等待搜索结果的轮询间隔（秒），用于发现全部完成或已取消
+_SEARCH_POLL_INTERVAL = 0.5
 
 class LogController:
     def __init__(self):
@@ -36,4 +47,288 @@ class LogController:
         }
         
         logger.info(f"成功获取日志: dag_id={dag_id}, task_id={task_id}, 日志长度={len(log_content) if log_content else 0}")
-        return result, None
\ No newline at end of file
+        return result, None
+    
+    def open_task_log_stream(self, dag_id, dag_run_id, task_id, try_number=1, offset=0, limit=None, tail_lines=None):
+        """
+        以流式方式获取任务日志
+        
+        Args:
+            dag_id: DAG ID
+            dag_run_id: DAG Run ID
+            task_id: 任务 ID
+            try_number: 尝试次数，默认为1
+            offset: 跳过日志开头的字节数，默认为0
+            limit: 最多返回的字节数，默认为None表示不限制
+            tail_lines: 只返回最后N行，指定时忽略offset和limit
+            
+        Returns:
+            chunks: 日志内容（UTF-8字节块）的迭代器
+            error: 错误信息（如果有）
+        """
+        logger.info(f"流式获取日志: dag_id={dag_id}, task_id={task_id}, offset={offset}, limit={limit}, tail_lines={tail_lines}")
+        return self.log_service.open_task_log_stream(
+            dag_id, task_id, dag_run_id, try_number, offset=offset, limit=limit, tail_lines=tail_lines)
+    
+    def tail_task_log(self, dag_id, dag_run_id, task_id, try_number=1, token=None, initial_lines=None):
+        """
+        增量获取任务日志
+        
+        Args:
+            dag_id: DAG ID
+            dag_run_id: DAG Run ID
+            task_id: 任务 ID
+            try_number: 尝试次数，默认为1
+            token: 上次调用返回的令牌，默认为None
+            initial_lines: 不带令牌时返回的行数
+            
+        Returns:
+            result: 包含新增日志内容、新令牌和元数据的字典
+            error: 错误信息（如果有）
+        """
+        tail, error = self.log_service.tail_task_log(
+            dag_id, task_id, dag_run_id, try_number, token=token, initial_lines=initial_lines)
+        
+        if error:
+            return None, error
+        
+        result = {
+            "dag_id": dag_id,
+            "dag_run_id": dag_run_id,
+            "task_id": task_id,
+            "try_number": try_number,
+            "log": tail['content'],
+            "token": tail['token'],
+            "source": tail['source'],
+            "reset": tail['reset']
+        }
+        
+        logger.info(f"增量获取日志: dag_id={dag_id}, task_id={task_id}, source={tail['source']}, 新增长度={len(tail['content'])}")
+        return result, None
+    
+    def get_task_log_lines(self, dag_id, dag_run_id, task_id, try_number=1, start_line=0, line_count=100,
+                           tail_lines=None, level=None):
+        """
+        按行获取本地任务日志
+        
+        Args:
+            dag_id: DAG ID
+            dag_run_id: DAG Run ID
+            task_id: 任务 ID
+            try_number: 尝试次数，默认为1
+            start_line: 起始行号（从0开始）
+            line_count: 最多返回的行数
+            tail_lines: 只返回最后N行
+            level: 只返回包含该日志级别的行
+            
+        Returns:
+            result: 包含行内容和分页信息的字典
+            error: 错误信息（如果有）
+        """
+        lines, error = self.log_service.read_local_log_lines(
+            dag_id, task_id, dag_run_id, try_number, start_line=start_line, line_count=line_count,
+            tail_lines=tail_lines, level=level)
+        
+        if error:
+            return None, error
+        
+        result = {
+            "dag_id": dag_id,
+            "dag_run_id": dag_run_id,
+            "task_id": task_id,
+            "try_number": try_number,
+            **lines
+        }
+        return result, None
+    
+    def search_run_logs(self, dag_id, dag_run_id, query, context_lines=2, case_sensitive=False, max_matches=None):
+        """
+        在DAG Run所有任务的日志中并发搜索关键字
+        
+        各任务日志在共享线程池中并发获取并逐行匹配，匹配结果经有界队列交给调用方，
+        因此第一个匹配找到后即可开始输出；达到max_matches或调用方停止迭代时取消剩余搜索
+        
+        Args:
+            dag_id: DAG ID
+            dag_run_id: DAG Run ID
+            query: 要搜索的字符串
+            context_lines: 每个匹配前后附带的上下文行数
+            case_sensitive: 是否区分大小写
+            max_matches: 最多返回的匹配数，默认使用配置值
+            
+        Returns:
+            events: 搜索事件字典的生成器，类型为match、error、task_done，最后一条为summary
+            error: 错误信息（如果有）
+        """
+        tasks = self.log_service.db_service.get_tasks_by_run_id(dag_id, dag_run_id)
+        # try_number为0表示任务尚未开始执行，没有日志
+        tasks = [task for task in tasks if task['try_number']]
+        if not tasks:
+            return None, f"未找到DAG Run的任务: dag_id={dag_id}, run_id={dag_run_id}"
+        
+        max_matches = max_matches or LOG_SEARCH_CONFIG['max_matches']
+        results = queue.Queue(maxsize=LOG_SEARCH_CONFIG['queue_size'])
+        cancel = threading.Event()
+        finished = threading.Semaphore(0)
+        executor = get_worker_pool('log-search', LOG_SEARCH_CONFIG['max_workers'])
+        for task in tasks:
+            executor.submit(self._search_task_log, dag_id, dag_run_id, task, query, context_lines,
+                            case_sensitive, results, cancel, finished)
+        
+        logger.info(f"搜索DAG Run日志: dag_id={dag_id}, run_id={dag_run_id}, 任务数={len(tasks)}, query={query!r}")
+        return self._iter_search_events(tasks, results, cancel, finished, max_matches), None
+    
+    def _iter_search_events(self, tasks, results, cancel, finished, max_matches):
+        pending = len(tasks)
+        match_count = 0
+        truncated = False
+        try:
+            while True:
+                try:
+                    event = results.get_nowait()
+                except queue.Empty:
+                    while finished.acquire(blocking=False):
+                        pending -= 1
+                    # 工作线程先放入结果再释放信号量，全部完成后队列为空即已取完；
+                    # 工作线程因长时间未消费而放弃时cancel已设置，队列取空后不再等待剩余任务
+                    if results.empty() and (not pending or cancel.is_set()):
+                        break
+                    try:
+                        event = results.get(timeout=_SEARCH_POLL_INTERVAL)
+                    except queue.Empty:
+                        continue
+                if event is _SEARCH_DONE:
+                    continue
+                if event['type'] == 'match':
+                    if match_count >= max_matches:
+                        truncated = True
+                        break
+                    match_count += 1
+                yield event
+            # 工作线程放弃时部分结果未返回，同样标记为截断
+            truncated = truncated or cancel.is_set()
+            yield {
+                'type': 'summary',
+                'tasks_searched': len(tasks) - pending,
+                'tasks_total': len(tasks),
+                'matches': match_count,
+                'truncated': truncated
+            }
+        finally:
+            # 客户端断开或结果已截断时通知工作线程停止
+            cancel.set()
+    
+    def _search_task_log(self, dag_id, dag_run_id, task, query, context_lines, case_sensitive, results, cancel,
+                         finished):
+        """在单个任务日志中搜索，运行在工作线程中，结束时（包括取消）总是释放finished"""
+        task_id = task['task_id']
+        try_number = task['try_number']
+        
+        def put(event):
+            # 队列已满时等待；调用方取消或长时间未消费（如响应未开始即断开）时放弃
+            deadline = time.monotonic() + LOG_SEARCH_CONFIG['put_timeout']
+            while not cancel.is_set() and time.monotonic() < deadline:
+                try:
+                    results.put(event, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            cancel.set()
+            return False
+        
+        try:
+            if cancel.is_set():
+                return
+            chunks, error = self.log_service.open_task_log_stream(dag_id, task_id, dag_run_id, try_number)
+            if error:
+                put({'type': 'error', 'task_id': task_id, 'try_number': try_number, 'error': error})
+                return
+            
+            match_count = 0
+            for match in self.log_service.iter_log_matches(chunks, query, context_lines, case_sensitive):
+                if not put({'type': 'match', 'task_id': task_id, 'try_number': try_number, **match}):
+                    return
+                match_count += 1
+            put({'type': 'task_done', 'task_id': task_id, 'try_number': try_number, 'matches': match_count})
+        except Exception as e:
+            logger.error(f"搜索任务日志失败: dag_id={dag_id}, task_id={task_id}, 错误={e}")
+            put({'type': 'error', 'task_id': task_id, 'try_number': try_number, 'error': str(e)})
+        finally:
+            finished.release()
+            # 唤醒等待中的调用方；队列已满说明调用方尚未取完，不需要唤醒
+            try:
+                results.put_nowait(_SEARCH_DONE)
+            except queue.Full:
+                pass
+    
+    def get_run_logs_bulk(self, dag_id, dag_run_id, state_param='failed', all_tries=False):
+        """
+        并发获取DAG Run中指定状态任务的日志
+        
+        任务列表通过一次数据库查询获得，各日志在共享线程池中并发获取（线程池大小即并发上限），
+        按完成顺序返回，整批耗时接近单个日志的耗时
+        
+        Args:
+            dag_id: DAG ID
+            dag_run_id: DAG Run ID
+            state_param: 状态参数（如'failed'、'success,failed'或'all'），默认为'failed'
+            all_tries: 是否获取每个任务的全部尝试，默认为False只获取最近一次
+            
+        Returns:
+            logs: 日志结果字典的生成器，每项包含任务信息及log或error
+            error: 错误信息（如果有）
+        """
+        state_categories = parse_state_parameter(state_param)
+        if 'all' in state_categories or not state_categories:
+            tasks = self.log_service.db_service.get_tasks_by_run_id(dag_id, dag_run_id)
+        else:
+            tasks = self.log_service.db_service.get_tasks_by_run_id(
+                dag_id, dag_run_id, get_actual_states_by_category(state_categories))
+        
+        # try_number为0表示任务尚未开始执行，没有日志
+        targets = []
+        for task in tasks:
+            if not task['try_number']:
+                continue
+            first_try = 1 if all_tries else task['try_number']
+            targets.extend((task, try_number) for try_number in range(first_try, task['try_number'] + 1))
+        
+        if not targets:
+            return None, f"未找到符合条件的任务: dag_id={dag_id}, run_id={dag_run_id}, state={state_param}"
+        if len(targets) > BULK_LOG_CONFIG['max_logs']:
+            return None, f"日志数量 {len(targets)} 超过单次请求上限 {BULK_LOG_CONFIG['max_logs']}"
+        
+        executor = get_worker_pool('log-bulk', BULK_LOG_CONFIG['max_workers'])
+        futures = {
+            executor.submit(self.log_service.get_task_log, dag_id, task['task_id'], dag_run_id, try_number):
+                (task, try_number)
+            for task, try_number in targets
+        }
+        logger.info(f"批量获取日志: dag_id={dag_id}, run_id={dag_run_id}, state={state_param}, 日志数={len(targets)}")
+        return self._iter_bulk_logs(dag_id, dag_run_id, futures), None
+    
+    def _iter_bulk_logs(self, dag_id, dag_run_id, futures):
+        try:
+            for future in as_completed(futures):
+                task, try_number = futures[future]
+                result = {
+                    "dag_id": dag_id,
+                    "dag_run_id": dag_run_id,
+                    "task_id": task['task_id'],
+                    "try_number": try_number,
+                    "raw_state": task['raw_state'],
+                    "state": categorize_task_state(task['raw_state'])
+                }
+                try:
+                    log_content, error = future.result()
+                except Exception as e:
+                    log_content, error = None, f"获取日志时发生错误: {str(e)}"
+                if error:
+                    result["error"] = error
+                else:
+                    result["log"] = log_content or ""
+                yield result
+        finally:
+            # 客户端断开时取消尚未开始的请求
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,83 @@
+from services.airflow_client import get_airflow_client
+from services.db_service import DBService
+from services.log_cache import get_log_cache
+from services.log_sources import get_remote_log_source
+from services.neo4j_service import Neo4jService
+from utils import logger
+
+class SystemController:
+    def __init__(self):
+        self.db_service = DBService()
+        self.neo4j_service = Neo4jService()
+    
+    def get_db_pool_stats(self):
+        """
+        获取数据库连接池的运行状态
+        
+        Returns:
+            stats: 连接池状态字典
+        """
+        stats = self.db_service.get_pool_stats()
+        logger.debug("数据库连接池状态: %s", stats)
+        return stats
+    
+    def get_node_catalog_stats(self):
+        """
+        获取节点目录缓存的运行状态
+        
+        Returns:
+            stats: 目录缓存状态字典
+        """
+        return self.neo4j_service.get_node_catalog_stats()
+    
+    def invalidate_node_catalog(self):
+        """
+        手动失效节点目录缓存并立即重新加载
+        
+        Returns:
+            stats: 重新加载后的目录缓存状态
+        """
+        logger.info("收到节点目录缓存失效请求")
+        return self.neo4j_service.invalidate_node_catalog()
+    
+    def get_unscheduled_cache_stats(self):
+        """
+        获取未调度脚本数量/列表缓存的运行状态
+        
+        Returns:
+            stats: 缓存状态字典
+        """
+        return self.neo4j_service.get_unscheduled_cache_stats()
+    
+    def get_log_cache_stats(self):
+        """
+        获取日志缓存的运行状态
+        
+        Returns:
+            stats: 缓存状态字典，未启用时只包含enabled=False
+        """
+        log_cache = get_log_cache()
+        if log_cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **log_cache.stats()}
+    
+    def get_airflow_client_stats(self):
+        """
+        获取Airflow API客户端的运行状态
+        
+        Returns:
+            stats: 请求计数、超时配置和熔断器状态
+        """
+        return get_airflow_client().stats()
+    
+    def get_remote_log_stats(self):
+        """
+        获取远程日志来源的运行状态
+        
+        Returns:
+            stats: 请求计数和元数据缓存状态，未启用时只包含enabled=False
+        """
+        remote_log_source = get_remote_log_source()
+        if remote_log_source is None:
+            return {'enabled': False}
+        return {'enabled': True, **remote_log_source.stats()}
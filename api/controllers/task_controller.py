@@ -1,6 +1,10 @@
+import time
+from config import RUN_STREAM_CONFIG
 from services.db_service import DBService
 from services.neo4j_service import Neo4jService
-from utils import parse_state_parameter, get_actual_states_by_category
+from services.request_timing import timed_span
+from services.run_watcher import get_run_watcher
+from utils import parse_state_parameter, get_actual_states_by_category, format_sse_event, logger
 
 class TaskController:
     def __init__(self):
@@ -32,16 +36,37 @@ class TaskController:
             # 查询数据库
             tasks = self.db_service.get_tasks_by_run_id(dag_id, run_id, actual_states)
         
-        # 过滤和处理任务列表
-        filtered_tasks = []
-        for task in tasks:
-            # 从task_id中提取英文名
-            task_id = task.get('task_id', '')
-            en_name = self._extract_table_name(task_id)
+        # 从task_id中提取英文名，并一次性查询Neo4j获取所有节点信息
+        task_names = self._task_names(tasks)
+        nodes = self.neo4j_service.check_nodes_by_en_names([en_name for _, en_name in task_names if en_name])
+        
+        # 构建结果
+        return {
+            'dag_id': dag_id,
+            'run_id': run_id,
+            'tasks': self._filter_tasks_by_nodes(task_names, nodes)
+        }
+    
+    def _task_names(self, tasks):
+        """返回(任务, 从task_id中提取的英文名)列表"""
+        return [(task, self._extract_table_name(task.get('task_id', ''))) for task in tasks]
+    
+    @timed_span('format')
+    def _filter_tasks_by_nodes(self, task_names, nodes):
+        """
+        只保留对应节点存在的任务，并设置target_table
+        
+        Args:
+            task_names: _task_names的返回值
+            nodes: 以英文名为键、(exists, cn_name)为值的字典
             
+        Returns:
+            filtered_tasks: 过滤后的任务列表
+        """
+        filtered_tasks = []
+        for task, en_name in task_names:
             if en_name:
-                # 查询Neo4j获取节点信息
-                node_exists, cn_name = self.neo4j_service.check_node_by_en_name(en_name)
+                node_exists, cn_name = nodes.get(en_name, (False, None))
                 
                 # 如果节点存在
                 if node_exists:
@@ -55,13 +80,49 @@ class TaskController:
                     # 将任务添加到过滤后的列表
                     filtered_tasks.append(task)
                 # 如果节点不存在，跳过该任务（即从结果中删除）
+        return filtered_tasks
+    
+    def stream_run_status(self, dag_id, run_id):
+        """
+        订阅DAG Run的任务状态变化，返回Server-Sent Events文本的生成器
         
-        # 构建结果
-        return {
-            'dag_id': dag_id,
-            'run_id': run_id,
-            'tasks': filtered_tasks
-        }
+        同一DAG Run的所有订阅者共享一个后台轮询器；首条事件为snapshot，
+        之后每个任务状态变化推送一条task_state事件，长时间无变化时发送close事件并结束
+        
+        Args:
+            dag_id: DAG ID
+            run_id: DAG Run ID
+            
+        Returns:
+            events: SSE文本生成器
+            
+        Raises:
+            RuntimeError: 同时监视的DAG Run数量超过上限
+        """
+        watcher = get_run_watcher()
+        subscription = watcher.subscribe(dag_id, run_id)
+        logger.info(f"新增DAG Run状态订阅: dag_id={dag_id}, run_id={run_id}")
+        return self._iter_run_events(watcher, subscription)
+    
+    def _iter_run_events(self, watcher, subscription):
+        heartbeat_interval = RUN_STREAM_CONFIG['heartbeat_interval']
+        idle_timeout = RUN_STREAM_CONFIG['idle_timeout']
+        last_event_at = time.monotonic()
+        try:
+            while True:
+                event = subscription.get(heartbeat_interval)
+                if event is None:
+                    if time.monotonic() - last_event_at >= idle_timeout:
+                        yield format_sse_event('close', {'reason': 'idle'})
+                        return
+                    # 心跳注释行，同时用于尽早发现已断开的客户端
+                    yield ': keepalive\n\n'
+                    continue
+                last_event_at = time.monotonic()
+                yield format_sse_event(*event)
+        finally:
+            watcher.unsubscribe(subscription)
+            logger.info(f"DAG Run状态订阅结束: 丢弃积压事件 {subscription.dropped} 条")
     
     def _extract_table_name(self, task_id):
         """
@@ -1,9 +1,21 @@
-from flask import Blueprint, request, jsonify
+import datetime
+import io
+import json
+import time
+import zipfile
+from flask import Blueprint, Response, g, request, jsonify, stream_with_context
 from api.controllers.dag_controller import DAGController
 from api.controllers.task_controller import TaskController
 from api.controllers.log_controller import LogController
 from api.controllers.script_controller import ScriptController
-from config import MONITOR_DAG_ID
+from api.controllers.system_controller import SystemController
+from api.controllers.error_controller import ErrorController
+from config import (MONITOR_DAG_ID, EXEC_RESULTS_CONFIG, LOG_STREAM_CONFIG, LOG_READER_CONFIG, LOG_SEARCH_CONFIG,
+                    ERROR_INDEX_CONFIG, REQUEST_TIMING_CONFIG)
+from services.metrics import observe_request
+from services.request_timing import (end_request_timing, finish_profile, get_request_timings, span, start_profile,
+                                     start_request_timing)
+from utils import logger
 
 # 创建Blueprint
 api_bp = Blueprint('api', __name__, url_prefix='/api')
@@ -13,17 +25,85 @@ dag_controller = DAGController()
 task_controller = TaskController()
 log_controller = LogController()
 script_controller = ScriptController()
+system_controller = SystemController()
+error_controller = ErrorController()
+
+@api_bp.before_request
+def _start_request_timer():
+    g.request_started_at = time.perf_counter()
+    start_request_timing()
+    if REQUEST_TIMING_CONFIG['profile_enabled'] and request.args.get('profile') == '1':
+        g.profile_requested = True
+        g.profiler = start_profile()
+
+@api_bp.after_request
+def _record_request_metrics(response):
+    """
+    按路由模板（而非实际URL）记录请求数和耗时，并添加Server-Timing响应头；
+    流式响应只计到响应头返回为止
+    """
+    if g.pop('profile_requested', False):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            summary = {'error': '另一个请求正在进行性能分析，请稍后重试'}
+        else:
+            summary = finish_profile(profiler)
+        response = _attach_profile(response, summary)
+    
+    timings = get_request_timings()
+    if timings is not None:
+        response.headers['Server-Timing'] = timings.server_timing_header()
+    
+    started_at = g.pop('request_started_at', None)
+    if started_at is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        observe_request(endpoint, request.method, response.status_code, time.perf_counter() - started_at)
+    return response
+
+@api_bp.teardown_request
+def _end_request_timer(exc):
+    # 视图抛出异常时after_request不会执行，在这里停止性能分析并释放分析锁
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        finish_profile(profiler)
+    end_request_timing()
+
+def _attach_profile(response, summary):
+    """
+    将性能分析结果附加到JSON响应：对象响应增加_profile键，数组等其他响应包装为{"data": ..., "_profile": ...}
+    """
+    if response.is_streamed or not response.is_json:
+        logger.info("性能分析结果（非JSON响应，未附加到响应体）: %s", json.dumps(summary, ensure_ascii=False))
+        return response
+    
+    data = response.get_json()
+    if isinstance(data, dict):
+        payload = {**data, '_profile': summary}
+    else:
+        payload = {'data': data, '_profile': summary}
+    response.set_data(json.dumps(payload, ensure_ascii=False))
+    return response
 
 @api_bp.route('/dags/exec-results', methods=['GET'])
 def get_dag_execution_results():
     """
-    获取配置的DAG在指定执行日期的执行结果
+    获取配置的DAG在指定执行日期（或日期区间）的执行结果
     
     URL参数:
         exec_date: 执行日期（中国时区，格式YYYY-MM-DD）
+        start_date: 区间开始日期（中国时区，格式YYYY-MM-DD），与end_date同时提供时替代exec_date
+        end_date: 区间结束日期（中国时区，格式YYYY-MM-DD）
+    
+    区间查询以分块传输的JSON数组流式返回，每个元素为一天的结果:
+        [{"exec_date": "YYYY-MM-DD", "results": [...]}, ...]
     """
     # 获取查询参数
     exec_date = request.args.get('exec_date')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    if start_date or end_date:
+        return _stream_dag_execution_results(start_date, end_date)
     
     # 参数验证
     if not exec_date:
@@ -32,7 +112,79 @@ def get_dag_execution_results():
     try:
         # 调用控制器方法
         results = dag_controller.get_execution_results(MONITOR_DAG_ID, exec_date)
+        with span('format'):
+            return jsonify(results)
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+def _stream_dag_execution_results(start_date, end_date):
+    """
+    以分块传输的JSON数组按天返回日期区间内的执行结果
+    
+    Args:
+        start_date: 区间开始日期（中国时区，格式YYYY-MM-DD）
+        end_date: 区间结束日期（中国时区，格式YYYY-MM-DD）
+    """
+    # 参数验证
+    if not start_date or not end_date:
+        return jsonify({'error': 'start_date和end_date必须同时提供'}), 400
+    
+    try:
+        start = datetime.datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.datetime.strptime(end_date, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': '日期格式错误，应为YYYY-MM-DD'}), 400
+    
+    if end < start:
+        return jsonify({'error': 'end_date不能早于start_date'}), 400
+    
+    max_days = EXEC_RESULTS_CONFIG['max_range_days']
+    if (end - start).days + 1 > max_days:
+        return jsonify({'error': f'日期区间不能超过{max_days}天'}), 400
+    
+    try:
+        # 预先取出第一天的结果，使查询失败时仍能返回错误状态码
+        day_results = dag_controller.iter_execution_results_by_range(MONITOR_DAG_ID, start_date, end_date)
+        first_day = next(day_results)
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+    
+    def generate():
+        yield '['
+        yield json.dumps(first_day, ensure_ascii=False)
+        try:
+            for day_result in day_results:
+                yield ','
+                yield json.dumps(day_result, ensure_ascii=False)
+        except Exception as e:
+            # 响应头已发送，中断输出使客户端得到不完整的JSON
+            logger.error(f"流式输出区间执行结果失败: {e}")
+            return
+        yield ']'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+@api_bp.route('/dags/changes', methods=['GET'])
+def get_dag_changes():
+    """
+    获取游标之后发生变化的DAG Run和任务（基于updated_at水位的增量查询）
+    
+    URL参数:
+        cursor: 上次调用返回的游标，可选；不提供时只返回当前游标
+        dag_id: DAG ID，可选，必须是配置的监控DAG之一，默认为配置的所有DAG
+    """
+    cursor = request.args.get('cursor')
+    dag_id = request.args.get('dag_id')
+    if dag_id and dag_id not in MONITOR_DAG_ID:
+        return jsonify({'error': f'dag_id不在监控范围内: {dag_id}'}), 400
+    dag_ids = [dag_id] if dag_id else MONITOR_DAG_ID
+    
+    try:
+        # 调用控制器方法
+        results = dag_controller.get_changes(dag_ids, cursor)
         return jsonify(results)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
 
@@ -67,7 +219,8 @@ def get_tasks_by_state():
     try:
         # 调用控制器方法
         results = task_controller.get_tasks_by_state(dag_id, run_id, state)
-        return jsonify(results)
+        with span('format'):
+            return jsonify(results)
     except Exception as e:
         return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
 
@@ -111,10 +264,90 @@ def get_task_logs():
         if error:
             return jsonify({'error': error}), 404
         
-        return jsonify(result)
+        with span('format'):
+            return jsonify(result)
     except Exception as e:
         return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
 
+@api_bp.route('/dags/exec-results/task-logs/bulk', methods=['POST'])
+def get_task_logs_bulk():
+    """
+    并发获取DAG Run中指定状态任务的日志
+    
+    请求体参数:
+        dag_id: DAG ID (必需)
+        run_id: DAG Run ID (必需)
+        state: 状态参数（如'failed'、'success,failed'或'all'），可选，默认为'failed'
+        all_tries: 是否获取每个任务的全部尝试，可选，默认为false
+        format: 返回格式，ndjson（默认，按完成顺序逐行流式返回）或zip（task_id/try_number.log的压缩包）
+    """
+    # 获取请求体数据
+    data = request.json
+    
+    # 参数验证
+    if not data:
+        return jsonify({'error': '缺少请求体数据'}), 400
+    
+    if 'dag_id' not in data:
+        return jsonify({'error': '缺少必需的参数dag_id'}), 400
+    
+    if 'run_id' not in data:
+        return jsonify({'error': '缺少必需的参数run_id'}), 400
+    
+    output_format = data.get('format', 'ndjson')
+    if output_format not in ('ndjson', 'zip'):
+        return jsonify({'error': 'format必须为ndjson或zip'}), 400
+    
+    # 获取参数
+    dag_id = data['dag_id']
+    run_id = data['run_id']
+    state = data.get('state', 'failed')  # 默认为'failed'
+    all_tries = bool(data.get('all_tries', False))
+    
+    try:
+        # 调用控制器方法
+        logs, error = log_controller.get_run_logs_bulk(dag_id, run_id, state, all_tries=all_tries)
+        
+        if error:
+            return jsonify({'error': error}), 404
+        
+        if output_format == 'zip':
+            return _build_task_logs_archive(dag_id, run_id, logs)
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+    
+    def generate():
+        for log in logs:
+            yield json.dumps(log, ensure_ascii=False) + '\n'
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'X-Accel-Buffering': 'no'}
+    )
+
+def _build_task_logs_archive(dag_id, run_id, logs):
+    """
+    将批量日志打包为zip，获取失败的日志记录在errors.json中
+    """
+    buffer = io.BytesIO()
+    errors = []
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for log in logs:
+            if 'error' in log:
+                errors.append({key: log[key] for key in ('task_id', 'try_number', 'raw_state', 'error')})
+                continue
+            archive.writestr(f"{log['task_id']}/{log['try_number']}.log", log['log'])
+        if errors:
+            archive.writestr('errors.json', json.dumps(errors, ensure_ascii=False, indent=2))
+    
+    file_name = f"{dag_id}_{run_id}_logs.zip".replace(':', '-').replace('/', '_')
+    return Response(
+        buffer.getvalue(),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{file_name}"'}
+    )
+
 @api_bp.route('/dags/<dag_id>/dagRuns/<dag_run_id>/taskInstances/<task_id>/log', methods=['GET'])
 def get_task_log(dag_id, dag_run_id, task_id):
     """
@@ -125,10 +358,19 @@ def get_task_log(dag_id, dag_run_id, task_id):
         dag_run_id: DAG Run ID
         task_id: 任务 ID
         try_number: 尝试次数，默认为1
+        stream: 为1时以分块传输的纯文本流式返回日志
+        offset: 跳过日志开头的字节数（流式）
+        limit: 最多返回的字节数（流式）
+        tail_lines: 只返回最后N行（流式），指定时忽略offset和limit
+    
+    指定stream、offset、limit或tail_lines任一参数时以流式返回，否则返回JSON
     """
     # 获取查询参数
     try_number = request.args.get('try_number', 1, type=int)
     
+    if any(name in request.args for name in ('stream', 'offset', 'limit', 'tail_lines')):
+        return _stream_task_log(dag_id, dag_run_id, task_id, try_number)
+    
     try:
         # 调用控制器方法
         result, error = log_controller.get_task_log(dag_id, dag_run_id, task_id, try_number)
@@ -136,10 +378,197 @@ def get_task_log(dag_id, dag_run_id, task_id):
         if error:
             return jsonify({'error': error}), 404
         
-        return jsonify(result)
+        with span('format'):
+            return jsonify(result)
     except Exception as e:
         return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
 
+def _stream_task_log(dag_id, dag_run_id, task_id, try_number):
+    """
+    以分块传输的纯文本流式返回任务日志
+    """
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', None, type=int)
+    tail_lines = request.args.get('tail_lines', None, type=int)
+    
+    # 参数验证
+    if offset < 0 or (limit is not None and limit < 0):
+        return jsonify({'error': 'offset和limit不能为负数'}), 400
+    
+    max_tail_lines = LOG_STREAM_CONFIG['max_tail_lines']
+    if tail_lines is not None and not 0 < tail_lines <= max_tail_lines:
+        return jsonify({'error': f'tail_lines必须在1到{max_tail_lines}之间'}), 400
+    
+    try:
+        chunks, error = log_controller.open_task_log_stream(
+            dag_id, dag_run_id, task_id, try_number, offset=offset, limit=limit, tail_lines=tail_lines)
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+    
+    if error:
+        return jsonify({'error': error}), 404
+    
+    return Response(stream_with_context(chunks), mimetype='text/plain; charset=utf-8')
+
+@api_bp.route('/dags/<dag_id>/dagRuns/<dag_run_id>/taskInstances/<task_id>/log/tail', methods=['GET'])
+def tail_task_log(dag_id, dag_run_id, task_id):
+    """
+    增量获取任务日志，只返回令牌之后新增的内容
+    
+    URL参数:
+        dag_id: DAG ID
+        dag_run_id: DAG Run ID
+        task_id: 任务 ID
+        try_number: 尝试次数，默认为1
+        token: 上次调用返回的令牌，可选；不提供时返回最后tail_lines行
+        tail_lines: 不带令牌时返回的行数，可选
+    """
+    try_number = request.args.get('try_number', 1, type=int)
+    token = request.args.get('token')
+    tail_lines = request.args.get('tail_lines', None, type=int)
+    
+    max_tail_lines = LOG_STREAM_CONFIG['max_tail_lines']
+    if tail_lines is not None and not 0 < tail_lines <= max_tail_lines:
+        return jsonify({'error': f'tail_lines必须在1到{max_tail_lines}之间'}), 400
+    
+    try:
+        # 调用控制器方法
+        result, error = log_controller.tail_task_log(
+            dag_id, dag_run_id, task_id, try_number, token=token, initial_lines=tail_lines)
+        
+        if error:
+            return jsonify({'error': error}), 404
+        
+        with span('format'):
+            return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_bp.route('/dags/<dag_id>/dagRuns/<dag_run_id>/taskInstances/<task_id>/log/lines', methods=['GET'])
+def get_task_log_lines(dag_id, dag_run_id, task_id):
+    """
+    按行分页读取本地任务日志
+    
+    URL参数:
+        dag_id: DAG ID
+        dag_run_id: DAG Run ID
+        task_id: 任务 ID
+        try_number: 尝试次数，默认为1
+        start_line: 起始行号（从0开始），默认为0
+        line_count: 最多返回的行数，默认为100
+        tail_lines: 只返回最后N行，指定时忽略start_line和line_count
+        level: 只返回包含该日志级别的行，如ERROR
+    """
+    try_number = request.args.get('try_number', 1, type=int)
+    start_line = request.args.get('start_line', 0, type=int)
+    line_count = request.args.get('line_count', 100, type=int)
+    tail_lines = request.args.get('tail_lines', None, type=int)
+    level = request.args.get('level')
+    
+    # 参数验证
+    max_lines = LOG_READER_CONFIG['max_lines']
+    if start_line < 0:
+        return jsonify({'error': 'start_line不能为负数'}), 400
+    if not 0 < line_count <= max_lines:
+        return jsonify({'error': f'line_count必须在1到{max_lines}之间'}), 400
+    if tail_lines is not None and not 0 < tail_lines <= max_lines:
+        return jsonify({'error': f'tail_lines必须在1到{max_lines}之间'}), 400
+    
+    try:
+        # 调用控制器方法
+        result, error = log_controller.get_task_log_lines(
+            dag_id, dag_run_id, task_id, try_number, start_line=start_line, line_count=line_count,
+            tail_lines=tail_lines, level=level)
+        
+        if error:
+            return jsonify({'error': error}), 404
+        
+        with span('format'):
+            return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_bp.route('/dags/<dag_id>/dagRuns/<dag_run_id>/logs/search', methods=['GET'])
+def search_dag_run_logs(dag_id, dag_run_id):
+    """
+    在DAG Run所有任务的日志中搜索关键字，以NDJSON流式返回匹配结果
+    
+    URL参数:
+        dag_id: DAG ID
+        dag_run_id: DAG Run ID
+        q: 要搜索的字符串（必填）
+        context: 每个匹配前后的上下文行数，默认为2
+        case_sensitive: 是否区分大小写，默认为false
+        max_matches: 最多返回的匹配数
+        
+    返回:
+        每行一个JSON对象：match（task_id、line、text、before、after）、error、task_done，
+        最后一行为summary
+    """
+    query = request.args.get('q', '')
+    context_lines = request.args.get('context', 2, type=int)
+    case_sensitive = request.args.get('case_sensitive', 'false').lower() == 'true'
+    max_matches = request.args.get('max_matches', None, type=int)
+    
+    # 参数验证
+    if not query.strip():
+        return jsonify({'error': '缺少参数q'}), 400
+    if len(query) > LOG_SEARCH_CONFIG['max_query_length']:
+        return jsonify({'error': f"q长度不能超过{LOG_SEARCH_CONFIG['max_query_length']}"}), 400
+    if not 0 <= context_lines <= LOG_SEARCH_CONFIG['max_context_lines']:
+        return jsonify({'error': f"context必须在0到{LOG_SEARCH_CONFIG['max_context_lines']}之间"}), 400
+    if max_matches is not None and not 0 < max_matches <= LOG_SEARCH_CONFIG['max_matches']:
+        return jsonify({'error': f"max_matches必须在1到{LOG_SEARCH_CONFIG['max_matches']}之间"}), 400
+    
+    try:
+        events, error = log_controller.search_run_logs(
+            dag_id, dag_run_id, query, context_lines=context_lines, case_sensitive=case_sensitive,
+            max_matches=max_matches)
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+    
+    if error:
+        return jsonify({'error': error}), 404
+    
+    def generate():
+        for event in events:
+            yield json.dumps(event, ensure_ascii=False) + '\n'
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'X-Accel-Buffering': 'no'}
+    )
+
+@api_bp.route('/dags/<dag_id>/dagRuns/<dag_run_id>/stream', methods=['GET'])
+def stream_dag_run_status(dag_id, dag_run_id):
+    """
+    以Server-Sent Events推送DAG Run的任务状态变化
+    
+    URL参数:
+        dag_id: DAG ID
+        dag_run_id: DAG Run ID
+    
+    事件:
+        snapshot: 当前所有任务状态
+        task_state: 单个任务状态变化
+        close: 长时间无变化，服务端关闭连接
+    """
+    try:
+        events = task_controller.stream_run_status(dag_id, dag_run_id)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+    
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @api_bp.route('/dags/unscheduled-scripts', methods=['GET'])
 def get_unscheduled_scripts():
     """
@@ -153,4 +582,160 @@ def get_unscheduled_scripts():
         scripts_list = script_controller.get_unscheduled_scripts()
         return jsonify(scripts_list)
     except Exception as e:
-        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+def _parse_error_query_args():
+    """解析错误签名查询的公共参数，返回(days, dag_id, limit, error)"""
+    days = request.args.get('days', 7, type=int)
+    dag_id = request.args.get('dag_id')
+    limit = request.args.get('limit', None, type=int)
+    
+    max_days = ERROR_INDEX_CONFIG['max_query_days']
+    if not 0 < days <= max_days:
+        return None, None, None, f'days必须在1到{max_days}之间'
+    if limit is not None and not 0 < limit <= 1000:
+        return None, None, None, 'limit必须在1到1000之间'
+    return days, dag_id, limit, None
+
+@api_bp.route('/errors/signatures', methods=['GET'])
+def get_error_signatures():
+    """
+    按错误签名（异常类型、消息模板、最内层调用帧）分组统计失败任务
+    
+    URL参数:
+        days: 统计最近多少天开始的DAG Run，默认为7
+        dag_id: 只统计指定DAG（可选）
+        limit: 最多返回的签名数量，默认为50
+    """
+    days, dag_id, limit, error = _parse_error_query_args()
+    if error:
+        return jsonify({'error': error}), 400
+    
+    try:
+        return jsonify(error_controller.get_signature_groups(days, dag_id=dag_id, limit=limit or 50))
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_bp.route('/errors/signatures/<signature>', methods=['GET'])
+def get_error_signature_detail(signature):
+    """
+    获取某个错误签名的失败记录（DAG、Run、任务、尝试次数）
+    
+    URL参数:
+        days: 查询最近多少天开始的DAG Run，默认为7
+        dag_id: 只查询指定DAG（可选）
+        limit: 最多返回的失败记录数，默认为200
+    """
+    days, dag_id, limit, error = _parse_error_query_args()
+    if error:
+        return jsonify({'error': error}), 400
+    
+    try:
+        result = error_controller.get_signature_detail(signature, days, dag_id=dag_id, limit=limit or 200)
+        if result is None:
+            return jsonify({'error': f'错误签名不存在: {signature}'}), 404
+        return jsonify(result)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_bp.route('/system/db-pool', methods=['GET'])
+def get_db_pool_stats():
+    """
+    获取数据库连接池状态
+    
+    返回:
+        连接池大小、空闲连接数、使用中连接数及累计统计
+    """
+    try:
+        return jsonify(system_controller.get_db_pool_stats())
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_bp.route('/system/node-catalog', methods=['GET'])
+def get_node_catalog_stats():
+    """
+    获取Neo4j节点目录缓存状态
+    """
+    try:
+        return jsonify(system_controller.get_node_catalog_stats())
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_bp.route('/system/node-catalog/invalidate', methods=['POST'])
+def invalidate_node_catalog():
+    """
+    失效Neo4j节点目录缓存并立即重新加载
+    """
+    try:
+        return jsonify(system_controller.invalidate_node_catalog())
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_bp.route('/system/unscheduled-cache', methods=['GET'])
+def get_unscheduled_cache_stats():
+    """
+    获取未调度脚本数量/列表缓存状态
+    """
+    try:
+        return jsonify(system_controller.get_unscheduled_cache_stats())
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_bp.route('/system/airflow-client', methods=['GET'])
+def get_airflow_client_stats():
+    """
+    获取Airflow API客户端状态（请求计数、超时配置、熔断器状态）
+    """
+    try:
+        return jsonify(system_controller.get_airflow_client_stats())
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_bp.route('/system/remote-logs', methods=['GET'])
+def get_remote_log_stats():
+    """
+    获取远程日志来源状态（HEAD/Range请求计数、元数据缓存命中、已读取字节数）
+    """
+    try:
+        return jsonify(system_controller.get_remote_log_stats())
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_bp.route('/system/log-cache', methods=['GET'])
+def get_log_cache_stats():
+    """
+    获取已结束任务尝试的日志缓存状态
+    
+    返回:
+        内存/磁盘两级缓存的占用、容量、命中与淘汰计数
+    """
+    try:
+        return jsonify(system_controller.get_log_cache_stats())
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_bp.route('/system/error-index', methods=['GET'])
+def get_error_index_stats():
+    """
+    获取错误签名索引状态
+    """
+    try:
+        return jsonify(error_controller.get_index_stats())
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
+
+@api_bp.route('/system/error-index/run', methods=['POST'])
+def run_error_index():
+    """
+    立即执行一个错误签名索引周期
+    """
+    try:
+        return jsonify(error_controller.run_index_now())
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': f'处理请求时发生错误: {str(e)}'}), 500
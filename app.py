@@ -1,14 +1,125 @@
-from flask import Flask
+import atexit
+from flask import Flask, Response
 from api.routes import api_bp
+from services.airflow_client import close_airflow_client
+from services.db_pool import close_db_pool
+from services.error_index import start_error_indexer, stop_error_indexer
+from services.metrics import render_metrics
+from services.neo4j_service import close_neo4j_driver
+from services.node_catalog import stop_node_catalog
+from services.run_summary_store import close_run_summary_store
+from services.run_watcher import stop_run_watcher
+from services.worker_pool import shutdown_worker_pools
+from config import ASGI_CONFIG
+
+def shutdown_services():
+    """进程退出时停止后台任务，并释放共享的Neo4j驱动、数据库连接池和Airflow API连接"""
+    stop_error_indexer()
+    stop_node_catalog()
+    stop_run_watcher()
+    shutdown_worker_pools()
+    close_neo4j_driver()
+    close_db_pool()
+    close_run_summary_store()
+    close_airflow_client()
 
 def create_app():
     app = Flask(__name__)
-    
+
     # 注册Blueprint
     app.register_blueprint(api_bp)
-    
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus指标"""
+        body, content_type = render_metrics()
+        if body is None:
+            return Response('指标未启用或未安装prometheus_client\n', status=404, content_type=content_type)
+        return Response(body, content_type=content_type)
+
+    # 启动后台错误签名索引
+    start_error_indexer()
+
+    # 注册退出钩子，关闭共享连接
+    atexit.register(shutdown_services)
+
+    return app
+
+# 转发给Flask的长连接接口（SSE、NDJSON搜索、批量日志），与普通请求分开限制并发
+_WSGI_STREAM_ENDPOINTS = frozenset(['api.stream_dag_run_status', 'api.search_dag_run_logs', 'api.get_task_logs_bulk'])
+
+def _wsgi_to_asgi(flask_app):
+    """
+    将Flask应用包装为ASGI应用，每个请求在各自的线程中执行
+
+    asgiref的WsgiToAsgi默认在单个共享线程中运行WSGI应用，一个SSE或流式日志请求就会阻塞其余所有转发的请求；
+    这里为每个请求建立ThreadSensitiveContext，使其在独立线程中运行。
+    长连接与普通请求（系统状态、/metrics等）分别限制并发数，长连接占满时不影响普通请求
+    """
+    import asyncio
+    from asgiref.sync import ThreadSensitiveContext
+    from asgiref.wsgi import WsgiToAsgi
+    from werkzeug.exceptions import HTTPException
+
+    wsgi_app = WsgiToAsgi(flask_app)
+    url_adapter = flask_app.url_map.bind('localhost')
+    stream_slots = asyncio.Semaphore(ASGI_CONFIG['wsgi_max_streams'])
+    request_slots = asyncio.Semaphore(ASGI_CONFIG['wsgi_max_workers'])
+
+    def is_stream(scope):
+        try:
+            endpoint, _ = url_adapter.match(scope['path'], method=scope['method'])
+        except HTTPException:
+            return False
+        return endpoint in _WSGI_STREAM_ENDPOINTS
+
+    async def app(scope, receive, send):
+        async with stream_slots if is_stream(scope) else request_slots:
+            async with ThreadSensitiveContext():
+                await wsgi_app(scope, receive, send)
+
+    return app
+
+def create_asgi_app():
+    """
+    创建ASGI应用（如 uvicorn "app:create_asgi_app" --factory）
+
+    执行结果、任务列表、任务日志和未调度脚本接口由Quart异步路由处理，
+    数据库、Neo4j和Airflow API查询在同一个事件循环中并发执行；
+    其余接口（SSE、日志搜索、批量日志、系统状态等）转发给create_app创建的Flask应用，
+    每个请求在独立线程中执行，长连接与普通请求分别按ASGI_CONFIG限制并发数
+    """
+    from quart import Quart
+    from werkzeug.exceptions import HTTPException
+    from api.async_routes import api_async_bp
+    from services.async_db_service import close_async_db_pool
+    from services.async_log_service import close_async_airflow_client
+    from services.async_neo4j_service import close_async_neo4j_driver
+
+    wsgi_app = _wsgi_to_asgi(create_app())
+    quart_app = Quart(__name__)
+
+    # 注册Blueprint
+    quart_app.register_blueprint(api_async_bp)
+
+    @quart_app.after_serving
+    async def close_async_services():
+        """关闭绑定在事件循环上的异步连接池和客户端"""
+        await close_async_db_pool()
+        await close_async_neo4j_driver()
+        await close_async_airflow_client()
+
+    async def app(scope, receive, send):
+        # lifespan事件交给Quart；未在异步Blueprint中注册的HTTP请求交给Flask
+        if scope['type'] == 'http':
+            try:
+                quart_app.url_map.bind('localhost').match(scope['path'], method=scope['method'])
+            except HTTPException:
+                return await wsgi_app(scope, receive, send)
+        return await quart_app(scope, receive, send)
+
     return app
 
 if __name__ == '__main__':
     app = create_app()
-    app.run(host='0.0.0.0', port=5005, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5005, debug=True)
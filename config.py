@@ -9,6 +9,16 @@ DB_CONFIG = {
     'password': os.environ.get('AIRFLOW_DB_PASSWORD', 'postgres')
 }
 
+# 数据库连接池配置
+DB_POOL_CONFIG = {
+    'min_size': int(os.environ.get('AIRFLOW_DB_POOL_MIN_SIZE', 1)),                  # 保留的最少空闲连接数
+    'max_size': int(os.environ.get('AIRFLOW_DB_POOL_MAX_SIZE', 10)),                 # 连接总数上限
+    'max_idle_seconds': int(os.environ.get('AIRFLOW_DB_POOL_MAX_IDLE', 300)),        # 超过min_size的空闲连接回收时间
+    'max_lifetime_seconds': int(os.environ.get('AIRFLOW_DB_POOL_MAX_LIFETIME', 3600)),  # 连接最长存活时间
+    'acquire_timeout': float(os.environ.get('AIRFLOW_DB_POOL_ACQUIRE_TIMEOUT', 10)),  # 获取连接的最长等待时间（秒）
+    'health_check_after': float(os.environ.get('AIRFLOW_DB_POOL_HEALTH_CHECK_AFTER', 30))  # 空闲超过该秒数的连接在取出时做健康检查
+}
+
 # Airflow API配置
 AIRFLOW_API_CONFIG = {
     'base_url': os.environ.get('AIRFLOW_API_BASE_URL', 'http://192.168.67.10:8080/api/v1'),
@@ -16,6 +26,17 @@ AIRFLOW_API_CONFIG = {
     'password': os.environ.get('AIRFLOW_API_PASSWORD', 'admin')
 }
 
+# Airflow REST API客户端配置（连接池、超时、重试与熔断）
+AIRFLOW_CLIENT_CONFIG = {
+    'connect_timeout': float(os.environ.get('AIRFLOW_API_CONNECT_TIMEOUT', 3)),      # 建立连接超时（秒）
+    'read_timeout': float(os.environ.get('AIRFLOW_API_READ_TIMEOUT', 30)),           # 读取响应超时（秒）
+    'retries': int(os.environ.get('AIRFLOW_API_RETRIES', 2)),                        # 连接错误及502/503/504的重试次数
+    'backoff_factor': float(os.environ.get('AIRFLOW_API_BACKOFF_FACTOR', 0.5)),      # 重试退避系数（秒）
+    'pool_maxsize': int(os.environ.get('AIRFLOW_API_POOL_MAXSIZE', 10)),             # 保持的长连接数量上限
+    'failure_threshold': int(os.environ.get('AIRFLOW_API_FAILURE_THRESHOLD', 5)),    # 连续失败多少次后熔断
+    'reset_timeout': float(os.environ.get('AIRFLOW_API_RESET_TIMEOUT', 30))          # 熔断后多少秒放行探测请求
+}
+
 # Neo4j数据库配置
 NEO4J_CONFIG = {
     'uri': os.environ.get('NEO4J_URI', 'bolt://192.168.67.1:7687'),
@@ -23,15 +44,74 @@ NEO4J_CONFIG = {
     'password': os.environ.get('NEO4J_PASSWORD', 'Passw0rd')
 }
 
+# Neo4j驱动连接池配置（进程内共享一个驱动）
+NEO4J_POOL_CONFIG = {
+    'max_connection_pool_size': int(os.environ.get('NEO4J_POOL_MAX_SIZE', 50)),                   # 连接池最大连接数
+    'max_connection_lifetime': int(os.environ.get('NEO4J_POOL_MAX_LIFETIME', 3600)),              # 连接最长存活时间（秒）
+    'connection_acquisition_timeout': float(os.environ.get('NEO4J_POOL_ACQUIRE_TIMEOUT', 30)),  # 获取连接的最长等待时间（秒）
+    'connection_timeout': float(os.environ.get('NEO4J_CONNECTION_TIMEOUT', 10))                 # 建立TCP连接超时时间（秒）
+}
+
+# Neo4j节点目录缓存配置（en_name -> cn_name）
+NODE_CATALOG_CONFIG = {
+    'enabled': os.environ.get('NODE_CATALOG_ENABLED', 'True').lower() == 'true',
+    'refresh_interval': int(os.environ.get('NODE_CATALOG_REFRESH_INTERVAL', 300)),  # 后台全量刷新间隔（秒）
+    'negative_ttl': int(os.environ.get('NODE_CATALOG_NEGATIVE_TTL', 60)),           # 不存在节点的缓存时间（秒）
+    'max_entries': int(os.environ.get('NODE_CATALOG_MAX_ENTRIES', 100000))          # 目录及负缓存的最大条目数
+}
+
+# 未调度脚本数量/列表缓存配置
+UNSCHEDULED_CACHE_CONFIG = {
+    'enabled': os.environ.get('UNSCHEDULED_CACHE_ENABLED', 'True').lower() == 'true',
+    'ttl': int(os.environ.get('UNSCHEDULED_CACHE_TTL', 60)),             # 缓存新鲜期（秒）
+    'stale_ttl': int(os.environ.get('UNSCHEDULED_CACHE_STALE_TTL', 600))  # 过期后仍可返回旧值并后台刷新的时间（秒）
+}
+
 # 日志配置
-LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG')  # 可选：DEBUG, INFO, WARNING, ERROR, CRITICAL
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')   # 可选：DEBUG, INFO, WARNING, ERROR, CRITICAL
 LOG_FILE = os.environ.get('LOG_FILE', None)      # 日志文件路径，None表示仅控制台输出
 LOG_FORMAT = '[%(asctime)s] [%(levelname)s] [%(name)s:%(lineno)d] - %(message)s'
 LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
+# 日志输出管道配置
+LOG_PIPELINE_CONFIG = {
+    'async': os.environ.get('LOG_ASYNC', 'True').lower() == 'true',          # 由后台线程写控制台/文件，请求线程只入队
+    'queue_size': int(os.environ.get('LOG_QUEUE_SIZE', 10000)),              # 队列已满时丢弃新日志而不阻塞
+    'max_payload_chars': int(os.environ.get('LOG_MAX_PAYLOAD_CHARS', 2000)),  # truncate_for_log截断的默认字符数
+    'sample_window': float(os.environ.get('LOG_SAMPLE_WINDOW', 10)),         # 采样窗口（秒），0表示不采样
+    'sample_burst': int(os.environ.get('LOG_SAMPLE_BURST', 50)),             # 每个窗口内同一调用位置最多输出的条数
+    'sample_max_level': os.environ.get('LOG_SAMPLE_MAX_LEVEL', 'INFO')       # 只对该级别及以下的日志采样，WARNING及以上全部输出
+}
+
 # 默认 DAG 配置
 MONITOR_DAG_ID = ['dataops_productline_execute_dag']
 
+# DAG执行结果查询配置
+EXEC_RESULTS_CONFIG = {
+    'concurrent': os.environ.get('EXEC_RESULTS_CONCURRENT', 'True').lower() == 'true',  # 是否并发查询Neo4j和各DAG
+    'max_workers': int(os.environ.get('EXEC_RESULTS_MAX_WORKERS', 8)),                 # 并发查询线程池大小
+    'neo4j_timeout': float(os.environ.get('EXEC_RESULTS_NEO4J_TIMEOUT', 5)),           # Neo4j查询超时（秒），超时按0个未调度处理
+    'db_timeout': float(os.environ.get('EXEC_RESULTS_DB_TIMEOUT', 15)),                # 数据库查询超时（秒），超时按无运行记录处理
+    'max_range_days': int(os.environ.get('EXEC_RESULTS_MAX_RANGE_DAYS', 31)),          # start_date/end_date查询允许的最大天数
+    'changes_overlap_seconds': float(os.environ.get('EXEC_RESULTS_CHANGES_OVERLAP', 2))  # 增量查询水位回退秒数，避免遗漏提交较晚的记录
+}
+
+# DAG Run状态实时推送（SSE）配置
+RUN_STREAM_CONFIG = {
+    'poll_interval': float(os.environ.get('RUN_STREAM_POLL_INTERVAL', 5)),        # 每个DAG Run的数据库轮询间隔（秒）
+    'queue_size': int(os.environ.get('RUN_STREAM_QUEUE_SIZE', 100)),              # 每个客户端的事件队列容量，溢出时改发快照
+    'heartbeat_interval': float(os.environ.get('RUN_STREAM_HEARTBEAT', 15)),      # 无事件时发送心跳的间隔（秒）
+    'idle_timeout': float(os.environ.get('RUN_STREAM_IDLE_TIMEOUT', 300)),        # 连续无状态变化超过该时间后关闭连接（秒）
+    'max_watched_runs': int(os.environ.get('RUN_STREAM_MAX_WATCHED_RUNS', 50))    # 同时监视的DAG Run数量上限
+}
+
+# 已结束DAG Run统计的本地存储配置（SQLite）
+RUN_SUMMARY_STORE_CONFIG = {
+    'enabled': os.environ.get('RUN_SUMMARY_STORE_ENABLED', 'True').lower() == 'true',
+    'path': os.environ.get('RUN_SUMMARY_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'run_summaries.db')),
+    'terminal_states': ['success', 'failed']  # DAG Run进入这些状态后统计不再变化
+}
+
 # 状态映射配置
 TASK_STATES = {
     'success_states': ['success'],
@@ -49,6 +129,62 @@ UTC_OFFSET = '+08:00'       # UTC 偏移量
 # 日志路径配置
 LOG_DIRECTORY = os.environ.get('AIRFLOW_LOG_DIR', '/opt/airflow/logs')
 
+# 日志流式读取配置
+LOG_STREAM_CONFIG = {
+    'chunk_size': int(os.environ.get('LOG_STREAM_CHUNK_SIZE', 64 * 1024)),      # 本地文件每次读取的字节数
+    'max_pages': int(os.environ.get('LOG_STREAM_MAX_PAGES', 1000)),             # Airflow API按continuation_token分页的最大页数
+    'max_tail_lines': int(os.environ.get('LOG_STREAM_MAX_TAIL_LINES', 10000)),  # tail_lines参数允许的最大值
+    'tail_max_bytes': int(os.environ.get('LOG_TAIL_MAX_BYTES', 1024 * 1024)),   # 增量tail接口单次返回的最大字节数
+    'tail_initial_lines': int(os.environ.get('LOG_TAIL_INITIAL_LINES', 100))    # 增量tail接口首次调用默认返回的行数
+}
+
+# 本地日志内存映射读取配置
+LOG_READER_CONFIG = {
+    'max_cached_files': int(os.environ.get('LOG_READER_MAX_CACHED_FILES', 16)),  # 缓存换行索引的文件数量上限
+    'max_lines': int(os.environ.get('LOG_READER_MAX_LINES', 5000))               # 单次请求返回的最大行数
+}
+
+# DAG Run日志全文搜索配置
+LOG_SEARCH_CONFIG = {
+    'max_workers': int(os.environ.get('LOG_SEARCH_MAX_WORKERS', 8)),         # 并发获取日志的线程池大小
+    'max_matches': int(os.environ.get('LOG_SEARCH_MAX_MATCHES', 1000)),      # 单次搜索返回的最大匹配数
+    'max_context_lines': int(os.environ.get('LOG_SEARCH_MAX_CONTEXT', 10)),  # 每个匹配前后上下文行数上限
+    'max_query_length': int(os.environ.get('LOG_SEARCH_MAX_QUERY_LENGTH', 200)),
+    'queue_size': int(os.environ.get('LOG_SEARCH_QUEUE_SIZE', 500)),         # 工作线程与响应之间的匹配队列容量
+    'put_timeout': float(os.environ.get('LOG_SEARCH_PUT_TIMEOUT', 60))       # 队列满且无人消费超过该秒数时停止搜索
+}
+
+# 批量获取DAG Run任务日志配置
+BULK_LOG_CONFIG = {
+    'max_workers': int(os.environ.get('BULK_LOG_MAX_WORKERS', 8)),  # 并发获取日志的线程池大小
+    'max_logs': int(os.environ.get('BULK_LOG_MAX_LOGS', 500))       # 单次请求最多获取的日志份数
+}
+
+# 已结束任务尝试的日志缓存配置（内存LRU + 磁盘压缩文件）
+LOG_CACHE_CONFIG = {
+    'enabled': os.environ.get('LOG_CACHE_ENABLED', 'True').lower() == 'true',
+    'directory': os.environ.get('LOG_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'log_cache')),
+    'memory_max_bytes': int(os.environ.get('LOG_CACHE_MEMORY_MAX_BYTES', 64 * 1024 * 1024)),  # 内存缓存未压缩字节数上限
+    'disk_max_bytes': int(os.environ.get('LOG_CACHE_DISK_MAX_BYTES', 1024 * 1024 * 1024)),    # 磁盘缓存压缩后字节数上限
+    'max_entry_bytes': int(os.environ.get('LOG_CACHE_MAX_ENTRY_BYTES', 32 * 1024 * 1024)),    # 单个日志超过此大小不缓存
+    'codec': os.environ.get('LOG_CACHE_CODEC', 'auto'),  # auto/zstd/gzip，auto在安装zstandard时使用zstd
+    'terminal_states': ['success', 'failed', 'skipped', 'upstream_failed', 'removed']  # 任务尝试处于这些状态时日志不再变化
+}
+
+# 失败任务错误签名索引配置
+ERROR_INDEX_CONFIG = {
+    'enabled': os.environ.get('ERROR_INDEX_ENABLED', 'True').lower() == 'true',
+    'path': os.environ.get('ERROR_INDEX_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'error_index.db')),
+    'interval': int(os.environ.get('ERROR_INDEX_INTERVAL', 300)),                      # 后台索引周期（秒）
+    'lookback_days': int(os.environ.get('ERROR_INDEX_LOOKBACK_DAYS', 7)),              # 每个周期检查的DAG Run时间窗口（天）
+    'max_logs_per_cycle': int(os.environ.get('ERROR_INDEX_MAX_LOGS_PER_CYCLE', 200)),  # 每个周期最多解析的日志数
+    'max_query_days': int(os.environ.get('ERROR_INDEX_MAX_QUERY_DAYS', 90)),           # 查询接口days参数上限
+    # 是否在本进程启动后台索引线程；多进程部署时可只在一个进程开启，其余进程仍可查询索引
+    'run_indexer': os.environ.get('ERROR_INDEX_RUN_INDEXER', 'True').lower() == 'true',
+    'lease_timeout': int(os.environ.get('ERROR_INDEX_LEASE_TIMEOUT', 1800)),           # 索引周期租约超时（秒），持有租约的进程异常退出后其他进程等待该时长接管
+    'terminal_states': ['success', 'failed']  # DAG Run进入这些状态后失败任务不再变化
+}
+
 # 是否使用对象存储 (如 S3) 存储日志
 USE_REMOTE_LOGS = os.environ.get('USE_REMOTE_LOGS', 'False').lower() == 'true'
 
@@ -58,5 +194,39 @@ REMOTE_LOG_CONN = {
     'bucket': os.environ.get('REMOTE_LOG_BUCKET', 'airflow-logs'),
     'region': os.environ.get('REMOTE_LOG_REGION', 'us-east-1'),
     'key': os.environ.get('REMOTE_LOG_KEY', ''),
-    'secret': os.environ.get('REMOTE_LOG_SECRET', '')
-}
\ No newline at end of file
+    'secret': os.environ.get('REMOTE_LOG_SECRET', ''),
+    'endpoint_url': os.environ.get('REMOTE_LOG_ENDPOINT_URL', ''),  # S3兼容服务地址（如MinIO），为空时使用AWS默认地址
+    'prefix': os.environ.get('REMOTE_LOG_PREFIX', ''),              # 对应Airflow remote_base_log_folder中bucket之后的路径
+    'key_template': os.environ.get('REMOTE_LOG_KEY_TEMPLATE', '{dag_id}/{task_path}/{dag_run_id}/{try_number}.log')  # 与LOG_DIRECTORY下的目录结构一致
+}
+
+# 远程日志读取配置
+REMOTE_LOG_READ_CONFIG = {
+    'part_size': int(os.environ.get('REMOTE_LOG_PART_SIZE', 1024 * 1024)),            # 单个Range GET的字节数
+    'max_workers': int(os.environ.get('REMOTE_LOG_MAX_WORKERS', 8)),                  # 并行Range GET数
+    'metadata_ttl': int(os.environ.get('REMOTE_LOG_METADATA_TTL', 60)),               # 对象元数据（大小、ETag）缓存时间（秒）
+    'metadata_max_entries': int(os.environ.get('REMOTE_LOG_METADATA_MAX_ENTRIES', 10000)),
+    'connect_timeout': float(os.environ.get('REMOTE_LOG_CONNECT_TIMEOUT', 3)),
+    'read_timeout': float(os.environ.get('REMOTE_LOG_READ_TIMEOUT', 30)),
+    'retries': int(os.environ.get('REMOTE_LOG_RETRIES', 3))
+}
+
+# Prometheus指标配置
+METRICS_CONFIG = {
+    'enabled': os.environ.get('METRICS_ENABLED', 'True').lower() == 'true',
+    # 耗时直方图的桶边界（秒）
+    'buckets': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+}
+
+# 请求耗时分解（Server-Timing响应头）与按需性能分析配置
+REQUEST_TIMING_CONFIG = {
+    'enabled': os.environ.get('REQUEST_TIMING_ENABLED', 'True').lower() == 'true',
+    'profile_enabled': os.environ.get('REQUEST_PROFILE_ENABLED', 'False').lower() == 'true',  # 允许?profile=1开启cProfile
+    'profile_top_n': int(os.environ.get('REQUEST_PROFILE_TOP_N', 25))                          # 返回累计耗时最多的函数数
+}
+
+# ASGI入口（create_asgi_app）配置
+ASGI_CONFIG = {
+    'wsgi_max_workers': int(os.environ.get('ASGI_WSGI_MAX_WORKERS', 32)),    # 转发给Flask的普通请求的最大并发数
+    'wsgi_max_streams': int(os.environ.get('ASGI_WSGI_MAX_STREAMS', 500))    # 转发给Flask的长连接（SSE、日志搜索、批量日志）的最大并发数，每个占用一个线程
+}
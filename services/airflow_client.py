@@ -0,0 +1,249 @@
+import base64
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import AIRFLOW_API_CONFIG, AIRFLOW_CLIENT_CONFIG
+from services.request_timing import span
+from utils import logger
+
+
+class CircuitOpenError(Exception):
+    """Airflow API熔断器处于打开状态，请求被直接拒绝"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    连续失败计数熔断器
+
+    - closed: 正常放行，连续失败达到failure_threshold次后打开
+    - open: 直接拒绝请求，经过reset_timeout秒后进入half_open
+    - half_open: 只放行一个探测请求，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = 'closed'
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+        self._stats = {
+            'rejected': 0,
+            'opened': 0
+        }
+
+    def allow(self):
+        """
+        判断是否放行请求
+
+        Returns:
+            allowed: 是否放行
+        """
+        with self._lock:
+            if self._state == 'open':
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._stats['rejected'] += 1
+                    return False
+                self._state = 'half_open'
+                self._probing = False
+            if self._state == 'half_open':
+                if self._probing:
+                    self._stats['rejected'] += 1
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != 'closed':
+                logger.info("Airflow API已恢复，熔断器关闭")
+            self._state = 'closed'
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == 'half_open' or self._failures >= self.failure_threshold:
+                if self._state != 'open':
+                    self._stats['opened'] += 1
+                    logger.warning(f"Airflow API连续失败 {self._failures} 次，熔断器打开 {self.reset_timeout} 秒")
+                self._state = 'open'
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                **self._stats
+            }
+
+
+class AirflowApiClient:
+    """
+    进程内共享的Airflow REST API客户端
+
+    使用带连接池的requests.Session复用长连接，认证头只构建一次；
+    每个请求都有连接/读取超时，连接错误和502/503/504按退避策略有限重试，
+    连续失败后熔断，Airflow不可用时调用方可立即回退到本地日志
+    """
+
+    def __init__(self, base_url, username, password, connect_timeout=3, read_timeout=30, retries=2,
+                 backoff_factor=0.5, pool_maxsize=10, failure_threshold=5, reset_timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,  # 读超时不重试，避免放大慢请求（与异步客户端一致）
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+
+        auth_str = f"{username}:{password}"
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            "Authorization": f"Basic {base64.b64encode(auth_str.encode()).decode()}",
+            "Accept": "application/json"
+        })
+
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'errors': 0,
+            'server_errors': 0
+        }
+
+    def get(self, path, params=None):
+        """
+        发送GET请求
+
+        Args:
+            path: 相对于base_url的路径，以/开头
+            params: 查询参数
+
+        Returns:
+            response: requests.Response，4xx/5xx响应同样直接返回
+
+        Raises:
+            CircuitOpenError: 熔断器打开
+            requests.RequestException: 重试后仍然连接失败或超时
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Airflow API暂时不可用（熔断中）")
+
+        with self._lock:
+            self._stats['requests'] += 1
+        try:
+            with span('airflow_api'):
+                response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        except Exception:
+            with self._lock:
+                self._stats['errors'] += 1
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # 调用被中断时也要结束本次调用，否则半开状态的探测标记不会清除
+            self.breaker.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            with self._lock:
+                self._stats['server_errors'] += 1
+            self.breaker.record_failure()
+        else:
+            # 4xx说明服务正常，只是请求的资源不存在或无权限
+            self.breaker.record_success()
+        return response
+
+    def get_task_log(self, dag_id, run_id, task_id, try_number, full_content=False, token=None):
+        """
+        获取任务日志
+
+        Args:
+            dag_id: DAG ID
+            run_id: DAG Run ID
+            task_id: 任务 ID
+            try_number: 尝试次数
+            full_content: 是否一次返回全部内容
+            token: continuation_token，默认为None表示第一页
+
+        Returns:
+            response: requests.Response
+        """
+        params = {"full_content": "true" if full_content else "false"}
+        if token:
+            params["token"] = token
+        return self.get(f"/dags/{dag_id}/dagRuns/{run_id}/taskInstances/{task_id}/logs/{try_number}", params=params)
+
+    def stats(self):
+        """
+        获取客户端状态
+
+        Returns:
+            stats: 请求计数、超时配置和熔断器状态
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            'base_url': self.base_url,
+            'connect_timeout': self.timeout[0],
+            'read_timeout': self.timeout[1],
+            **stats,
+            'circuit_breaker': self.breaker.stats()
+        }
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_airflow_client():
+    """
+    获取进程内共享的Airflow API客户端，首次调用时创建
+
+    Returns:
+        client: AirflowApiClient实例
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = AirflowApiClient(
+                    AIRFLOW_API_CONFIG['base_url'],
+                    AIRFLOW_API_CONFIG['username'],
+                    AIRFLOW_API_CONFIG['password'],
+                    **AIRFLOW_CLIENT_CONFIG
+                )
+                logger.info(f"创建Airflow API客户端: base_url={_client.base_url}, timeout={_client.timeout}")
+    return _client
+
+
+def close_airflow_client():
+    """关闭共享的Airflow API客户端"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -0,0 +1,183 @@
+import asyncio
+import re
+import asyncpg
+from config import DB_CONFIG, DB_POOL_CONFIG
+from services.db_service import DBService
+from services.metrics import timed
+from utils import logger
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+
+def _to_asyncpg_sql(sql):
+    """将psycopg2风格的%s占位符依次转换为asyncpg的$1、$2..."""
+    counter = iter(range(1, sql.count('%s') + 1))
+    return re.sub(r'%s', lambda _: f'${next(counter)}', sql)
+
+
+async def get_async_db_pool():
+    """
+    获取进程内共享的asyncpg连接池，首次调用时创建
+
+    连接池绑定在创建它的事件循环上，ASGI应用在同一个事件循环中处理所有请求
+
+    Returns:
+        pool: asyncpg.Pool实例
+    """
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await asyncpg.create_pool(
+                    host=DB_CONFIG['host'],
+                    port=int(DB_CONFIG['port']),
+                    database=DB_CONFIG['database'],
+                    user=DB_CONFIG['user'],
+                    password=DB_CONFIG['password'],
+                    min_size=DB_POOL_CONFIG['min_size'],
+                    max_size=DB_POOL_CONFIG['max_size'],
+                    max_inactive_connection_lifetime=DB_POOL_CONFIG['max_idle_seconds'],
+                    max_queries=50000
+                )
+                logger.info(f"创建异步数据库连接池: min_size={DB_POOL_CONFIG['min_size']}, max_size={DB_POOL_CONFIG['max_size']}")
+    return _pool
+
+
+async def close_async_db_pool():
+    """关闭共享的asyncpg连接池"""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+class AsyncDBService:
+    """
+    DBService的异步版本（asyncpg），查询语句和返回结构与同步版本一致
+    """
+
+    def __init__(self, pool=None):
+        self._pool = pool
+
+    async def _fetch(self, sql, *params):
+        pool = self._pool or await get_async_db_pool()
+        async with pool.acquire(timeout=DB_POOL_CONFIG['acquire_timeout']) as conn:
+            return await conn.fetch(sql, *params)
+
+    @timed('db', rows=True)
+    async def get_dag_run_summaries(self, dag_ids, start_date, end_date):
+        """
+        查询多个DAG在时间范围内每个DAG Run的任务状态统计
+
+        Args:
+            dag_ids: DAG ID 列表
+            start_date: 开始时间（UTC）
+            end_date: 结束时间（UTC）
+
+        Returns:
+            summaries: 与DBService.get_dag_run_summaries相同，查询失败时返回None
+        """
+        try:
+            sql, params = DBService._run_summary_query(dag_ids, start_date, end_date, "dr.dag_id ASC, dr.start_date ASC")
+            rows = await self._fetch(_to_asyncpg_sql(sql), *params)
+            logger.info(f"查询到 {len(rows)} 个DAG Run统计")
+
+            summaries = {dag_id: [] for dag_id in dag_ids}
+            for row in rows:
+                summaries.setdefault(row['dag_id'], []).append(DBService._run_summary_from_row(row))
+            return summaries
+
+        except Exception as e:
+            logger.error(f"查询失败: {e}")
+            return None
+
+    @timed('db', rows=True)
+    async def get_run_update_marks(self, dag_ids, start_date, end_date):
+        """
+        查询时间范围内DAG Run的开始时间和updated_at
+
+        Returns:
+            marks: 与DBService.get_run_update_marks相同，查询失败时返回None
+        """
+        sql = """
+            SELECT dr.dag_id, dr.start_date, dr.updated_at
+            FROM dag_run dr
+            WHERE dr.dag_id = ANY($1::text[])
+              AND dr.start_date BETWEEN $2 AND $3
+              AND EXISTS (
+                SELECT 1 FROM task_instance ti
+                WHERE ti.dag_id = dr.dag_id AND ti.run_id = dr.run_id AND ti.operator = 'PythonOperator'
+              )
+            """
+        try:
+            rows = await self._fetch(sql, list(dag_ids), start_date, end_date)
+        except Exception as e:
+            logger.error(f"查询失败: {e}")
+            return None
+        return [dict(row) for row in rows]
+
+    @timed('db', rows=True)
+    async def get_tasks_by_run_id(self, dag_id, run_id, states=None):
+        """
+        根据DAG ID和Run ID查询任务列表
+
+        Args:
+            dag_id: DAG ID
+            run_id: DAG Run ID
+            states: 状态列表，如果为None则查询所有状态
+
+        Returns:
+            tasks: 与DBService.get_tasks_by_run_id相同，查询失败时返回空列表
+        """
+        sql = """
+            SELECT DISTINCT task_id, operator, state AS raw_state, try_number
+            FROM task_instance
+            WHERE dag_id = $1
+              AND run_id = $2
+              AND operator = 'PythonOperator'
+              AND ($3::text[] IS NULL OR state = ANY($3::text[]))
+            ORDER BY task_id ASC
+            """
+        try:
+            rows = await self._fetch(sql, dag_id, run_id, list(states) if states else None)
+        except Exception as e:
+            logger.error(f"查询失败: {e}")
+            return []
+
+        tasks = [
+            {
+                'task_id': row['task_id'],
+                'operator': row['operator'],
+                'raw_state': row['raw_state'],
+                'try_number': row['try_number']
+            }
+            for row in rows
+        ]
+        logger.info(f"查询到 {len(tasks)} 个任务")
+        return tasks
+
+    @timed('db', rows=True)
+    async def get_task_instance_state(self, dag_id, run_id, task_id):
+        """
+        查询单个任务实例的当前状态和尝试次数
+
+        Returns:
+            task: 包含raw_state和try_number的字典，不存在或查询失败时返回None
+        """
+        sql = """
+            SELECT state, try_number
+            FROM task_instance
+            WHERE dag_id = $1 AND run_id = $2 AND task_id = $3
+            ORDER BY map_index ASC
+            LIMIT 1
+            """
+        try:
+            rows = await self._fetch(sql, dag_id, run_id, task_id)
+        except Exception as e:
+            logger.error(f"查询失败: {e}")
+            return None
+
+        if not rows:
+            return None
+        return {'raw_state': rows[0]['state'], 'try_number': rows[0]['try_number']}
@@ -0,0 +1,140 @@
+import asyncio
+import base64
+import httpx
+from config import AIRFLOW_API_CONFIG, AIRFLOW_CLIENT_CONFIG
+from services.airflow_client import CircuitBreaker
+from services.async_db_service import AsyncDBService
+from services.log_service import LogService
+from services.metrics import observe_log_bytes, timed
+from services.request_timing import span
+from utils import logger
+
+_client = None
+_breaker = CircuitBreaker(AIRFLOW_CLIENT_CONFIG['failure_threshold'], AIRFLOW_CLIENT_CONFIG['reset_timeout'])
+
+
+def get_async_airflow_client():
+    """
+    获取进程内共享的httpx异步客户端，连接池、超时与同步客户端使用相同配置
+
+    Returns:
+        client: httpx.AsyncClient实例
+    """
+    global _client
+    if _client is None:
+        auth_str = f"{AIRFLOW_API_CONFIG['username']}:{AIRFLOW_API_CONFIG['password']}"
+        _client = httpx.AsyncClient(
+            base_url=AIRFLOW_API_CONFIG['base_url'].rstrip('/'),
+            headers={
+                "Authorization": f"Basic {base64.b64encode(auth_str.encode()).decode()}",
+                "Accept": "application/json"
+            },
+            timeout=httpx.Timeout(AIRFLOW_CLIENT_CONFIG['read_timeout'],
+                                  connect=AIRFLOW_CLIENT_CONFIG['connect_timeout']),
+            limits=httpx.Limits(max_connections=AIRFLOW_CLIENT_CONFIG['pool_maxsize'] * 10,
+                                max_keepalive_connections=AIRFLOW_CLIENT_CONFIG['pool_maxsize']),
+            # 只对建立连接失败重试；读超时不重试，避免放大慢请求
+            transport=httpx.AsyncHTTPTransport(retries=AIRFLOW_CLIENT_CONFIG['retries'])
+        )
+        logger.info(f"创建Airflow API异步客户端: base_url={_client.base_url}")
+    return _client
+
+
+async def close_async_airflow_client():
+    """关闭共享的httpx异步客户端"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+class AsyncLogService:
+    """
+    LogService的异步版本：Airflow API通过httpx异步请求，本地文件和日志缓存的读写在线程中执行；
+    路径规则、响应解析和缓存策略复用同步版本
+    """
+
+    def __init__(self):
+        self.sync_service = LogService()
+        self.db_service = AsyncDBService()
+
+    @timed('log')
+    async def fetch_airflow_log(self, dag_id, run_id, task_id, try_number):
+        """
+        通过Airflow API获取任务日志
+
+        Returns:
+            log_content: 日志内容
+            error: 错误信息（如果有）
+        """
+        path = f"/dags/{dag_id}/dagRuns/{run_id}/taskInstances/{task_id}/logs/{try_number}"
+        if not _breaker.allow():
+            logger.warning(f"Airflow API熔断中，跳过请求: path={path}")
+            return None, "Airflow API暂时不可用（熔断中）"
+
+        try:
+            with span('airflow_api'):
+                response = await get_async_airflow_client().get(path, params={"full_content": "true"})
+        except Exception as e:
+            _breaker.record_failure()
+            logger.warning(f"访问Airflow REST API失败: path={path}, 错误={str(e)}")
+            return None, f"请求Airflow API时发生错误: {str(e)}"
+        except BaseException:
+            # 请求被取消（客户端断开、wait_for超时）时也要结束本次调用，否则半开状态的探测标记不会清除
+            _breaker.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            _breaker.record_failure()
+        else:
+            _breaker.record_success()
+
+        logger.info(f"Airflow API响应状态: {response.status_code}, 内容大小: {len(response.content)} 字节")
+        if response.status_code != 200:
+            logger.warning(f"通过Airflow REST API获取日志失败: path={path}, 状态码={response.status_code}")
+            return None, f"获取日志失败: {response.status_code} - {response.text}"
+
+        try:
+            return self.sync_service._parse_airflow_log_content(response.json()), None
+        except Exception as e:
+            logger.warning(f"解析Airflow API响应失败: {e}")
+            return response.text, None
+
+    @timed('log')
+    async def get_task_log(self, dag_id, task_id, dag_run_id, try_number=1):
+        """
+        获取任务的日志内容，优先使用日志缓存，其次Airflow API，最后本地文件或远程对象存储
+
+        Returns:
+            log_content: 日志内容
+            error: 错误信息（如果有）
+        """
+        sync_service = self.sync_service
+        if sync_service.log_cache is not None:
+            cached = await asyncio.to_thread(sync_service.get_cached_log, dag_id, task_id, dag_run_id, try_number)
+            if cached is not None:
+                observe_log_bytes('cache', len(cached))
+                return cached.decode('utf-8', errors='replace'), None
+
+        log_content, error = await self.fetch_airflow_log(dag_id, dag_run_id, task_id, try_number)
+        if log_content is not None:
+            observe_log_bytes('airflow_api', len(log_content.encode('utf-8')))
+        else:
+            logger.warning(f"回退到本地/远程日志获取日志: dag_id={dag_id}, task_id={task_id}, run_id={dag_run_id}, try_number={try_number}")
+            log_content, error = await asyncio.to_thread(
+                sync_service.read_log_from_sources, dag_id, task_id, dag_run_id, try_number)
+            if error:
+                return None, error
+
+        await self._cache_if_finished(dag_id, task_id, dag_run_id, try_number, log_content)
+        return log_content, None
+
+    async def _cache_if_finished(self, dag_id, task_id, dag_run_id, try_number, log_content):
+        """任务尝试已结束时写入日志缓存，判断规则与LogService一致"""
+        log_cache = self.sync_service.log_cache
+        if log_cache is None:
+            return
+        task = await self.db_service.get_task_instance_state(dag_id, dag_run_id, task_id)
+        if LogService.is_finished_try(task, try_number):
+            await asyncio.to_thread(log_cache.put, (dag_id, dag_run_id, task_id, try_number),
+                                    log_content.encode('utf-8'))
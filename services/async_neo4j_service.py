@@ -0,0 +1,155 @@
+import asyncio
+from neo4j import AsyncGraphDatabase
+from config import NEO4J_CONFIG, NEO4J_POOL_CONFIG, NODE_CATALOG_CONFIG, UNSCHEDULED_CACHE_CONFIG
+from services.neo4j_service import (NODES_BY_EN_NAMES_QUERY, UNSCHEDULED_COUNT_QUERY, UNSCHEDULED_LIST_QUERY,
+                                    Neo4jService, _unscheduled_cache, unscheduled_script_from_record)
+from services.metrics import timed
+from services.node_catalog import get_node_catalog
+from utils import logger
+
+_driver = None
+
+
+def get_async_neo4j_driver():
+    """
+    获取进程内共享的Neo4j异步驱动，首次调用时创建
+
+    Returns:
+        driver: neo4j.AsyncDriver实例
+    """
+    global _driver
+    if _driver is None:
+        _driver = AsyncGraphDatabase.driver(
+            NEO4J_CONFIG['uri'],
+            auth=(NEO4J_CONFIG['user'], NEO4J_CONFIG['password']),
+            **NEO4J_POOL_CONFIG
+        )
+        logger.info(f"创建Neo4j异步驱动: uri={NEO4J_CONFIG['uri']}")
+    return _driver
+
+
+async def close_async_neo4j_driver():
+    """关闭共享的Neo4j异步驱动"""
+    global _driver
+    if _driver is not None:
+        try:
+            await _driver.close()
+            logger.info("Neo4j异步驱动已关闭")
+        except Exception as e:
+            logger.warning(f"关闭Neo4j异步驱动失败: {e}")
+        _driver = None
+
+
+class AsyncNeo4jService:
+    """
+    Neo4jService的异步版本，查询语句、缓存和返回结构与同步版本一致
+
+    未调度数量/列表与同步服务共用同一个缓存，过期条目的后台刷新仍由同步服务在线程中完成；
+    节点目录缓存为内存查找，可能回源时在线程中执行，避免阻塞事件循环
+    """
+
+    def __init__(self, driver=None):
+        self._driver = driver
+        self.sync_service = Neo4jService()
+
+    @property
+    def driver(self):
+        return self._driver or get_async_neo4j_driver()
+
+    @timed('neo4j')
+    async def get_unscheduled_count(self):
+        """
+        查询未调度节点的数量
+
+        Returns:
+            count: 未调度节点的数量
+        """
+        if UNSCHEDULED_CACHE_CONFIG['enabled']:
+            scripts_list = _unscheduled_cache.get_if_present(
+                'unscheduled_list', self.sync_service._query_unscheduled_list)
+            if scripts_list is not None:
+                return len(scripts_list)
+            count = _unscheduled_cache.get_if_present(
+                'unscheduled_count', self.sync_service._query_unscheduled_count)
+            if count is not None:
+                return count
+
+        count = await self._query_unscheduled_count()
+        if UNSCHEDULED_CACHE_CONFIG['enabled']:
+            _unscheduled_cache.set('unscheduled_count', count)
+        return count if count is not None else 0
+
+    @timed('neo4j')
+    async def get_unscheduled_list(self):
+        """
+        获取所有未调度脚本及其目标表信息
+
+        Returns:
+            scripts_list: 包含未调度脚本及目标表信息的列表
+        """
+        if UNSCHEDULED_CACHE_CONFIG['enabled']:
+            scripts_list = _unscheduled_cache.get_if_present(
+                'unscheduled_list', self.sync_service._query_unscheduled_list)
+            if scripts_list is not None:
+                return scripts_list
+
+        scripts_list = await self._query_unscheduled_list()
+        if UNSCHEDULED_CACHE_CONFIG['enabled']:
+            _unscheduled_cache.set('unscheduled_list', scripts_list)
+        return scripts_list or []
+
+    @timed('neo4j')
+    async def _query_unscheduled_count(self):
+        try:
+            async with self.driver.session() as session:
+                result = await session.run(UNSCHEDULED_COUNT_QUERY)
+                record = await result.single()
+            rel_count = record["rel_count"] if record else 0
+            node_count = record["node_count"] if record else 0
+            logger.info(f"未调度关系数量: {rel_count}, 未调度DataResource结构节点数量: {node_count}")
+            return rel_count + node_count
+        except Exception as e:
+            logger.error(f"查询Neo4j未调度节点数量失败: {e}")
+            return None
+
+    @timed('neo4j')
+    async def _query_unscheduled_list(self):
+        try:
+            async with self.driver.session() as session:
+                result = await session.run(UNSCHEDULED_LIST_QUERY)
+                scripts_list = [unscheduled_script_from_record(record) async for record in result]
+            logger.info(f"查询到 {len(scripts_list)} 条未调度脚本记录")
+            return scripts_list
+        except Exception as e:
+            logger.error(f"查询Neo4j未调度脚本列表失败: {e}")
+            return None
+
+    @timed('neo4j')
+    async def check_nodes_by_en_names(self, en_names):
+        """
+        批量查询节点是否存在及其中文名
+
+        Args:
+            en_names: 节点英文名称列表
+
+        Returns:
+            nodes: 以英文名为键、(exists, cn_name)为值的字典
+        """
+        if NODE_CATALOG_CONFIG['enabled']:
+            catalog = get_node_catalog(self.sync_service)
+            return await asyncio.to_thread(catalog.lookup_many, en_names)
+
+        unique_names = list(dict.fromkeys(name for name in en_names if name))
+        nodes = {name: (False, None) for name in unique_names}
+        if not unique_names:
+            return nodes
+
+        try:
+            async with self.driver.session() as session:
+                result = await session.run(NODES_BY_EN_NAMES_QUERY, en_names=unique_names)
+                async for record in result:
+                    nodes[record["en_name"]] = (True, record["cn_name"])
+            return nodes
+        except Exception as e:
+            logger.error(f"批量查询Neo4j节点信息失败: {e}")
+            return {name: (False, None) for name in unique_names}
@@ -0,0 +1,270 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+from config import DB_CONFIG, DB_POOL_CONFIG
+from utils import logger
+
+
+class PoolTimeoutError(Exception):
+    """在acquire_timeout内未能从连接池获取到连接"""
+
+
+class _PooledConnection:
+    """连接池中的连接及其元数据"""
+
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class DBConnectionPool:
+    """
+    线程安全、有上限的PostgreSQL连接池
+
+    - 连接按需创建，总数不超过max_size，池满时等待acquire_timeout秒
+    - 超过min_size的空闲连接在max_idle_seconds后被回收
+    - 连接存活超过max_lifetime_seconds后被关闭重建
+    - 空闲超过health_check_after秒的连接在取出时执行SELECT 1检查
+    """
+
+    def __init__(self, conn_kwargs, min_size=1, max_size=10, max_idle_seconds=300,
+                 max_lifetime_seconds=3600, acquire_timeout=10, health_check_after=30):
+        if max_size < 1:
+            raise ValueError("max_size必须大于0")
+        self.conn_kwargs = conn_kwargs
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.acquire_timeout = acquire_timeout
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._stats = {
+            'created': 0,
+            'closed': 0,
+            'checkouts': 0,
+            'timeouts': 0,
+            'health_check_failures': 0
+        }
+
+    def _create(self):
+        conn = psycopg2.connect(**self.conn_kwargs)
+        logger.debug("数据库连接池新建连接")
+        return _PooledConnection(conn)
+
+    def _discard(self, pooled):
+        """关闭连接，调用方负责更新_size"""
+        try:
+            pooled.conn.close()
+        except Exception as e:
+            logger.warning(f"关闭数据库连接失败: {e}")
+
+    def _is_expired(self, pooled, now):
+        return now - pooled.created_at > self.max_lifetime_seconds
+
+    def _is_healthy(self, pooled, now):
+        """检查连接可用性，仅对空闲较久的连接执行SELECT 1"""
+        if pooled.conn.closed:
+            return False
+        if now - pooled.last_used < self.health_check_after:
+            return True
+        try:
+            with pooled.conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            pooled.conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"数据库连接健康检查失败: {e}")
+            return False
+
+    def _reap_idle(self, now):
+        """在持有锁的情况下回收超出min_size的长时间空闲连接，返回需关闭的连接列表"""
+        reaped = []
+        # 空闲队列为LIFO，最久未使用的连接位于左端
+        while len(self._idle) > self.min_size:
+            oldest = self._idle[0]
+            if now - oldest.last_used <= self.max_idle_seconds and not self._is_expired(oldest, now):
+                break
+            reaped.append(self._idle.popleft())
+            self._size -= 1
+            self._stats['closed'] += 1
+        return reaped
+
+    def acquire(self, timeout=None):
+        """
+        从连接池中取出一个连接
+
+        Args:
+            timeout: 等待超时时间（秒），默认为None表示使用acquire_timeout
+
+        Returns:
+            conn: psycopg2连接对象
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            pooled = None
+            create = False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("数据库连接池已关闭")
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeoutError(f"等待数据库连接超时({timeout}s)，连接池已满: max_size={self.max_size}")
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+
+            if create:
+                try:
+                    pooled = self._create()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats['created'] += 1
+                    self._stats['checkouts'] += 1
+                return pooled
+
+            now = time.monotonic()
+            if not self._is_expired(pooled, now) and self._is_healthy(pooled, now):
+                with self._cond:
+                    self._stats['checkouts'] += 1
+                return pooled
+
+            # 连接已过期或不可用，关闭后重试
+            self._discard(pooled)
+            with self._cond:
+                self._size -= 1
+                self._stats['closed'] += 1
+                if not self._is_expired(pooled, now):
+                    self._stats['health_check_failures'] += 1
+                self._cond.notify()
+
+    def release(self, pooled):
+        """
+        将连接归还到连接池，未结束的事务会被回滚
+
+        Args:
+            pooled: acquire()返回的连接
+        """
+        conn = pooled.conn
+        healthy = not conn.closed
+        if healthy and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except Exception as e:
+                logger.warning(f"回滚数据库连接失败，将关闭该连接: {e}")
+                healthy = False
+
+        now = time.monotonic()
+        reaped = []
+        with self._cond:
+            if healthy and not self._closed and not self._is_expired(pooled, now):
+                pooled.last_used = now
+                self._idle.append(pooled)
+                reaped = self._reap_idle(now)
+                pooled = None
+            else:
+                self._size -= 1
+                self._stats['closed'] += 1
+            self._cond.notify()
+
+        if pooled is not None:
+            self._discard(pooled)
+        for item in reaped:
+            self._discard(item)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """以上下文管理器方式借用连接，退出时自动归还"""
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled.conn
+        finally:
+            self.release(pooled)
+
+    def stats(self):
+        """
+        获取连接池状态
+
+        Returns:
+            stats: 包含连接数、空闲数、等待数及累计计数的字典
+        """
+        with self._cond:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'waiting': self._waiting,
+                **self._stats
+            }
+
+    def close(self):
+        """关闭连接池中的所有空闲连接，并拒绝后续借用"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._stats['closed'] += len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
+        logger.info(f"数据库连接池已关闭，释放 {len(idle)} 个空闲连接")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_db_pool():
+    """
+    获取进程内共享的数据库连接池，首次调用时创建
+
+    Returns:
+        pool: DBConnectionPool实例
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = DBConnectionPool(DB_CONFIG, **DB_POOL_CONFIG)
+                logger.info(f"创建数据库连接池: min_size={_pool.min_size}, max_size={_pool.max_size}")
+    return _pool
+
+
+def close_db_pool():
+    """关闭共享的数据库连接池"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -1,57 +1,235 @@
 import psycopg2
 import psycopg2.extras
-from config import DB_CONFIG
-from utils import logger
+from contextlib import contextmanager
+from config import TASK_STATES
+from services.db_pool import get_db_pool
+from services.metrics import timed
+from utils import logger, truncate_for_log
 
 class DBService:
-    def __init__(self):
-        self.conn = None
-        self.cursor = None
+    def __init__(self, pool=None):
+        # 默认使用进程内共享的连接池，DAG和Task控制器共用同一组连接
+        self.pool = pool or get_db_pool()
     
-    def connect(self):
-        """建立数据库连接"""
-        try:
-            self.conn = psycopg2.connect(**DB_CONFIG)
-            self.cursor = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-            return True
-        except Exception as e:
-            logger.error(f"数据库连接失败: {e}")
-            return False
+    @contextmanager
+    def _cursor(self, name=None, itersize=None):
+        """
+        从连接池借用连接并创建游标，退出时归还连接
+        
+        Args:
+            name: 服务端游标名称，默认为None表示使用客户端游标
+            itersize: 服务端游标每次从数据库拉取的行数
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor(name=name, cursor_factory=psycopg2.extras.DictCursor)
+            if name and itersize:
+                cursor.itersize = itersize
+            try:
+                yield cursor
+            finally:
+                cursor.close()
     
-    def disconnect(self):
-        """关闭数据库连接"""
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
+    def get_pool_stats(self):
+        """获取数据库连接池状态"""
+        return self.pool.stats()
     
-    def get_dag_runs_with_tasks(self, dag_id, start_date, end_date):
+    @timed('db', rows=True)
+    def get_dag_run_summaries(self, dag_ids, start_date, end_date):
         """
-        查询指定DAG在时间范围内的所有DAG Run及其任务执行情况
+        查询多个DAG在时间范围内每个DAG Run的任务状态统计，状态计数在SQL中完成
         
         Args:
-            dag_id: DAG ID
+            dag_ids: DAG ID 列表
             start_date: 开始时间（UTC）
             end_date: 结束时间（UTC）
             
         Returns:
-            dag_runs: 包含DAG Run信息的字典
-            tasks: 包含任务执行信息的字典
+            summaries: 以DAG ID为键、按开始时间排序的DAG Run统计列表为值的字典，
+                       每项包含dag_run_id、logical_date、dag_run_start_date、dag_run_state、dag_run_updated_at及
+                       success、failed、running、stopped、total计数；查询失败时返回None
         """
-        if not self.connect():
-            return None, None
+        try:
+            sql, params = self._run_summary_query(dag_ids, start_date, end_date, "dr.dag_id ASC, dr.start_date ASC")
+            logger.debug("执行SQL: %s", truncate_for_log(sql))
+            logger.debug("查询参数: dag_ids=%s, start_date=%s, end_date=%s", dag_ids, start_date, end_date)
+            with self._cursor() as cursor:
+                cursor.execute(sql, params)
+                results = cursor.fetchall()
+
+            logger.info("查询到 %s 个DAG Run统计", len(results))
+            
+            summaries = {dag_id: [] for dag_id in dag_ids}
+            for row in results:
+                summaries.setdefault(row['dag_id'], []).append(self._run_summary_from_row(row))
+            return summaries
+            
+        except Exception as e:
+            logger.error(f"查询失败: {e}")
+            return None
+
+    @timed('db', rows=True)
+    def iter_dag_run_summaries(self, dag_ids, start_date, end_date, batch_size=500):
+        """
+        使用服务端游标按开始时间顺序逐行返回多个DAG的DAG Run统计，内存占用与时间范围无关
+        
+        迭代期间占用一个连接池连接，迭代结束或生成器关闭时归还
+        
+        Args:
+            dag_ids: DAG ID 列表
+            start_date: 开始时间（UTC）
+            end_date: 结束时间（UTC）
+            batch_size: 每次从数据库拉取的行数
+            
+        Yields:
+            run_summary: DAG Run统计字典，结构与get_dag_run_summaries中的列表项相同
+        """
+        sql, params = self._run_summary_query(dag_ids, start_date, end_date, "dr.start_date ASC, dr.dag_id ASC")
+        logger.debug("执行SQL: %s", truncate_for_log(sql))
+        logger.debug("查询参数: dag_ids=%s, start_date=%s, end_date=%s", dag_ids, start_date, end_date)
         
+        count = 0
         try:
-            # 执行SQL查询
-            sql = """
+            with self._cursor(name='dag_run_summaries', itersize=batch_size) as cursor:
+                cursor.execute(sql, params)
+                for row in cursor:
+                    count += 1
+                    yield self._run_summary_from_row(row)
+        except Exception as e:
+            logger.error(f"查询失败: {e}")
+            raise
+        logger.info("流式查询返回 %s 个DAG Run统计", count)
+
+    @timed('db', rows=True)
+    def get_run_update_marks(self, dag_ids, start_date, end_date):
+        """
+        查询时间范围内DAG Run的开始时间和updated_at，用于校验本地封存的日期是否仍然有效
+
+        只读取dag_run表（任务条件与统计查询相同，使用EXISTS），比统计查询轻得多；
+        在Airflow中清除并重跑DAG Run时其状态和updated_at都会变化
+
+        Args:
+            dag_ids: DAG ID 列表
+            start_date: 开始时间（UTC）
+            end_date: 结束时间（UTC）
+
+        Returns:
+            marks: 包含dag_id、start_date和updated_at的字典列表，查询失败时返回None
+        """
+        sql = """
+            SELECT dr.dag_id, dr.start_date, dr.updated_at
+            FROM dag_run dr
+            WHERE dr.dag_id = ANY(%s)
+              AND dr.start_date BETWEEN %s AND %s
+              AND EXISTS (
+                SELECT 1 FROM task_instance ti
+                WHERE ti.dag_id = dr.dag_id AND ti.run_id = dr.run_id AND ti.operator = 'PythonOperator'
+              );
+            """
+        try:
+            logger.debug("查询参数: dag_ids=%s, start_date=%s, end_date=%s", dag_ids, start_date, end_date)
+            with self._cursor() as cursor:
+                cursor.execute(sql, (list(dag_ids), start_date, end_date))
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"查询失败: {e}")
+            return None
+
+    @timed('db')
+    def get_update_watermarks(self, dag_ids):
+        """
+        查询指定DAG的dag_run和task_instance当前最大的updated_at，作为增量查询的初始水位
+        
+        Args:
+            dag_ids: DAG ID 列表
+            
+        Returns:
+            dag_run_watermark: dag_run的最大updated_at（UTC），没有记录时为None
+            task_watermark: task_instance的最大updated_at（UTC），没有记录时为None
+            查询失败时抛出异常
+        """
+        sql = """
+            SELECT
+              (SELECT MAX(updated_at) FROM dag_run WHERE dag_id = ANY(%s)) AS dag_run_watermark,
+              (SELECT MAX(updated_at) FROM task_instance
+                WHERE dag_id = ANY(%s) AND operator = 'PythonOperator') AS task_watermark;
+            """
+        logger.debug("执行SQL: %s", truncate_for_log(sql))
+        logger.debug("查询参数: dag_ids=%s", dag_ids)
+        with self._cursor() as cursor:
+            cursor.execute(sql, (list(dag_ids), list(dag_ids)))
+            row = cursor.fetchone()
+        return row['dag_run_watermark'], row['task_watermark']
+
+    @timed('db', rows=True)
+    def get_changes_since(self, dag_ids, dag_run_since, task_since):
+        """
+        查询updated_at晚于水位的dag_run和task_instance记录
+        
+        Args:
+            dag_ids: DAG ID 列表
+            dag_run_since: dag_run的水位时间（UTC），为None时不限制
+            task_since: task_instance的水位时间（UTC），为None时不限制
+            
+        Returns:
+            dag_runs: 变化的DAG Run列表，按updated_at排序
+            tasks: 变化的任务列表，按updated_at排序
+            查询失败时抛出异常
+        """
+        dag_run_sql = """
+            SELECT dag_id, run_id, state, execution_date, start_date, end_date, updated_at
+            FROM dag_run
+            WHERE dag_id = ANY(%s)
+              AND (%s::timestamptz IS NULL OR updated_at > %s)
+            ORDER BY updated_at ASC;
+            """
+        task_sql = """
+            SELECT dag_id, run_id, task_id, state, try_number, start_date, end_date, updated_at
+            FROM task_instance
+            WHERE dag_id = ANY(%s)
+              AND operator = 'PythonOperator'
+              AND (%s::timestamptz IS NULL OR updated_at > %s)
+            ORDER BY updated_at ASC;
+            """
+        logger.debug("执行SQL: %s", truncate_for_log(dag_run_sql))
+        logger.debug("执行SQL: %s", truncate_for_log(task_sql))
+        logger.debug("查询参数: dag_ids=%s, dag_run_since=%s, task_since=%s", dag_ids, dag_run_since, task_since)
+        with self._cursor() as cursor:
+            cursor.execute(dag_run_sql, (list(dag_ids), dag_run_since, dag_run_since))
+            dag_runs = [dict(row) for row in cursor.fetchall()]
+            cursor.execute(task_sql, (list(dag_ids), task_since, task_since))
+            tasks = [dict(row) for row in cursor.fetchall()]
+        
+        logger.info("增量查询到 %s 个DAG Run、%s 个任务发生变化", len(dag_runs), len(tasks))
+        return dag_runs, tasks
+
+    @staticmethod
+    def _run_summary_query(dag_ids, start_date, end_date, order_by):
+        """
+        构建按DAG Run聚合任务状态的SQL，状态分类取自TASK_STATES配置
+        
+        Args:
+            dag_ids: DAG ID 列表
+            start_date: 开始时间（UTC）
+            end_date: 结束时间（UTC）
+            order_by: ORDER BY子句内容
+            
+        Returns:
+            sql: SQL语句
+            params: 查询参数
+        """
+        sql = f"""
             SELECT 
               dr.dag_id,
               dr.run_id,
               dr.execution_date,
               dr.start_date AS dag_run_start_date,
               dr.state AS dag_run_state,
-              ti.task_id,
-              ti.state AS task_state
+              dr.updated_at AS dag_run_updated_at,
+              COUNT(*) FILTER (WHERE ti.state = ANY(%s)) AS success_count,
+              COUNT(*) FILTER (WHERE ti.state = ANY(%s)) AS failed_count,
+              COUNT(*) FILTER (WHERE ti.state = ANY(%s)) AS running_count,
+              COUNT(*) FILTER (WHERE ti.state = ANY(%s)) AS stopped_count,
+              COUNT(*) AS total_count
             FROM
               dag_run dr
             JOIN
@@ -59,56 +237,45 @@ class DBService:
             ON
               dr.dag_id = ti.dag_id AND dr.run_id = ti.run_id
             WHERE
-              dr.dag_id = %s
+              dr.dag_id = ANY(%s)
               AND dr.start_date BETWEEN %s AND %s
               AND ti.operator = 'PythonOperator'
+            GROUP BY
+              dr.dag_id, dr.run_id, dr.execution_date, dr.start_date, dr.state, dr.updated_at
             ORDER BY
-              dr.start_date ASC, ti.task_id ASC;
+              {order_by};
             """
-            logger.debug(sql)
-            logger.debug(f"查询参数: dag_id={dag_id}, start_date={start_date}, end_date={end_date}")
-            self.cursor.execute(sql, (dag_id, start_date, end_date))
-            results = self.cursor.fetchall()
+        params = (
+            TASK_STATES['success_states'],
+            TASK_STATES['failed_states'],
+            TASK_STATES['running_states'],
+            TASK_STATES['stopped_states'],
+            list(dag_ids),
+            start_date,
+            end_date
+        )
+        return sql, params
 
-            logger.info(f"查询到 {len(results)} 条记录")
-            
-            # 整理数据结构
-            dag_runs = {}
-            tasks = {}
-            
-            for row in results:
-                row_dict = dict(row)
-                run_id = row_dict['run_id']
-                
-                # 记录DAG Run信息
-                if run_id not in dag_runs:
-                    dag_runs[run_id] = {
-                        'dag_run_id': row_dict['run_id'],
-                        'logical_date': row_dict['execution_date'],
-                        'dag_run_start_date': row_dict['dag_run_start_date'],
-                        'dag_run_state': row_dict['dag_run_state']
-                    }
-                
-                # 记录任务信息
-                if run_id not in tasks:
-                    tasks[run_id] = []
-                
-                tasks[run_id].append({
-                    'task_id': row_dict['task_id'],
-                    'task_state': row_dict['task_state']
-                })
-            
-            logger.info(f"整理后得到 {len(dag_runs)} 个DAG Runs")
-            return dag_runs, tasks
-            
-        except Exception as e:
-            logger.error(f"查询失败: {e}")
-            return None, None
-        finally:
-            self.disconnect()
+    @staticmethod
+    def _run_summary_from_row(row):
+        """将聚合查询的一行转换为DAG Run统计字典"""
+        return {
+            'dag_id': row['dag_id'],
+            'dag_run_id': row['run_id'],
+            'logical_date': row['execution_date'],
+            'dag_run_start_date': row['dag_run_start_date'],
+            'dag_run_state': row['dag_run_state'],
+            'dag_run_updated_at': row['dag_run_updated_at'],
+            'success': row['success_count'],
+            'failed': row['failed_count'],
+            'running': row['running_count'],
+            'stopped': row['stopped_count'],
+            'total': row['total_count']
+        }
 
     # services/db_service.py 添加的方法
 
+    @timed('db', rows=True)
     def get_tasks_by_state(self, dag_id, start_date, end_date, states=None):
         """
         查询指定状态的任务列表
@@ -122,9 +289,6 @@ class DBService:
         Returns:
             task_ids: 符合条件的任务ID列表
         """
-        if not self.connect():
-            return []
-        
         try:
             # 构建基础SQL
             sql = """
@@ -150,22 +314,54 @@ class DBService:
             
             sql += " ORDER BY ti.task_id ASC"
             
-            logger.debug(sql)
-            logger.debug(f"查询参数: {params}")
-            self.cursor.execute(sql, params)
-            results = self.cursor.fetchall()
+            logger.debug("执行SQL: %s", truncate_for_log(sql))
+            logger.debug("查询参数: %s", params)
+            with self._cursor() as cursor:
+                cursor.execute(sql, params)
+                results = cursor.fetchall()
             
             # 提取任务ID
             task_ids = [row[0] for row in results]
-            logger.info(f"查询到 {len(task_ids)} 个任务ID")
+            logger.info("查询到 %s 个任务ID", len(task_ids))
             return task_ids
             
         except Exception as e:
             logger.error(f"查询失败: {e}")
             return []
-        finally:
-            self.disconnect()
 
+    @timed('db', rows=True)
+    def get_task_instance_state(self, dag_id, run_id, task_id):
+        """
+        查询单个任务实例的当前状态和尝试次数
+        
+        Args:
+            dag_id: DAG ID
+            run_id: DAG Run ID
+            task_id: 任务 ID
+            
+        Returns:
+            task: 包含raw_state和try_number的字典，不存在或查询失败时返回None
+        """
+        sql = """
+            SELECT state, try_number
+            FROM task_instance
+            WHERE dag_id = %s AND run_id = %s AND task_id = %s
+            ORDER BY map_index ASC
+            LIMIT 1;
+            """
+        try:
+            with self._cursor() as cursor:
+                cursor.execute(sql, (dag_id, run_id, task_id))
+                row = cursor.fetchone()
+        except Exception as e:
+            logger.error(f"查询失败: {e}")
+            return None
+        
+        if row is None:
+            return None
+        return {'raw_state': row[0], 'try_number': row[1]}
+    
+    @timed('db', rows=True)
     def get_tasks_by_run_id(self, dag_id, run_id, states=None):
         """
         根据DAG ID和Run ID查询任务列表
@@ -178,9 +374,6 @@ class DBService:
         Returns:
             tasks: 符合条件的任务列表，包含task_id、operator、raw_state和try_number
         """
-        if not self.connect():
-            return []
-        
         try:
             # 构建基础SQL
             sql = """
@@ -207,10 +400,11 @@ class DBService:
             
             sql += " ORDER BY task_id ASC"
             
-            logger.debug(sql)
-            logger.debug(f"查询参数: {params}")
-            self.cursor.execute(sql, params)
-            results = self.cursor.fetchall()
+            logger.debug("执行SQL: %s", truncate_for_log(sql))
+            logger.debug("查询参数: %s", params)
+            with self._cursor() as cursor:
+                cursor.execute(sql, params)
+                results = cursor.fetchall()
             
             # 转换为字典列表
             tasks = []
@@ -222,11 +416,9 @@ class DBService:
                     'try_number': row[3]
                 })
                 
-            logger.info(f"查询到 {len(tasks)} 个任务")
+            logger.info("查询到 %s 个任务", len(tasks))
             return tasks
             
         except Exception as e:
             logger.error(f"查询失败: {e}")
             return []
-        finally:
-            self.disconnect()
\ No newline at end of file
@@ -0,0 +1,488 @@
+import datetime
+import os
+import socket
+import sqlite3
+import threading
+import time
+from config import ERROR_INDEX_CONFIG, MONITOR_DAG_ID, TASK_STATES
+from services.db_service import DBService
+from services.error_signature import extract_error_signature
+from services.log_service import LogService
+from utils import logger
+
+
+class ErrorSignatureIndex:
+    """
+    失败任务日志的错误签名索引（嵌入式SQLite）
+
+    - error_signature: 签名 -> 异常类型、消息模板、最内层调用帧
+    - error_occurrence: 签名到(DAG, Run, 任务, 尝试)的倒排索引
+    - processed_try: 已解析过的任务尝试，保证每份日志只解析一次
+    - sealed_run: 已结束且失败任务已全部解析的DAG Run，之后不再查询其任务
+    - indexer_lease: 索引周期租约，共用同一索引文件的多个进程中同一时间只有一个在执行周期
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS error_signature (
+                signature TEXT PRIMARY KEY,
+                exception_type TEXT NOT NULL,
+                message_template TEXT NOT NULL,
+                top_frame TEXT
+            );
+            CREATE TABLE IF NOT EXISTS error_occurrence (
+                dag_id TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                try_number INTEGER NOT NULL,
+                signature TEXT NOT NULL,
+                occurred_at TEXT,
+                message TEXT,
+                PRIMARY KEY (dag_id, run_id, task_id, try_number)
+            );
+            CREATE INDEX IF NOT EXISTS idx_error_occurrence_signature ON error_occurrence (signature, occurred_at);
+            CREATE INDEX IF NOT EXISTS idx_error_occurrence_time ON error_occurrence (occurred_at);
+            CREATE TABLE IF NOT EXISTS processed_try (
+                dag_id TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                try_number INTEGER NOT NULL,
+                signature TEXT,
+                processed_at TEXT NOT NULL,
+                PRIMARY KEY (dag_id, run_id, task_id, try_number)
+            );
+            CREATE TABLE IF NOT EXISTS sealed_run (
+                dag_id TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                sealed_at TEXT NOT NULL,
+                PRIMARY KEY (dag_id, run_id)
+            );
+            CREATE TABLE IF NOT EXISTS indexer_lease (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_cycle_at REAL
+            );
+        """)
+        self._conn.commit()
+        logger.info(f"错误签名索引已打开: {path}")
+
+    def get_sealed_runs(self, dag_id, run_ids):
+        """
+        查询已封存的DAG Run
+
+        Returns:
+            sealed: 已封存的run_id集合
+        """
+        if not run_ids:
+            return set()
+        placeholders = ','.join('?' * len(run_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT run_id FROM sealed_run WHERE dag_id = ? AND run_id IN ({placeholders})",
+                (dag_id, *run_ids)
+            ).fetchall()
+        return {row['run_id'] for row in rows}
+
+    def seal_run(self, dag_id, run_id):
+        """标记DAG Run的失败任务日志已全部解析"""
+        sealed_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sealed_run (dag_id, run_id, sealed_at) VALUES (?, ?, ?)",
+                (dag_id, run_id, sealed_at)
+            )
+            self._conn.commit()
+
+    def get_processed_tries(self, dag_id, run_id):
+        """
+        查询DAG Run中已解析的任务尝试
+
+        Returns:
+            processed: (task_id, try_number)集合
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_id, try_number FROM processed_try WHERE dag_id = ? AND run_id = ?",
+                (dag_id, run_id)
+            ).fetchall()
+        return {(row['task_id'], row['try_number']) for row in rows}
+
+    def record(self, dag_id, run_id, task_id, try_number, occurred_at, signature):
+        """
+        记录一次任务尝试的解析结果
+
+        Args:
+            dag_id: DAG ID
+            run_id: DAG Run ID
+            task_id: 任务 ID
+            try_number: 尝试次数
+            occurred_at: DAG Run开始时间（UTC）
+            signature: extract_error_signature的返回值，日志中未找到错误时为None
+        """
+        processed_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        occurred_at = occurred_at.isoformat() if occurred_at else None
+        with self._lock:
+            if signature is not None:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO error_signature (signature, exception_type, message_template, top_frame) "
+                    "VALUES (?, ?, ?, ?)",
+                    (signature['signature'], signature['exception_type'], signature['message_template'],
+                     signature['top_frame'])
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO error_occurrence "
+                    "(dag_id, run_id, task_id, try_number, signature, occurred_at, message) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (dag_id, run_id, task_id, try_number, signature['signature'], occurred_at, signature['message'])
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO processed_try (dag_id, run_id, task_id, try_number, signature, processed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (dag_id, run_id, task_id, try_number, signature['signature'] if signature else None, processed_at)
+            )
+            self._conn.commit()
+
+    def get_signature_groups(self, since, dag_id=None, limit=50):
+        """
+        按错误签名分组统计失败次数
+
+        Args:
+            since: 起始时间（UTC），只统计DAG Run开始时间不早于该时间的失败
+            dag_id: 只统计指定DAG，默认为None表示全部
+            limit: 最多返回的签名数量
+
+        Returns:
+            groups: 按失败次数降序排列的签名统计列表
+        """
+        sql = """
+            SELECT s.signature, s.exception_type, s.message_template, s.top_frame,
+                   COUNT(*) AS occurrences,
+                   COUNT(DISTINCT o.dag_id || '/' || o.task_id) AS task_count,
+                   COUNT(DISTINCT o.dag_id || '/' || o.run_id) AS run_count,
+                   MIN(o.occurred_at) AS first_seen,
+                   MAX(o.occurred_at) AS last_seen,
+                   MAX(o.message) AS sample_message
+            FROM error_occurrence o
+            JOIN error_signature s ON s.signature = o.signature
+            WHERE o.occurred_at >= ?
+            """
+        params = [since.isoformat()]
+        if dag_id:
+            sql += " AND o.dag_id = ?"
+            params.append(dag_id)
+        sql += " GROUP BY s.signature ORDER BY occurrences DESC, last_seen DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_signature(self, signature):
+        """
+        查询单个错误签名
+
+        Returns:
+            signature: 签名信息字典，不存在时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT signature, exception_type, message_template, top_frame FROM error_signature WHERE signature = ?",
+                (signature,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_occurrences(self, signature, since, dag_id=None, limit=200):
+        """
+        查询某个错误签名的失败记录
+
+        Args:
+            signature: 错误签名
+            since: 起始时间（UTC）
+            dag_id: 只查询指定DAG，默认为None表示全部
+            limit: 最多返回的记录数
+
+        Returns:
+            occurrences: 按时间倒序排列的失败记录列表
+        """
+        sql = """
+            SELECT dag_id, run_id, task_id, try_number, occurred_at, message
+            FROM error_occurrence
+            WHERE signature = ? AND occurred_at >= ?
+            """
+        params = [signature, since.isoformat()]
+        if dag_id:
+            sql += " AND dag_id = ?"
+            params.append(dag_id)
+        sql += " ORDER BY occurred_at DESC, task_id ASC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def acquire_lease(self, owner, timeout, min_interval=0):
+        """
+        获取索引周期租约
+
+        Args:
+            owner: 租约持有者标识
+            timeout: 租约超时（秒），持有者异常退出未释放时超时后可被其他进程获取
+            min_interval: 距上次周期完成不足该秒数时不获取
+
+        Returns:
+            acquired: 是否获取成功
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO indexer_lease (name, owner, expires_at) VALUES ('error_indexer', ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE indexer_lease.expires_at < ? "
+                "AND (indexer_lease.last_cycle_at IS NULL OR indexer_lease.last_cycle_at <= ?)",
+                (owner, now + timeout, now, now - min_interval)
+            )
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def release_lease(self, owner):
+        """释放索引周期租约并记录周期完成时间"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE indexer_lease SET expires_at = 0, last_cycle_at = ? WHERE name = 'error_indexer' AND owner = ?",
+                (time.time(), owner)
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """
+        获取索引规模
+
+        Returns:
+            stats: 各表记录数
+        """
+        with self._lock:
+            return {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('error_signature', 'error_occurrence', 'processed_try', 'sealed_run')
+            }
+
+    def close(self):
+        """关闭SQLite连接"""
+        with self._lock:
+            self._conn.close()
+
+
+class ErrorIndexer:
+    """
+    后台增量索引失败任务日志
+
+    每个周期查询回溯窗口内有失败任务的DAG Run，对尚未解析的失败任务尝试获取日志并提取错误签名；
+    已结束且全部解析的DAG Run会被封存，之后的周期不再查询其任务；
+    每个周期先获取索引文件中的租约，多个进程共用同一索引时不会同时解析日志
+    """
+
+    def __init__(self, index, dag_ids, interval=300, lookback_days=7, max_logs_per_cycle=200,
+                 lease_timeout=1800, db_service=None, log_service=None):
+        self.index = index
+        self.dag_ids = dag_ids
+        self.interval = interval
+        self.lookback_days = lookback_days
+        self.max_logs_per_cycle = max_logs_per_cycle
+        self.lease_timeout = lease_timeout
+        self.db_service = db_service or DBService()
+        self.log_service = log_service or LogService()
+
+        self._run_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._stats = {
+            'cycles': 0,
+            'logs_parsed': 0,
+            'signatures_found': 0,
+            'log_errors': 0,
+            'last_cycle_at': None,
+            'last_cycle_seconds': None
+        }
+
+    def start(self):
+        """启动后台索引线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='error-indexer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台索引线程"""
+        self._stop_event.set()
+
+    def _run(self):
+        logger.info(f"启动错误签名索引线程: interval={self.interval}s, lookback_days={self.lookback_days}")
+        while not self._stop_event.is_set():
+            try:
+                # 其他进程在半个周期内已完成索引时跳过本周期
+                self.run_once(min_interval=self.interval / 2)
+            except Exception as e:
+                logger.error(f"错误签名索引失败: {e}")
+            self._stop_event.wait(self.interval)
+
+    def run_once(self, min_interval=0):
+        """
+        执行一个索引周期，同一时间（包括共用索引文件的多个进程之间）只有一个周期在执行
+
+        Args:
+            min_interval: 距任一进程上次完成周期不足该秒数时跳过
+
+        Returns:
+            parsed: 本周期解析的日志数量，已有周期在执行或跳过时返回None
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return None
+        try:
+            if not self.index.acquire_lease(self._owner, self.lease_timeout, min_interval):
+                return None
+            try:
+                return self._index_cycle()
+            finally:
+                self.index.release_lease(self._owner)
+        finally:
+            self._run_lock.release()
+
+    def _index_cycle(self):
+        started = datetime.datetime.now(datetime.timezone.utc)
+        summaries = self.db_service.get_dag_run_summaries(
+            self.dag_ids, started - datetime.timedelta(days=self.lookback_days), started)
+        if summaries is None:
+            logger.warning("错误签名索引：查询DAG Run统计失败，跳过本周期")
+            return 0
+
+        budget = self.max_logs_per_cycle
+        parsed = 0
+        for dag_id, run_summaries in summaries.items():
+            failed_runs = [summary for summary in run_summaries if summary['failed']]
+            sealed = self.index.get_sealed_runs(dag_id, [summary['dag_run_id'] for summary in failed_runs])
+            for summary in failed_runs:
+                if summary['dag_run_id'] in sealed or self._stop_event.is_set():
+                    continue
+                if parsed >= budget:
+                    break
+                parsed += self._index_run(summary, budget - parsed)
+
+        elapsed = (datetime.datetime.now(datetime.timezone.utc) - started).total_seconds()
+        self._stats['cycles'] += 1
+        self._stats['last_cycle_at'] = started.isoformat()
+        self._stats['last_cycle_seconds'] = round(elapsed, 3)
+        logger.info(f"错误签名索引周期完成: 解析日志 {parsed} 份, 耗时 {elapsed:.2f}s")
+        return parsed
+
+    def _index_run(self, summary, budget):
+        """解析一个DAG Run中尚未处理的失败任务尝试，返回解析的日志数量"""
+        dag_id = summary['dag_id']
+        run_id = summary['dag_run_id']
+        tasks = self.db_service.get_tasks_by_run_id(dag_id, run_id, TASK_STATES['failed_states'])
+        processed = self.index.get_processed_tries(dag_id, run_id)
+
+        parsed = 0
+        complete = True
+        for task in tasks:
+            # 失败任务的每次尝试都以失败结束（之前的尝试失败后才会重试）
+            for try_number in range(1, (task['try_number'] or 0) + 1):
+                if (task['task_id'], try_number) in processed:
+                    continue
+                if parsed >= budget:
+                    return parsed
+                log_content, error = self.log_service.get_task_log(dag_id, task['task_id'], run_id, try_number)
+                if error:
+                    # 日志暂不可用时不记录，下个周期重试
+                    self._stats['log_errors'] += 1
+                    complete = False
+                    continue
+                signature = extract_error_signature(log_content)
+                self.index.record(dag_id, run_id, task['task_id'], try_number,
+                                  summary['dag_run_start_date'], signature)
+                parsed += 1
+                self._stats['logs_parsed'] += 1
+                if signature:
+                    self._stats['signatures_found'] += 1
+
+        if complete and summary['dag_run_state'] in ERROR_INDEX_CONFIG['terminal_states']:
+            self.index.seal_run(dag_id, run_id)
+        return parsed
+
+    def stats(self):
+        """
+        获取索引线程状态和索引规模
+
+        Returns:
+            stats: 状态字典
+        """
+        return {
+            'dag_ids': self.dag_ids,
+            'interval': self.interval,
+            'lookback_days': self.lookback_days,
+            'running': bool(self._thread and self._thread.is_alive()),
+            **self._stats,
+            **self.index.stats()
+        }
+
+
+_indexer = None
+_indexer_lock = threading.Lock()
+
+
+def get_error_indexer():
+    """
+    获取进程内共享的错误签名索引器，首次调用时打开索引
+
+    Returns:
+        indexer: ErrorIndexer实例，未启用或打开失败时返回None
+    """
+    global _indexer
+    if not ERROR_INDEX_CONFIG['enabled']:
+        return None
+    if _indexer is None:
+        with _indexer_lock:
+            if _indexer is None:
+                try:
+                    index = ErrorSignatureIndex(ERROR_INDEX_CONFIG['path'])
+                except Exception as e:
+                    logger.error(f"打开错误签名索引失败: {e}")
+                    return None
+                _indexer = ErrorIndexer(
+                    index,
+                    MONITOR_DAG_ID,
+                    interval=ERROR_INDEX_CONFIG['interval'],
+                    lookback_days=ERROR_INDEX_CONFIG['lookback_days'],
+                    max_logs_per_cycle=ERROR_INDEX_CONFIG['max_logs_per_cycle'],
+                    lease_timeout=ERROR_INDEX_CONFIG['lease_timeout']
+                )
+    return _indexer
+
+
+def start_error_indexer():
+    """启动后台错误签名索引（未启用或本进程未开启后台索引时不执行任何操作）"""
+    if not ERROR_INDEX_CONFIG['run_indexer']:
+        logger.info("本进程未开启后台错误签名索引（ERROR_INDEX_RUN_INDEXER=False）")
+        return
+    indexer = get_error_indexer()
+    if indexer is not None:
+        indexer.start()
+
+
+def stop_error_indexer():
+    """停止后台错误签名索引并关闭索引"""
+    global _indexer
+    with _indexer_lock:
+        if _indexer is not None:
+            _indexer.stop()
+            _indexer.index.close()
+            _indexer = None
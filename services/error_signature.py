@@ -0,0 +1,121 @@
+import hashlib
+import os
+import re
+
+# Airflow任务日志行前缀，如 "[2024-05-01, 08:00:00 UTC] {taskinstance.py:2905} ERROR - "
+_LOG_PREFIX_RE = re.compile(r'^\[[^\]]*\]\s+\{[^}]*\}\s+[A-Z]+\s+-\s?')
+_TRACEBACK_HEADER = 'Traceback (most recent call last):'
+_FRAME_RE = re.compile(r'^\s*File "(?P<path>[^"]+)", line \d+, in (?P<func>\S+)')
+_EXCEPTION_RE = re.compile(r'^(?P<type>[A-Za-z_][\w.]*)(?::\s?(?P<message>.*))?$')
+_ERROR_LINE_RE = re.compile(r'\}\s+(?:ERROR|CRITICAL)\s+-\s+(?P<message>.+)$')
+
+# 消息模板归一化规则，按顺序替换可变部分
+_TEMPLATE_RULES = [
+    (re.compile(r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b'), '<uuid>'),
+    (re.compile(r'\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:[+-]\d{2}:?\d{2}|Z)?'), '<datetime>'),
+    (re.compile(r'\b\d{4}-\d{2}-\d{2}\b'), '<date>'),
+    (re.compile(r'\b0x[0-9a-fA-F]+\b'), '<hex>'),
+    (re.compile(r'"[^"]*"'), '"<str>"'),
+    (re.compile(r"'[^']*'"), "'<str>'"),
+    (re.compile(r'(?:/[\w.\-]+){2,}'), '<path>'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '<num>'),
+    (re.compile(r'\s+'), ' ')
+]
+_MAX_TEMPLATE_LENGTH = 300
+_MAX_MESSAGE_LENGTH = 1000
+
+
+def _strip_prefix(line):
+    return _LOG_PREFIX_RE.sub('', line.rstrip('\r'))
+
+
+def normalize_message(message):
+    """
+    将异常消息中的可变部分（数字、字符串字面量、路径、时间等）替换为占位符
+
+    Args:
+        message: 原始异常消息
+
+    Returns:
+        template: 归一化后的消息模板
+    """
+    template = message or ''
+    for pattern, replacement in _TEMPLATE_RULES:
+        template = pattern.sub(replacement, template)
+    return template.strip()[:_MAX_TEMPLATE_LENGTH]
+
+
+def _parse_last_traceback(lines):
+    """
+    解析日志中最后一个Python异常堆栈
+
+    Returns:
+        exception_type, message, top_frame: 未找到堆栈时返回None
+    """
+    start = None
+    for index in range(len(lines) - 1, -1, -1):
+        if lines[index].endswith(_TRACEBACK_HEADER):
+            start = index
+            break
+    if start is None:
+        return None
+
+    top_frame = None
+    for line in lines[start + 1:]:
+        frame = _FRAME_RE.match(line)
+        if frame:
+            top_frame = f"{os.path.basename(frame.group('path'))}:{frame.group('func')}"
+            continue
+        # 堆栈中缩进的源码行
+        if not line.strip() or line.startswith((' ', '\t')):
+            continue
+        exception = _EXCEPTION_RE.match(line.strip())
+        if exception:
+            return exception.group('type'), (exception.group('message') or '').strip(), top_frame
+        break
+    return None
+
+
+def extract_error_signature(log_text):
+    """
+    从任务日志中提取归一化的错误签名
+
+    优先使用最后一个Python异常堆栈（异常类型、消息模板、最内层调用帧）；
+    没有堆栈时使用最后一条ERROR级别日志的消息模板
+
+    Args:
+        log_text: 日志内容
+
+    Returns:
+        signature: 包含signature、exception_type、message_template、top_frame和message的字典，
+            未找到错误信息时返回None
+    """
+    if not log_text:
+        return None
+
+    lines = [_strip_prefix(line) for line in log_text.splitlines()]
+    parsed = _parse_last_traceback(lines)
+    if parsed:
+        exception_type, message, top_frame = parsed
+    else:
+        message = None
+        for line in reversed(log_text.splitlines()):
+            match = _ERROR_LINE_RE.search(line)
+            if match:
+                message = match.group('message').strip()
+                break
+        if message is None:
+            return None
+        exception_type, top_frame = 'ERROR', None
+
+    message_template = normalize_message(message)
+    digest = hashlib.sha1(
+        '\x1f'.join([exception_type, message_template, top_frame or '']).encode('utf-8')
+    ).hexdigest()[:16]
+    return {
+        'signature': digest,
+        'exception_type': exception_type,
+        'message_template': message_template,
+        'top_frame': top_frame,
+        'message': message[:_MAX_MESSAGE_LENGTH]
+    }
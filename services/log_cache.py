@@ -0,0 +1,266 @@
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from config import LOG_CACHE_CONFIG
+from utils import logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class _GzipCodec:
+    suffix = '.log.gz'
+
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=6)
+
+    def decompress(self, data):
+        return gzip.decompress(data)
+
+
+class _ZstdCodec:
+    suffix = '.log.zst'
+
+    def __init__(self):
+        self._level = 3
+
+    def compress(self, data):
+        # ZstdCompressor不是线程安全的，每次调用单独创建
+        return zstandard.ZstdCompressor(level=self._level).compress(data)
+
+    def decompress(self, data):
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _create_codec(name):
+    """
+    根据配置选择压缩算法，auto表示已安装zstandard时使用zstd，否则使用gzip
+    """
+    if name in ('auto', 'zstd') and zstandard is not None:
+        return _ZstdCodec()
+    if name == 'zstd':
+        logger.warning("未安装zstandard，日志缓存改用gzip压缩")
+    return _GzipCodec()
+
+
+class TaskLogCache:
+    """
+    已结束任务尝试的日志缓存，分为两级：
+
+    - 内存：按最近使用顺序淘汰的LRU，以未压缩字节数为上限
+    - 磁盘：每个日志一个压缩文件，以压缩后的总字节数为上限，按最近访问时间淘汰
+
+    日志按(dag_id, dag_run_id, task_id, try_number)缓存，调用方负责只写入内容不再变化的日志
+    """
+
+    def __init__(self, directory, memory_max_bytes, disk_max_bytes, max_entry_bytes, codec='auto'):
+        self.directory = directory
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.codec = _create_codec(codec)
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'skipped_too_large': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0
+        }
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self._load_disk_index()
+
+    def _load_disk_index(self):
+        """扫描缓存目录，按修改时间从旧到新建立磁盘索引"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.codec.suffix):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, name, stat.st_size))
+
+        for _, name, size in sorted(entries):
+            self._disk[name] = size
+            self._disk_bytes += size
+        logger.info(f"日志缓存目录: {self.directory}, 已有 {len(self._disk)} 个文件, 共 {self._disk_bytes} 字节")
+
+        with self._lock:
+            self._evict_disk_locked()
+
+    def _file_name(self, key):
+        digest = hashlib.sha1('\x1f'.join(str(part) for part in key).encode('utf-8')).hexdigest()
+        return digest + self.codec.suffix
+
+    def get(self, key):
+        """
+        读取缓存的日志
+
+        Args:
+            key: (dag_id, dag_run_id, task_id, try_number)元组
+
+        Returns:
+            content: 日志内容的UTF-8字节，未命中时返回None
+        """
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return data
+
+            name = self._file_name(key)
+            if name not in self._disk:
+                self._stats['misses'] += 1
+                return None
+            self._disk.move_to_end(name)
+
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, 'rb') as f:
+                data = self.codec.decompress(f.read())
+            # 更新修改时间，重启后仍按最近访问顺序淘汰
+            os.utime(path)
+        except Exception as e:
+            logger.warning(f"读取日志缓存文件失败: {path}, 错误={e}")
+            with self._lock:
+                self._discard_disk_locked(name)
+                self._stats['misses'] += 1
+            return None
+
+        with self._lock:
+            self._stats['disk_hits'] += 1
+            self._put_memory_locked(key, data)
+        return data
+
+    def put(self, key, data):
+        """
+        写入日志到内存和磁盘两级缓存
+
+        Args:
+            key: (dag_id, dag_run_id, task_id, try_number)元组
+            data: 日志内容的UTF-8字节
+        """
+        if len(data) > self.max_entry_bytes:
+            with self._lock:
+                self._stats['skipped_too_large'] += 1
+            logger.debug("日志超过缓存单条上限，不缓存: key=%s, 大小=%s", key, len(data))
+            return
+
+        name = self._file_name(key)
+        path = os.path.join(self.directory, name)
+        compressed = self.codec.compress(data)
+        # 先写临时文件再替换，避免并发读取到不完整的文件
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.warning(f"写入日志缓存文件失败: {path}, 错误={e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            compressed = None
+
+        with self._lock:
+            self._put_memory_locked(key, data)
+            if compressed is not None:
+                self._disk_bytes += len(compressed) - self._disk.pop(name, 0)
+                self._disk[name] = len(compressed)
+                self._evict_disk_locked()
+            self._stats['stores'] += 1
+        logger.debug("缓存日志: key=%s, 原始 %s 字节, 压缩后 %s 字节", key, len(data), len(compressed or b''))
+
+    def _put_memory_locked(self, key, data):
+        if len(data) > self.memory_max_bytes:
+            return
+        self._memory_bytes += len(data) - len(self._memory.pop(key, b''))
+        self._memory[key] = data
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._stats['memory_evictions'] += 1
+
+    def _evict_disk_locked(self):
+        while self._disk_bytes > self.disk_max_bytes and self._disk:
+            name = next(iter(self._disk))
+            self._discard_disk_locked(name)
+            self._stats['disk_evictions'] += 1
+
+    def _discard_disk_locked(self, name):
+        self._disk_bytes -= self._disk.pop(name, 0)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"删除日志缓存文件失败: {name}, 错误={e}")
+
+    def stats(self):
+        """
+        获取缓存状态
+
+        Returns:
+            stats: 包含两级缓存容量、占用和命中计数的字典
+        """
+        with self._lock:
+            hits = self._stats['memory_hits'] + self._stats['disk_hits']
+            lookups = hits + self._stats['misses']
+            return {
+                'codec': self.codec.suffix.rsplit('.', 1)[-1],
+                'directory': self.directory,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'memory_max_bytes': self.memory_max_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+                'disk_max_bytes': self.disk_max_bytes,
+                'hit_ratio': round(hits / lookups, 4) if lookups else None,
+                **self._stats
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_log_cache():
+    """
+    获取进程内共享的日志缓存，首次调用时创建
+
+    Returns:
+        cache: TaskLogCache实例，未启用或创建失败时返回None
+    """
+    global _cache
+    if not LOG_CACHE_CONFIG['enabled']:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = TaskLogCache(
+                        LOG_CACHE_CONFIG['directory'],
+                        memory_max_bytes=LOG_CACHE_CONFIG['memory_max_bytes'],
+                        disk_max_bytes=LOG_CACHE_CONFIG['disk_max_bytes'],
+                        max_entry_bytes=LOG_CACHE_CONFIG['max_entry_bytes'],
+                        codec=LOG_CACHE_CONFIG['codec']
+                    )
+                except Exception as e:
+                    logger.error(f"创建日志缓存失败: {e}")
+                    return None
+    return _cache
@@ -0,0 +1,264 @@
+import mmap
+import os
+import threading
+import zlib
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from config import LOG_READER_CONFIG
+from utils import logger
+
+# 刷新时校验的已索引内容末尾字节数，用于识别原地截断重写
+_CHECK_BLOCK_SIZE = 4096
+
+
+class IndexedLogFile:
+    """
+    内存映射的日志文件及其换行偏移索引
+
+    offsets[i]为第i行（从0开始）的起始字节偏移；文件以换行结尾时最后一个偏移等于文件大小。
+    文件追加内容后可从上次扫描位置继续建立索引，无需重新扫描整个文件；
+    是否仅为追加通过inode、大小、修改时间和已索引内容末尾数据块的校验和判断
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.inode = None
+        self.size = 0
+        self.mtime_ns = None
+        self.checksum = None
+        self.offsets = array('Q', [0])
+        self._mm = None
+        self._scanned = 0
+        # 读取与刷新互斥，避免读取过程中映射被替换
+        self.lock = threading.RLock()
+        self.refresh()
+
+    def _stat_key(self, stat):
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def is_current(self):
+        """文件大小和修改时间未变化时索引仍然有效"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return self._stat_key(stat) == (self.inode, self.size, self.mtime_ns)
+
+    def refresh(self):
+        """
+        根据文件当前状态更新映射和索引；同一文件仅追加时增量扫描，否则重建
+        """
+        stat = os.stat(self.path)
+        if not self._is_appended(stat):
+            self.offsets = array('Q', [0])
+            self._scanned = 0
+
+        self.close()
+        self.inode, self.size, self.mtime_ns = self._stat_key(stat)
+        if self.size:
+            with open(self.path, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), self.size, access=mmap.ACCESS_READ)
+        self._scan()
+        self.checksum = self._block_checksum(self._mm, self.size)
+
+    def _block_checksum(self, data, size):
+        """已索引内容末尾数据块的CRC32"""
+        if not size:
+            return 0
+        return zlib.crc32(data[max(0, size - _CHECK_BLOCK_SIZE):size])
+
+    def _is_appended(self, stat):
+        """
+        判断文件相对上次索引是否只在末尾追加了内容
+
+        inode相同、大小不变时修改时间也必须相同；变大时原有末尾数据块必须未变化，
+        否则视为截断后重写（即使重写后大小不小于原大小），需要重建索引
+        """
+        if self.inode is None or stat.st_ino != self.inode or stat.st_size < self.size:
+            return False
+        if stat.st_size == self.size:
+            return stat.st_mtime_ns == self.mtime_ns
+        start = max(0, self.size - _CHECK_BLOCK_SIZE)
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            block = f.read(self.size - start)
+        return len(block) == self.size - start and zlib.crc32(block) == self.checksum
+
+    def _scan(self):
+        mm = self._mm
+        if mm is None:
+            return
+        offsets = self.offsets
+        position = mm.find(b'\n', self._scanned)
+        while position != -1:
+            offsets.append(position + 1)
+            position = mm.find(b'\n', position + 1)
+        self._scanned = self.size
+
+    @property
+    def line_count(self):
+        count = len(self.offsets)
+        # 以换行结尾时最后一个偏移不是新的一行
+        if self.offsets[-1] >= self.size:
+            count -= 1
+        return count
+
+    def _line_end(self, line_no):
+        """第line_no行的结束偏移（不含换行符）"""
+        if line_no + 1 < len(self.offsets):
+            return self.offsets[line_no + 1] - 1
+        return self.size
+
+    def slice(self, start_line, end_line):
+        """
+        返回[start_line, end_line)行对应的字节视图（零拷贝）
+
+        Returns:
+            view: memoryview，行之间以换行分隔
+        """
+        end_line = min(end_line, self.line_count)
+        if self._mm is None or start_line >= end_line:
+            return memoryview(b'')
+        start = self.offsets[start_line]
+        end = self.offsets[end_line] if end_line < len(self.offsets) else self.size
+        return memoryview(self._mm)[start:end]
+
+    def line(self, line_no):
+        """返回第line_no行的字节视图（不含换行符）"""
+        return memoryview(self._mm)[self.offsets[line_no]:self._line_end(line_no)]
+
+    def find_lines(self, pattern, start_line=0, max_matches=None):
+        """
+        查找包含pattern的行，直接在映射上搜索后通过索引定位行号
+
+        Args:
+            pattern: 要查找的字节串
+            start_line: 开始查找的行号
+            max_matches: 最多返回的行数
+
+        Returns:
+            line_numbers: 匹配的行号列表
+            next_line: 达到max_matches时下一次查找的起始行号，否则为None
+        """
+        line_numbers = []
+        if self._mm is None or start_line >= self.line_count:
+            return line_numbers, None
+
+        position = self._mm.find(pattern, self.offsets[start_line])
+        while position != -1:
+            line_no = bisect_right(self.offsets, position) - 1
+            if max_matches is not None and len(line_numbers) >= max_matches:
+                return line_numbers, line_no
+            line_numbers.append(line_no)
+            # 跳到下一行开头继续查找，同一行只记录一次
+            if line_no + 1 >= len(self.offsets):
+                break
+            position = self._mm.find(pattern, self.offsets[line_no + 1])
+        return line_numbers, None
+
+    def close(self):
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # 仍有视图在使用，由垃圾回收在视图释放后关闭
+                pass
+            self._mm = None
+
+
+class MappedLogReader:
+    """
+    基于内存映射和换行索引的本地日志读取器
+
+    按文件路径缓存索引（LRU，数量有限），文件大小或修改时间变化时自动更新索引
+    """
+
+    def __init__(self, max_cached_files=16):
+        self.max_cached_files = max_cached_files
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, path):
+        """
+        获取文件的索引对象
+
+        Args:
+            path: 日志文件路径
+
+        Returns:
+            indexed: IndexedLogFile实例
+
+        Raises:
+            FileNotFoundError: 文件不存在
+        """
+        with self._lock:
+            indexed = self._files.get(path)
+            if indexed is not None:
+                self._files.move_to_end(path)
+                with indexed.lock:
+                    if not indexed.is_current():
+                        indexed.refresh()
+                        logger.debug("日志索引已更新: %s, 行数=%s", path, indexed.line_count)
+                return indexed
+
+            indexed = IndexedLogFile(path)
+            logger.debug("建立日志索引: %s, 行数=%s", path, indexed.line_count)
+            self._files[path] = indexed
+            while len(self._files) > self.max_cached_files:
+                _, evicted = self._files.popitem(last=False)
+                evicted.close()
+            return indexed
+
+    def read_lines(self, path, start_line, line_count):
+        """
+        读取指定行范围
+
+        Args:
+            path: 日志文件路径
+            start_line: 起始行号（从0开始），负数表示从末尾倒数
+            line_count: 行数
+
+        Returns:
+            content: 行内容的字节视图
+            start_line: 实际起始行号
+            total_lines: 文件总行数
+        """
+        indexed = self.open(path)
+        with indexed.lock:
+            total_lines = indexed.line_count
+            if start_line < 0:
+                start_line = max(0, total_lines + start_line)
+            return indexed.slice(start_line, start_line + line_count), start_line, total_lines
+
+    def tail(self, path, line_count):
+        """读取最后line_count行，返回值与read_lines相同"""
+        return self.read_lines(path, -line_count, line_count)
+
+    def filter_lines(self, path, pattern, start_line=0, max_matches=None):
+        """
+        读取包含pattern的行
+
+        Args:
+            path: 日志文件路径
+            pattern: 要匹配的字节串，如 b'ERROR'
+            start_line: 开始查找的行号
+            max_matches: 最多返回的行数
+
+        Returns:
+            matches: (行号, 行内容字节视图)列表
+            next_line: 还有更多匹配时下一次查找的起始行号，否则为None
+            total_lines: 文件总行数
+        """
+        indexed = self.open(path)
+        with indexed.lock:
+            line_numbers, next_line = indexed.find_lines(pattern, start_line, max_matches)
+            return [(line_no, indexed.line(line_no)) for line_no in line_numbers], next_line, indexed.line_count
+
+
+_reader = MappedLogReader(LOG_READER_CONFIG['max_cached_files'])
+
+
+def get_log_reader():
+    """获取进程内共享的本地日志读取器"""
+    return _reader
@@ -1,13 +1,98 @@
+import logging
 import os
-import requests
-import base64
-from config import LOG_DIRECTORY, AIRFLOW_API_CONFIG
-from utils import logger
+from collections import deque
+from config import LOG_DIRECTORY, AIRFLOW_API_CONFIG, LOG_STREAM_CONFIG, LOG_CACHE_CONFIG
+from services.airflow_client import CircuitOpenError, get_airflow_client
+from services.db_service import DBService
+from services.log_cache import get_log_cache
+from services.log_reader import get_log_reader
+from services.log_sources import get_local_log_source, get_remote_log_source
+from services.metrics import count_log_bytes, observe_log_bytes, timed
+from utils import logger, encode_opaque_token, decode_opaque_token, truncate_for_log
 
 class LogService:
     def __init__(self):
         self.log_directory = LOG_DIRECTORY
         self.airflow_api_config = AIRFLOW_API_CONFIG
+        self.log_cache = get_log_cache()
+        self.local_log_source = get_local_log_source()
+        self.remote_log_source = get_remote_log_source()
+        self._db_service = None
+    
+    @property
+    def db_service(self):
+        # 仅在需要判断任务状态时才创建，避免未启用日志缓存时占用连接池
+        if self._db_service is None:
+            self._db_service = DBService()
+        return self._db_service
+    
+    def _is_try_finished(self, dag_id, task_id, dag_run_id, try_number):
+        """
+        判断任务尝试是否已结束（日志不再变化）：早于当前尝试的历史尝试，或当前尝试处于终态
+        """
+        task = self.db_service.get_task_instance_state(dag_id, dag_run_id, task_id)
+        return self.is_finished_try(task, try_number)
+    
+    @staticmethod
+    def is_finished_try(task, try_number):
+        """
+        根据任务实例当前状态判断指定尝试是否已结束
+        
+        Args:
+            task: 包含raw_state和try_number的字典，可以为None
+            try_number: 尝试次数
+        """
+        if task is None or task['try_number'] is None:
+            return False
+        if try_number < task['try_number']:
+            return True
+        return try_number == task['try_number'] and task['raw_state'] in LOG_CACHE_CONFIG['terminal_states']
+    
+    @timed('log')
+    def get_cached_log(self, dag_id, task_id, dag_run_id, try_number=1):
+        """
+        从日志缓存读取已结束任务尝试的日志
+        
+        Returns:
+            content: 日志内容的UTF-8字节，未启用缓存或未命中时返回None
+        """
+        if self.log_cache is None:
+            return None
+        return self.log_cache.get((dag_id, dag_run_id, task_id, try_number))
+    
+    @timed('log')
+    def cache_log_if_finished(self, dag_id, task_id, dag_run_id, try_number, data):
+        """
+        任务尝试已结束时将日志写入缓存，运行中的尝试不缓存
+        
+        Args:
+            data: 日志内容的UTF-8字节
+        """
+        if self.log_cache is None or data is None:
+            return
+        if not self._is_try_finished(dag_id, task_id, dag_run_id, try_number):
+            logger.debug("任务尝试未结束，不缓存日志: dag_id=%s, task_id=%s, try_number=%s", dag_id, task_id, try_number)
+            return
+        self.log_cache.put((dag_id, dag_run_id, task_id, try_number), data)
+    
+    def _iter_and_cache(self, dag_id, task_id, dag_run_id, try_number, chunks, progress):
+        """透传字节块，完整读完且未超过缓存单条上限时写入日志缓存"""
+        if self.log_cache is None:
+            yield from chunks
+            return
+        
+        buffered = []
+        size = 0
+        for chunk in chunks:
+            if buffered is not None:
+                size += len(chunk)
+                if size <= self.log_cache.max_entry_bytes:
+                    buffered.append(chunk)
+                else:
+                    buffered = None
+            yield chunk
+        if buffered is not None and progress.get('complete'):
+            self.cache_log_if_finished(dag_id, task_id, dag_run_id, try_number, b''.join(buffered))
     
     def get_log_path(self, dag_id, task_id, dag_run_id, try_number=1):
         """
@@ -22,20 +107,54 @@ class LogService:
         Returns:
             log_path: 日志文件路径
         """
-        # 对于 task_id 中包含 task group 的情况（如 group1.task_a），要特殊处理路径
-        task_path = task_id.replace('.', '/')
+        return self.local_log_source.log_key(dag_id, task_id, dag_run_id, try_number)
+    
+    def _log_sources(self):
+        """Airflow API不可用时依次尝试的日志来源：本地文件，以及启用时的远程对象存储"""
+        if self.remote_log_source is None:
+            return [self.local_log_source]
+        return [self.local_log_source, self.remote_log_source]
+    
+    @timed('log')
+    def read_log_from_sources(self, dag_id, task_id, dag_run_id, try_number=1):
+        """
+        依次从本地文件和远程对象存储读取完整日志
         
-        # 构建日志路径
-        log_path = os.path.join(
-            self.log_directory,
-            dag_id,
-            task_path,
-            dag_run_id,
-            f"{try_number}.log"
-        )
+        Args:
+            dag_id: DAG ID
+            task_id: 任务 ID
+            dag_run_id: DAG Run ID
+            try_number: 尝试次数，默认为1
+            
+        Returns:
+            log_content: 日志内容
+            error: 错误信息（如果有）
+        """
+        locations = []
+        error_msg = None
+        for source in self._log_sources():
+            key = source.log_key(dag_id, task_id, dag_run_id, try_number)
+            location = source.describe(key)
+            locations.append(location)
+            try:
+                data = source.read_all(key)
+                log_content = data.decode('utf-8')
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                error_msg = f"读取日志文件时发生错误: {str(e)}"
+                logger.error(f"{error_msg}, 位置={location}")
+                continue
+            logger.info("成功获取日志: %s", location)
+            observe_log_bytes(source.name, len(data))
+            return log_content, None
         
-        return log_path
+        if error_msg is None:
+            error_msg = f"日志文件不存在: {', '.join(locations)}"
+            logger.error(error_msg)
+        return None, error_msg
     
+    @timed('log')
     def get_task_log(self, dag_id, task_id, dag_run_id, try_number=1):
         """
         获取任务的日志内容，优先通过Airflow API获取，如失败则尝试从本地文件读取
@@ -50,29 +169,30 @@ class LogService:
             log_content: 日志内容
             error: 错误信息（如果有）
         """
+        # 已结束的任务尝试优先使用缓存
+        cached = self.get_cached_log(dag_id, task_id, dag_run_id, try_number)
+        if cached is not None:
+            logger.info("从日志缓存获取日志: dag_id=%s, task_id=%s, run_id=%s, try_number=%s", dag_id, task_id, dag_run_id, try_number)
+            observe_log_bytes('cache', len(cached))
+            return cached.decode('utf-8', errors='replace'), None
+        
         # 首先尝试通过Airflow API获取日志
         log_content, error = self.fetch_airflow_log(dag_id, dag_run_id, task_id, try_number)
         if log_content is not None:
+            data = log_content.encode('utf-8')
+            observe_log_bytes('airflow_api', len(data))
+            self.cache_log_if_finished(dag_id, task_id, dag_run_id, try_number, data)
             return log_content, None
             
-        # 如果API获取失败，记录并尝试从本地文件读取
-        logger.warning(f"回退到本地文件系统获取日志: dag_id={dag_id}, task_id={task_id}, run_id={dag_run_id}, try_number={try_number}")
-        try:
-            log_path = self.get_log_path(dag_id, task_id, dag_run_id, try_number)
-            
-            with open(log_path, 'r', encoding='utf-8') as f:
-                log_content = f.read()
-                logger.info(f"成功从本地文件系统获取日志: {log_path}")
-                return log_content, None
-        except FileNotFoundError:
-            error_msg = f"日志文件不存在: {log_path}"
-            logger.error(error_msg)
-            return None, error_msg
-        except Exception as e:
-            error_msg = f"读取日志文件时发生错误: {str(e)}"
-            logger.error(error_msg)
-            return None, error_msg
+        # 如果API获取失败，记录并尝试从本地文件或远程对象存储读取
+        logger.warning(f"回退到本地/远程日志获取日志: dag_id={dag_id}, task_id={task_id}, run_id={dag_run_id}, try_number={try_number}")
+        log_content, error = self.read_log_from_sources(dag_id, task_id, dag_run_id, try_number)
+        if error:
+            return None, error
+        self.cache_log_if_finished(dag_id, task_id, dag_run_id, try_number, log_content.encode('utf-8'))
+        return log_content, None
             
+    @timed('log')
     def fetch_airflow_log(self, dag_id, run_id, task_id, try_number):
         """
         通过Airflow API获取任务日志
@@ -87,85 +207,532 @@ class LogService:
             log_content: 日志内容
             error: 错误信息（如果有）
         """
+        client = get_airflow_client()
+        url = f"{client.base_url}/dags/{dag_id}/dagRuns/{run_id}/taskInstances/{task_id}/logs/{try_number}"
+        logger.info("发送请求到Airflow REST API: URL=%s?full_content=true", url)
         try:
-            # 构建API URL
-            url = f"{self.airflow_api_config['base_url']}/dags/{dag_id}/dagRuns/{run_id}/taskInstances/{task_id}/logs/{try_number}"
-            
-            # 添加查询参数 - 一次获取全部内容
-            params = {"full_content": "true"}
-            
-            # 记录完整URL（包括参数）
-            query_string = "&".join([f"{k}={v}" for k, v in params.items()])
-            full_url = f"{url}?{query_string}" if query_string else url
-            logger.info(f"发送请求到Airflow REST API: URL={full_url}")
-            
-            # 构建认证信息
-            auth_str = f"{self.airflow_api_config['username']}:{self.airflow_api_config['password']}"
-            encoded_auth = base64.b64encode(auth_str.encode()).decode()
-            
-            # 设置请求头
-            headers = {
-                "Authorization": f"Basic {encoded_auth}",
-                "Accept": "application/json"
-            }
-            
-            # 发送请求
-            response = requests.get(url, params=params, headers=headers)
-            
-            # 记录响应状态和内容大小
-            logger.info(f"Airflow API响应状态: {response.status_code}, 内容大小: {len(response.text)} 字节")
-            
-            # 检查响应状态
-            if response.status_code == 200:
-                # 尝试解析JSON响应
-                try:
-                    data = response.json()
-                    
-                    # 记录原始响应数据以便调试
-                    logger.debug(f"Airflow API原始响应数据: {data}")
-                    
-                    # 提取日志内容
-                    log_content = None
-                    
-                    if isinstance(data, list) and len(data) > 0:
-                        # 打印更多调试信息
-                        logger.info(f"响应是数组类型，长度为 {len(data)}")
-                        if len(data) > 0:
-                            logger.info(f"第一个元素类型: {type(data[0]).__name__}")
-                            if isinstance(data[0], dict):
-                                logger.info(f"第一个元素字典键: {list(data[0].keys())}")
+            # 一次获取全部内容
+            response = client.get_task_log(dag_id, run_id, task_id, try_number, full_content=True)
+        except CircuitOpenError as e:
+            logger.warning(f"Airflow API熔断中，跳过请求: URL={url}")
+            return None, str(e)
+        except Exception as e:
+            error_msg = f"请求Airflow API时发生错误: {str(e)}"
+            logger.warning(f"访问Airflow REST API失败: URL={url}, 错误={str(e)}")
+            return None, error_msg
+        
+        # 记录响应状态和内容大小
+        logger.info("Airflow API响应状态: %s, 内容大小: %s 字节", response.status_code, len(response.content))
+        
+        # 检查响应状态
+        if response.status_code == 200:
+            # 尝试解析JSON响应
+            try:
+                data = response.json()
+                
+                # 记录原始响应数据以便调试
+                logger.debug("Airflow API原始响应数据: %s", truncate_for_log(data))
+                
+                # 提取日志内容
+                log_content = self._parse_airflow_log_content(data)
+                
+                return log_content, None
+                
+            except Exception as e:
+                logger.warning(f"解析Airflow API响应失败: {e}")
+                # 在解析失败时，尝试将原始响应返回给客户端
+                return response.text, None
+        else:
+            error_msg = f"获取日志失败: {response.status_code} - {response.text}"
+            logger.warning(f"通过Airflow REST API获取日志失败: URL={url}, 状态码={response.status_code}")
+            return None, error_msg
+    
+    def _parse_airflow_log_content(self, data):
+        """
+        从Airflow API返回的JSON数据中提取日志内容
+        
+        Args:
+            data: Airflow API返回的JSON数据
+            
+        Returns:
+            log_content: 日志内容
+        """
+        log_content = None
+        
+        if isinstance(data, list) and len(data) > 0:
+            # 打印更多调试信息
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("响应是数组类型，长度为 %s, 第一个元素类型: %s", len(data), type(data[0]).__name__)
+                if isinstance(data[0], dict):
+                    logger.debug("第一个元素字典键: %s", list(data[0].keys()))
 
-                        if isinstance(data[0], dict):
-                            log_content = data[0].get("content", "")
+            if isinstance(data[0], dict):
+                log_content = data[0].get("content", "")
+                
+                # 如果内容是元组字符串表示，需要特殊处理
+                if isinstance(log_content, str) and log_content.startswith("[('") and log_content.endswith("')]"):
+                    # 检查是否是空内容，如 "[('ubuntu', '')]"
+                    if "('')" in log_content or "(\"\")'" in log_content:
+                        logger.warning(f"收到空日志内容: {log_content}")
+                        if len(log_content.strip()) <= 15:  # 大约 "[('ubuntu', '')]" 的长度
+                            log_content = ""  # 返回真正的空字符串而不是格式化的空元组
                             
-                            # 如果内容是元组字符串表示，需要特殊处理
-                            if isinstance(log_content, str) and log_content.startswith("[('") and log_content.endswith("')]"):
-                                # 检查是否是空内容，如 "[('ubuntu', '')]"
-                                if "('')" in log_content or "(\"\")'" in log_content:
-                                    logger.warning(f"收到空日志内容: {log_content}")
-                                    if len(log_content.strip()) <= 15:  # 大约 "[('ubuntu', '')]" 的长度
-                                        log_content = ""  # 返回真正的空字符串而不是格式化的空元组
-                                        
-                    elif isinstance(data, dict):
-                        log_content = data.get("content", "")
-                    else:
-                        log_content = str(data)
-                    
-                    return log_content, None
-                    
-                except Exception as e:
-                    logger.warning(f"解析Airflow API响应失败: {e}")
-                    # 在解析失败时，尝试将原始响应返回给客户端
-                    return response.text, None
+        elif isinstance(data, dict):
+            log_content = data.get("content", "")
+        else:
+            log_content = str(data)
+        
+        return log_content
+    
+    @timed('log')
+    def fetch_airflow_log_page(self, dag_id, run_id, task_id, try_number, token=None):
+        """
+        通过Airflow API按continuation_token分页获取任务日志的一页
+        
+        Args:
+            dag_id: DAG ID
+            run_id: DAG Run ID
+            task_id: 任务 ID
+            try_number: 尝试次数
+            token: 上一页返回的continuation_token，默认为None表示第一页
+            
+        Returns:
+            content: 本页日志内容，失败时为None
+            next_token: 下一页的continuation_token，没有更多内容时为None
+            error: 错误信息（如果有）
+        """
+        client = get_airflow_client()
+        url = f"{client.base_url}/dags/{dag_id}/dagRuns/{run_id}/taskInstances/{task_id}/logs/{try_number}"
+        try:
+            response = client.get_task_log(dag_id, run_id, task_id, try_number, token=token)
+        except CircuitOpenError as e:
+            logger.warning(f"Airflow API熔断中，跳过请求: URL={url}")
+            return None, None, str(e)
+        except Exception as e:
+            logger.warning(f"访问Airflow REST API失败: URL={url}, 错误={str(e)}")
+            return None, None, f"请求Airflow API时发生错误: {str(e)}"
+        
+        if response.status_code != 200:
+            logger.warning(f"通过Airflow REST API获取日志失败: URL={url}, 状态码={response.status_code}")
+            return None, None, f"获取日志失败: {response.status_code}"
+        
+        try:
+            data = response.json()
+        except ValueError:
+            # 非JSON响应视为完整的纯文本日志
+            return response.text, None, None
+        
+        content = self._parse_airflow_log_content(data) or ""
+        next_token = data.get("continuation_token") if isinstance(data, dict) else None
+        logger.debug("Airflow API日志分页: URL=%s, 本页 %s 字符, 有下一页=%s", url, len(content), bool(next_token))
+        return content, next_token, None
+    
+    @timed('log')
+    def open_task_log_stream(self, dag_id, task_id, dag_run_id, try_number=1, offset=0, limit=None, tail_lines=None):
+        """
+        以流式方式获取任务日志，优先通过Airflow API分页获取，如失败则从本地文件读取
+        
+        返回前会先取得第一块内容，以便在日志不可用时直接返回错误；
+        之后按块产出UTF-8字节，内存占用与日志大小无关
+        
+        Args:
+            dag_id: DAG ID
+            task_id: 任务 ID
+            dag_run_id: DAG Run ID
+            try_number: 尝试次数，默认为1
+            offset: 跳过日志开头的字节数，默认为0
+            limit: 最多返回的字节数，默认为None表示不限制
+            tail_lines: 只返回最后N行，指定时忽略offset和limit
+            
+        Returns:
+            chunks: 日志内容（UTF-8字节块）的迭代器，失败时为None
+            error: 错误信息（如果有）
+        """
+        cached = self.get_cached_log(dag_id, task_id, dag_run_id, try_number)
+        if cached is not None:
+            logger.info("从日志缓存流式获取日志: dag_id=%s, task_id=%s, try_number=%s", dag_id, task_id, try_number)
+            if tail_lines:
+                return count_log_bytes('cache', self._tail_lines(iter([cached]), tail_lines)), None
+            return count_log_bytes('cache', self._slice_bytes(iter([cached]), offset, limit)), None
+        
+        content, token, error = self.fetch_airflow_log_page(dag_id, dag_run_id, task_id, try_number)
+        if content is not None:
+            progress = {}
+            chunks = self._iter_airflow_log_bytes(dag_id, dag_run_id, task_id, try_number, content, token, progress)
+            chunks = self._iter_and_cache(dag_id, task_id, dag_run_id, try_number, chunks, progress)
+            if tail_lines:
+                return count_log_bytes('airflow_api', self._tail_lines(chunks, tail_lines)), None
+            return count_log_bytes('airflow_api', self._slice_bytes(chunks, offset, limit)), None
+        
+        # 如果API获取失败，记录并尝试从本地文件或远程对象存储读取
+        locations = []
+        for source in self._log_sources():
+            key = source.log_key(dag_id, task_id, dag_run_id, try_number)
+            location = source.describe(key)
+            locations.append(location)
+            try:
+                size = source.stat(key)
+            except Exception as e:
+                logger.warning(f"获取日志大小失败: {location}, 错误={e}")
+                continue
+            if size is None:
+                continue
+            
+            logger.warning(f"回退到{location}流式读取日志, 大小={size}")
+            if tail_lines:
+                return count_log_bytes(source.name, iter([source.read_tail(key, tail_lines)])), None
+            return count_log_bytes(source.name, source.iter_range(key, offset, limit)), None
+        
+        error_msg = f"日志文件不存在: {', '.join(locations)}"
+        logger.error(error_msg)
+        return None, error_msg
+    
+    def _iter_airflow_log_bytes(self, dag_id, run_id, task_id, try_number, first_content, token, progress=None):
+        """
+        按continuation_token依次获取后续页面，产出UTF-8字节块
+        
+        progress字典（如果提供）的token键会更新为最后一个有效的continuation_token，
+        complete键表示是否已正常读到日志末尾（未因请求失败或页数上限而中断）
+        """
+        if progress is not None:
+            progress['complete'] = False
+        if first_content:
+            yield first_content.encode('utf-8')
+        
+        pages = 1
+        complete = True
+        while token:
+            if pages >= LOG_STREAM_CONFIG['max_pages']:
+                complete = False
+                break
+            content, next_token, error = self.fetch_airflow_log_page(dag_id, run_id, task_id, try_number, token)
+            if error:
+                complete = False
+                break
+            if not content:
+                break
+            pages += 1
+            if progress is not None:
+                progress['token'] = next_token or token
+            yield content.encode('utf-8')
+            # token未变化说明已无新内容
+            if next_token == token:
+                break
+            token = next_token
+        if progress is not None:
+            progress['complete'] = complete
+        logger.info("通过Airflow API流式获取日志完成: dag_id=%s, task_id=%s, 页数=%s", dag_id, task_id, pages)
+    
+    def _slice_bytes(self, chunks, offset=0, limit=None):
+        """从字节块流中跳过offset字节并最多产出limit字节"""
+        offset = max(0, offset or 0)
+        remaining = limit
+        for chunk in chunks:
+            if offset:
+                if len(chunk) <= offset:
+                    offset -= len(chunk)
+                    continue
+                chunk = chunk[offset:]
+                offset = 0
+            if remaining is not None:
+                if remaining <= 0:
+                    break
+                chunk = chunk[:remaining]
+                remaining -= len(chunk)
+            yield chunk
+    
+    def _tail_lines(self, chunks, line_count):
+        """只保留字节块流中最后line_count行，内存占用以行数为界"""
+        lines = deque(maxlen=line_count)
+        partial = b''
+        for chunk in chunks:
+            parts = (partial + chunk).split(b'\n')
+            partial = parts.pop()
+            lines.extend(parts)
+        if partial:
+            lines.append(partial)
+        if lines:
+            yield b'\n'.join(lines) + b'\n'
+    
+    def iter_log_matches(self, chunks, query, context_lines=0, case_sensitive=False):
+        """
+        在字节块流中逐行查找包含query的行，内存占用以上下文行数为界
+        
+        Args:
+            chunks: 日志内容（UTF-8字节块）的迭代器
+            query: 要查找的字符串
+            context_lines: 每个匹配前后附带的上下文行数
+            case_sensitive: 是否区分大小写，默认为False
+            
+        Yields:
+            match: 包含line（从1开始的行号）、text、before和after的字典，读到匹配行之后的上下文时产出
+        """
+        if case_sensitive:
+            needle = query.encode('utf-8')
+            is_match = lambda line: needle in line
+        elif query.isascii():
+            # bytes.lower只转换ASCII字母，对ASCII关键字无需解码整行
+            needle = query.lower().encode('utf-8')
+            is_match = lambda line: needle in line.lower()
+        else:
+            needle = query.casefold()
+            is_match = lambda line: needle in line.decode('utf-8', errors='replace').casefold()
+        
+        decode = lambda line: line.rstrip(b'\r').decode('utf-8', errors='replace')
+        before = deque(maxlen=context_lines) if context_lines else None
+        waiting = []
+        line_no = 0
+        partial = b''
+        
+        def process(line):
+            nonlocal waiting
+            ready = []
+            if waiting:
+                text = decode(line)
+                for match, remaining in waiting:
+                    match['after'].append(text)
+                waiting = [(match, remaining - 1) for match, remaining in waiting]
+                ready = [match for match, remaining in waiting if remaining == 0]
+                waiting = [(match, remaining) for match, remaining in waiting if remaining > 0]
+            if is_match(line):
+                match = {
+                    'line': line_no,
+                    'text': decode(line),
+                    'before': [decode(prev) for prev in before] if before is not None else [],
+                    'after': []
+                }
+                if context_lines:
+                    waiting.append((match, context_lines))
+                else:
+                    ready.append(match)
+            if before is not None:
+                before.append(line)
+            return ready
+        
+        for chunk in chunks:
+            parts = (partial + chunk).split(b'\n')
+            partial = parts.pop()
+            for line in parts:
+                line_no += 1
+                yield from process(line)
+        if partial:
+            line_no += 1
+            yield from process(partial)
+        # 日志结束时仍在等待后续上下文的匹配直接产出
+        for match, _ in waiting:
+            yield match
+    
+    def read_local_log_tail(self, log_path, line_count, end=None):
+        """
+        从文件末尾向前按块读取，获取本地日志文件的最后line_count行
+        
+        Args:
+            log_path: 日志文件路径
+            line_count: 行数
+            end: 视为文件末尾的字节偏移，默认为None表示实际文件末尾
+            
+        Returns:
+            content: 最后line_count行的字节内容
+        """
+        return self.local_log_source.read_tail(log_path, line_count, end)
+    
+    @timed('log')
+    def tail_task_log(self, dag_id, task_id, dag_run_id, try_number=1, token=None, initial_lines=None):
+        """
+        增量获取任务日志：返回令牌之后新增的日志内容及新的令牌
+        
+        本地文件的令牌记录inode和字节偏移，文件被替换或截断时从头读取并标记reset；
+        Airflow API的令牌为Airflow返回的continuation_token。
+        不带令牌调用时返回最后initial_lines行及指向当前末尾的令牌
+        
+        Args:
+            dag_id: DAG ID
+            task_id: 任务 ID
+            dag_run_id: DAG Run ID
+            try_number: 尝试次数，默认为1
+            token: 上次调用返回的令牌，默认为None
+            initial_lines: 不带令牌时返回的行数，默认使用配置值
+            
+        Returns:
+            result: 包含content、token、source和reset的字典，失败时为None
+            error: 错误信息（如果有）
+            
+        Raises:
+            ValueError: 令牌格式无效
+        """
+        if token is None:
+            return self._tail_initial(dag_id, task_id, dag_run_id, try_number,
+                                      initial_lines or LOG_STREAM_CONFIG['tail_initial_lines'])
+        
+        state = decode_opaque_token(token)
+        if state.get('source') == 'airflow':
+            if not isinstance(state.get('token'), (str, type(None))):
+                raise ValueError(f"无效的令牌: {token}")
+            return self._tail_airflow(dag_id, task_id, dag_run_id, try_number, state.get('token'))
+        if state.get('source') == 'local':
+            # 令牌由客户端传回，偏移必须是非负整数、inode必须是整数（bool是int的子类，单独排除）
+            inode = state.get('inode')
+            offset = state.get('offset', 0)
+            if (not isinstance(inode, int) or isinstance(inode, bool)
+                    or not isinstance(offset, int) or isinstance(offset, bool) or offset < 0):
+                raise ValueError(f"无效的令牌: {token}")
+            log_path = self.get_log_path(dag_id, task_id, dag_run_id, try_number)
+            return self._tail_local(log_path, inode, offset)
+        raise ValueError(f"无效的令牌: {token}")
+    
+    def _tail_initial(self, dag_id, task_id, dag_run_id, try_number, line_count):
+        """首次调用：返回最后line_count行及指向末尾的令牌"""
+        content, token, error = self.fetch_airflow_log_page(dag_id, dag_run_id, task_id, try_number)
+        if content is not None:
+            # 逐页读到末尾以获得最新的continuation_token，只保留最后line_count行
+            progress = {'token': token}
+            chunks = self._iter_airflow_log_bytes(dag_id, dag_run_id, task_id, try_number, content, token, progress)
+            tail = b''.join(self._tail_lines(chunks, line_count))
+            last_token = progress['token']
+            return {
+                'content': tail.decode('utf-8', errors='replace'),
+                'token': encode_opaque_token({'source': 'airflow', 'token': last_token}),
+                'source': 'airflow',
+                'reset': False
+            }, None
+        
+        log_path = self.get_log_path(dag_id, task_id, dag_run_id, try_number)
+        try:
+            stat = os.stat(log_path)
+        except FileNotFoundError:
+            error_msg = f"日志文件不存在: {log_path}"
+            logger.error(error_msg)
+            return None, error_msg
+        
+        tail = self.read_local_log_tail(log_path, line_count, end=stat.st_size)
+        return {
+            'content': tail.decode('utf-8', errors='replace'),
+            'token': encode_opaque_token({'source': 'local', 'inode': stat.st_ino, 'offset': stat.st_size}),
+            'source': 'local',
+            'reset': False
+        }, None
+    
+    def _tail_airflow(self, dag_id, task_id, dag_run_id, try_number, continuation_token):
+        """使用Airflow的continuation_token获取新增日志"""
+        content, next_token, error = self.fetch_airflow_log_page(
+            dag_id, dag_run_id, task_id, try_number, continuation_token)
+        if content is None:
+            return None, error
+        return {
+            'content': content,
+            'token': encode_opaque_token({'source': 'airflow', 'token': next_token or continuation_token}),
+            'source': 'airflow',
+            'reset': False
+        }, None
+    
+    def _tail_local(self, log_path, inode, offset):
+        """从本地文件的字节偏移处读取新增日志"""
+        try:
+            stat = os.stat(log_path)
+        except FileNotFoundError:
+            error_msg = f"日志文件不存在: {log_path}"
+            logger.error(error_msg)
+            return None, error_msg
+        
+        # 文件被替换或截断时从头读取
+        reset = stat.st_ino != inode or stat.st_size < offset
+        if reset:
+            logger.info("日志文件已被替换或截断，从头读取: %s", log_path)
+            offset = 0
+        
+        max_bytes = LOG_STREAM_CONFIG['tail_max_bytes']
+        data = b''
+        if stat.st_size > offset:
+            with open(log_path, 'rb') as f:
+                f.seek(offset)
+                data = f.read(min(max_bytes, stat.st_size - offset))
+            data = self._trim_partial_utf8(data)
+        
+        return {
+            'content': data.decode('utf-8', errors='replace'),
+            'token': encode_opaque_token({'source': 'local', 'inode': stat.st_ino, 'offset': offset + len(data)}),
+            'source': 'local',
+            'reset': reset
+        }, None
+    
+    def _trim_partial_utf8(self, data):
+        """去掉末尾不完整的UTF-8多字节字符，剩余字节留待下次读取"""
+        for back in range(1, min(4, len(data)) + 1):
+            byte = data[-back]
+            if byte & 0xC0 != 0x80:
+                # 找到字符起始字节，判断其后字节数是否完整
+                if byte >= 0xF0:
+                    expected = 4
+                elif byte >= 0xE0:
+                    expected = 3
+                elif byte >= 0xC0:
+                    expected = 2
+                else:
+                    expected = 1
+                return data if back >= expected else data[:-back]
+        return data
+    
+    @timed('log')
+    def read_local_log_lines(self, dag_id, task_id, dag_run_id, try_number=1, start_line=0, line_count=100,
+                             tail_lines=None, level=None):
+        """
+        按行读取本地日志文件，基于内存映射和缓存的换行索引，读取耗时与文件大小基本无关
+        
+        Args:
+            dag_id: DAG ID
+            task_id: 任务 ID
+            dag_run_id: DAG Run ID
+            try_number: 尝试次数，默认为1
+            start_line: 起始行号（从0开始）
+            line_count: 最多返回的行数
+            tail_lines: 只返回最后N行，指定时忽略start_line和line_count
+            level: 只返回包含该日志级别（如ERROR）的行
+            
+        Returns:
+            result: 包含lines、start_line、next_line和total_lines的字典，失败时为None
+            error: 错误信息（如果有）
+        """
+        log_path = self.get_log_path(dag_id, task_id, dag_run_id, try_number)
+        reader = get_log_reader()
+        try:
+            if level:
+                matches, next_line, total_lines = reader.filter_lines(
+                    log_path, level.upper().encode('utf-8'), start_line, line_count)
+                lines = [
+                    {'line': line_no, 'text': bytes(view).decode('utf-8', errors='replace')}
+                    for line_no, view in matches
+                ]
             else:
-                error_msg = f"获取日志失败: {response.status_code} - {response.text}"
-                logger.warning(f"通过Airflow REST API获取日志失败: URL={full_url}, 状态码={response.status_code}")
-                return None, error_msg
-                
+                if tail_lines:
+                    view, start_line, total_lines = reader.tail(log_path, tail_lines)
+                else:
+                    view, start_line, total_lines = reader.read_lines(log_path, start_line, line_count)
+                # 与换行索引一致只按b'\n'分行，进度输出中的\r等不作为行分隔；末尾换行后不是新的一行
+                texts = bytes(view).split(b'\n')
+                if texts[-1] == b'':
+                    texts.pop()
+                lines = [
+                    {'line': start_line + i, 'text': text.removesuffix(b'\r').decode('utf-8', errors='replace')}
+                    for i, text in enumerate(texts)
+                ]
+                end_line = start_line + len(lines)
+                next_line = end_line if end_line < total_lines else None
+        except FileNotFoundError:
+            error_msg = f"日志文件不存在: {log_path}"
+            logger.error(error_msg)
+            return None, error_msg
         except Exception as e:
-            error_msg = f"请求Airflow API时发生错误: {str(e)}"
-            logger.warning(f"访问Airflow REST API失败: URL={(url if 'url' in locals() else 'unknown') + (('?' + query_string) if 'query_string' in locals() else '')}, 错误={str(e)}")
+            error_msg = f"读取日志文件时发生错误: {str(e)}"
+            logger.error(error_msg)
             return None, error_msg
+        
+        logger.info("按行读取本地日志: %s, 返回 %s 行, 总行数=%s", log_path, len(lines), total_lines)
+        return {
+            'lines': lines,
+            'start_line': start_line,
+            'next_line': next_line,
+            'total_lines': total_lines
+        }, None
     
     def _extract_log_text(self, data):
         """
@@ -179,9 +746,7 @@ class LogService:
         """
         try:
             # 记录原始数据类型和部分内容以便调试
-            data_type = type(data).__name__
-            data_preview = str(data)[:500] + '...' if len(str(data)) > 500 else str(data)
-            logger.debug(f"从Airflow API获取的原始数据类型: {data_type}, 预览: {data_preview}")
+            logger.debug("从Airflow API获取的原始数据类型: %s, 预览: %s", type(data).__name__, truncate_for_log(data, 500))
             
             # 首先尝试直接返回完整响应（JSON格式），避免内容丢失
             import json
@@ -0,0 +1,380 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from config import LOG_DIRECTORY, LOG_STREAM_CONFIG, REMOTE_LOG_CONN, REMOTE_LOG_READ_CONFIG, USE_REMOTE_LOGS
+from services.worker_pool import get_worker_pool
+from utils import logger
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+
+
+class LogSource:
+    """
+    日志来源基类
+
+    子类实现log_key、stat和read_range，按块读取和读取末尾N行基于这两个操作实现；
+    key为log_key返回的来源内标识（本地为文件路径，对象存储为对象键）
+    """
+
+    # 来源名称，用于指标标签
+    name = None
+    # 按块读取时每次读取的字节数
+    block_size = 64 * 1024
+    # 从末尾向前读取时第一次读取的字节数，行数不足时逐次加倍，最大为block_size
+    tail_block_size = 64 * 1024
+
+    def log_key(self, dag_id, task_id, dag_run_id, try_number):
+        raise NotImplementedError
+
+    def describe(self, key):
+        """用于日志和错误信息的位置描述"""
+        return key
+
+    def stat(self, key):
+        """
+        获取日志大小
+
+        Returns:
+            size: 字节数，日志不存在时返回None
+        """
+        raise NotImplementedError
+
+    def read_range(self, key, start, end):
+        """读取[start, end)范围内的字节"""
+        raise NotImplementedError
+
+    def read_all(self, key):
+        """
+        读取完整日志
+
+        Raises:
+            FileNotFoundError: 日志不存在
+        """
+        size = self._require_size(key)
+        return self.read_range(key, 0, size) if size else b''
+
+    def iter_range(self, key, offset=0, limit=None):
+        """
+        按块读取日志
+
+        Args:
+            key: 日志标识
+            offset: 起始字节偏移，默认为0
+            limit: 最多读取的字节数，默认为None表示读到末尾
+
+        Yields:
+            chunk: 日志内容字节块
+        """
+        size = self._require_size(key)
+        end = size if limit is None else min(size, offset + limit)
+        position = offset
+        while position < end:
+            block_end = min(end, position + self.block_size)
+            yield self.read_range(key, position, block_end)
+            position = block_end
+
+    def read_tail(self, key, line_count, end=None):
+        """
+        从末尾向前按块读取，获取最后line_count行
+
+        Args:
+            key: 日志标识
+            line_count: 行数
+            end: 视为末尾的字节偏移，默认为None表示实际末尾
+
+        Returns:
+            content: 最后line_count行的字节内容
+        """
+        size = self._require_size(key)
+        position = size if end is None else min(end, size)
+        blocks = []
+        newlines = 0
+        read_size = min(self.tail_block_size, self.block_size)
+        # 末尾的换行不计入行数
+        while position > 0 and newlines <= line_count:
+            start = max(0, position - read_size)
+            block = self.read_range(key, start, position)
+            blocks.append(block)
+            newlines += block.count(b'\n')
+            position = start
+            read_size = min(read_size * 2, self.block_size)
+
+        data = b''.join(reversed(blocks))
+        lines = data.rstrip(b'\n').split(b'\n')
+        return b'\n'.join(lines[-line_count:]) + b'\n' if data else b''
+
+    def _require_size(self, key):
+        size = self.stat(key)
+        if size is None:
+            raise FileNotFoundError(self.describe(key))
+        return size
+
+
+class LocalFileLogSource(LogSource):
+    """本地文件系统中的Airflow日志（LOG_DIRECTORY）"""
+
+    name = 'local'
+
+    def __init__(self, directory, block_size=64 * 1024):
+        self.directory = directory
+        self.block_size = block_size
+
+    def log_key(self, dag_id, task_id, dag_run_id, try_number):
+        # 对于 task_id 中包含 task group 的情况（如 group1.task_a），要特殊处理路径
+        return os.path.join(self.directory, dag_id, task_id.replace('.', '/'), dag_run_id, f"{try_number}.log")
+
+    def stat(self, key):
+        try:
+            return os.stat(key).st_size
+        except FileNotFoundError:
+            return None
+
+    def read_range(self, key, start, end):
+        with open(key, 'rb') as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def read_all(self, key):
+        with open(key, 'rb') as f:
+            return f.read()
+
+    def iter_range(self, key, offset=0, limit=None):
+        # 整个读取过程只打开一次文件，文件追加的内容也会被读到
+        remaining = limit
+        with open(key, 'rb') as f:
+            if offset:
+                f.seek(offset)
+            while remaining is None or remaining > 0:
+                size = self.block_size if remaining is None else min(self.block_size, remaining)
+                chunk = f.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+
+class S3LogSource(LogSource):
+    """
+    S3兼容对象存储中的Airflow远程日志
+
+    - HEAD请求获取对象大小和ETag，结果按TTL缓存在进程内的LRU中
+    - 大于part_size的范围拆分为多个Range GET，在共享线程池中并行下载后按顺序拼接
+    - 范围请求带If-Match校验ETag，对象在读取过程中被覆盖时丢弃缓存的元数据并报错
+
+    通过endpoint_url可连接MinIO等本地S3兼容服务
+    """
+
+    name = 'remote'
+
+    def __init__(self, bucket, client, prefix='', key_template='{dag_id}/{task_path}/{dag_run_id}/{try_number}.log',
+                 part_size=1024 * 1024, max_workers=8, metadata_ttl=60, metadata_max_entries=10000):
+        self.bucket = bucket
+        self.client = client
+        self.prefix = prefix.strip('/')
+        self.key_template = key_template
+        self.part_size = part_size
+        self.max_workers = max_workers
+        # 每次按块读取的范围覆盖所有并行分片；读取末尾时从一个分片开始，避免为几行内容下载整块
+        self.block_size = part_size * max_workers
+        self.tail_block_size = part_size
+        self.metadata_ttl = metadata_ttl
+        self.metadata_max_entries = metadata_max_entries
+        self._metadata = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'head_requests': 0,
+            'metadata_hits': 0,
+            'range_requests': 0,
+            'bytes_read': 0
+        }
+
+    def log_key(self, dag_id, task_id, dag_run_id, try_number):
+        key = self.key_template.format(
+            dag_id=dag_id,
+            task_id=task_id,
+            task_path=task_id.replace('.', '/'),
+            dag_run_id=dag_run_id,
+            run_id=dag_run_id,
+            try_number=try_number
+        )
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def describe(self, key):
+        return f"s3://{self.bucket}/{key}"
+
+    def head(self, key):
+        """
+        获取对象元数据，优先使用未过期的缓存
+
+        Returns:
+            metadata: 包含size和etag的字典，对象不存在时返回None
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._metadata.get(key)
+            if entry is not None and now - entry[1] < self.metadata_ttl:
+                self._metadata.move_to_end(key)
+                self._stats['metadata_hits'] += 1
+                return entry[0]
+
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                self._forget(key)
+                return None
+            raise
+        finally:
+            with self._lock:
+                self._stats['head_requests'] += 1
+
+        metadata = {'size': response['ContentLength'], 'etag': response.get('ETag')}
+        with self._lock:
+            self._metadata[key] = (metadata, now)
+            self._metadata.move_to_end(key)
+            while len(self._metadata) > self.metadata_max_entries:
+                self._metadata.popitem(last=False)
+        return metadata
+
+    def _forget(self, key):
+        with self._lock:
+            self._metadata.pop(key, None)
+
+    def stat(self, key):
+        metadata = self.head(key)
+        return metadata['size'] if metadata else None
+
+    def _get_range(self, key, start, end, etag):
+        params = {'Bucket': self.bucket, 'Key': key, 'Range': f"bytes={start}-{end - 1}"}
+        if etag:
+            params['IfMatch'] = etag
+        try:
+            response = self.client.get_object(**params)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('412', 'PreconditionFailed'):
+                self._forget(key)
+            raise
+        body = response['Body']
+        try:
+            data = body.read()
+        finally:
+            body.close()
+        with self._lock:
+            self._stats['range_requests'] += 1
+            self._stats['bytes_read'] += len(data)
+        return data
+
+    def read_range(self, key, start, end):
+        if end <= start:
+            return b''
+        metadata = self.head(key)
+        if metadata is None:
+            raise FileNotFoundError(self.describe(key))
+        etag = metadata['etag']
+
+        if end - start <= self.part_size:
+            return self._get_range(key, start, end, etag)
+
+        parts = [(offset, min(end, offset + self.part_size)) for offset in range(start, end, self.part_size)]
+        executor = get_worker_pool('remote-log', self.max_workers)
+        futures = [executor.submit(self._get_range, key, part_start, part_end, etag)
+                   for part_start, part_end in parts]
+        try:
+            return b''.join(future.result() for future in futures)
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def stats(self):
+        """
+        获取读取统计
+
+        Returns:
+            stats: 请求计数、元数据缓存命中数和已读取字节数
+        """
+        with self._lock:
+            return {
+                'bucket': self.bucket,
+                'prefix': self.prefix,
+                'metadata_entries': len(self._metadata),
+                **self._stats
+            }
+
+
+_local_source = None
+_remote_source = None
+_source_lock = threading.Lock()
+
+
+def get_local_log_source():
+    """
+    获取进程内共享的本地日志来源
+
+    Returns:
+        source: LocalFileLogSource实例
+    """
+    global _local_source
+    if _local_source is None:
+        with _source_lock:
+            if _local_source is None:
+                _local_source = LocalFileLogSource(LOG_DIRECTORY, block_size=LOG_STREAM_CONFIG['chunk_size'])
+    return _local_source
+
+
+def get_remote_log_source():
+    """
+    获取进程内共享的远程日志来源，首次调用时创建
+
+    Returns:
+        source: S3LogSource实例，未启用远程日志或创建失败时返回None
+    """
+    global _remote_source
+    if not USE_REMOTE_LOGS:
+        return None
+    if _remote_source is None:
+        with _source_lock:
+            if _remote_source is None:
+                if REMOTE_LOG_CONN['provider'] != 's3':
+                    logger.error(f"不支持的远程日志类型: {REMOTE_LOG_CONN['provider']}")
+                    return None
+                if boto3 is None:
+                    logger.error("未安装boto3，无法读取S3远程日志")
+                    return None
+                try:
+                    client = boto3.client(
+                        's3',
+                        endpoint_url=REMOTE_LOG_CONN['endpoint_url'] or None,
+                        region_name=REMOTE_LOG_CONN['region'],
+                        aws_access_key_id=REMOTE_LOG_CONN['key'] or None,
+                        aws_secret_access_key=REMOTE_LOG_CONN['secret'] or None,
+                        config=BotoConfig(
+                            connect_timeout=REMOTE_LOG_READ_CONFIG['connect_timeout'],
+                            read_timeout=REMOTE_LOG_READ_CONFIG['read_timeout'],
+                            retries={'max_attempts': REMOTE_LOG_READ_CONFIG['retries'], 'mode': 'standard'},
+                            # 每个并行分片占用一个连接
+                            max_pool_connections=REMOTE_LOG_READ_CONFIG['max_workers'] * 2
+                        )
+                    )
+                    _remote_source = S3LogSource(
+                        REMOTE_LOG_CONN['bucket'],
+                        client,
+                        prefix=REMOTE_LOG_CONN['prefix'],
+                        key_template=REMOTE_LOG_CONN['key_template'],
+                        part_size=REMOTE_LOG_READ_CONFIG['part_size'],
+                        max_workers=REMOTE_LOG_READ_CONFIG['max_workers'],
+                        metadata_ttl=REMOTE_LOG_READ_CONFIG['metadata_ttl'],
+                        metadata_max_entries=REMOTE_LOG_READ_CONFIG['metadata_max_entries']
+                    )
+                    logger.info(f"创建S3远程日志来源: bucket={REMOTE_LOG_CONN['bucket']}, "
+                                f"endpoint_url={REMOTE_LOG_CONN['endpoint_url'] or '默认'}")
+                except Exception as e:
+                    logger.error(f"创建S3远程日志来源失败: {e}")
+                    return None
+    return _remote_source
@@ -0,0 +1,316 @@
+import functools
+import inspect
+import sys
+import time
+from config import METRICS_CONFIG, REQUEST_TIMING_CONFIG
+from services.request_timing import enter_span, exit_span, get_request_timings
+from utils import logger
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:
+    REGISTRY = None
+
+# 未安装prometheus_client或未启用时，所有埋点退化为空操作
+ENABLED = METRICS_CONFIG['enabled'] and REGISTRY is not None
+
+if ENABLED:
+    _buckets = METRICS_CONFIG['buckets']
+
+    HTTP_REQUESTS = Counter(
+        'monitor_http_requests_total', 'HTTP请求数',
+        ['endpoint', 'method', 'status'])
+    HTTP_LATENCY = Histogram(
+        'monitor_http_request_duration_seconds', 'HTTP请求耗时（到响应头返回为止）',
+        ['endpoint', 'method'], buckets=_buckets)
+    SERVICE_LATENCY = Histogram(
+        'monitor_service_call_duration_seconds', '服务方法调用耗时，生成器方法计到迭代结束',
+        ['service', 'method'], buckets=_buckets)
+    SERVICE_ERRORS = Counter(
+        'monitor_service_call_exceptions_total', '服务方法抛出的异常数',
+        ['service', 'method'])
+    DB_ROWS = Counter(
+        'monitor_db_rows_returned_total', '数据库查询返回的记录数',
+        ['method'])
+    LOG_BYTES = Counter(
+        'monitor_log_bytes_served_total', '返回给客户端的任务日志字节数',
+        ['source'])
+
+
+def _count_rows(result):
+    """
+    按返回结构估算记录数：列表取长度，元组及以集合为值的字典递归求和，单条记录（字典）计1
+    """
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple):
+        return sum(_count_rows(value) for value in result if isinstance(value, (list, tuple, dict)))
+    if isinstance(result, dict):
+        values = list(result.values())
+        if values and all(isinstance(value, (list, tuple, dict)) for value in values):
+            return sum(_count_rows(value) for value in values)
+        return 1
+    return 0
+
+
+def timed(service, rows=False):
+    """
+    记录服务方法耗时的装饰器，耗时同时计入Prometheus直方图和当前请求的Server-Timing
+
+    标签子对象在装饰时解析，每次调用只有两次perf_counter和一次observe；
+    生成器方法的耗时计到迭代结束（或生成器关闭）为止，协程方法（异步服务）计到await返回为止
+
+    Args:
+        service: 后端名称（db、neo4j、log），作为service标签和Server-Timing类别
+        rows: 是否按返回值累计monitor_db_rows_returned_total
+
+    Returns:
+        decorator: 方法装饰器，指标和请求计时均未启用时原样返回方法
+    """
+    def decorator(func):
+        if not ENABLED and not REQUEST_TIMING_CONFIG['enabled']:
+            return func
+
+        method = func.__name__
+        latency = SERVICE_LATENCY.labels(service, method) if ENABLED else None
+        errors = SERVICE_ERRORS.labels(service, method) if ENABLED else None
+        row_counter = DB_ROWS.labels(method) if ENABLED and rows else None
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                # 生成器可能在其他上下文中被迭代，只在结束时把耗时计入开始时所在的请求
+                timings = get_request_timings()
+                start = time.perf_counter()
+                count = 0
+                try:
+                    for item in func(*args, **kwargs):
+                        count += 1
+                        yield item
+                except Exception:
+                    if errors is not None:
+                        errors.inc()
+                    raise
+                finally:
+                    duration = time.perf_counter() - start
+                    if latency is not None:
+                        latency.observe(duration)
+                    if row_counter is not None:
+                        row_counter.inc(count)
+                    if timings is not None:
+                        timings.add(service, duration)
+            return generator_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def coroutine_wrapper(*args, **kwargs):
+                state = enter_span(service)
+                start = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception:
+                    if errors is not None:
+                        errors.inc()
+                    raise
+                finally:
+                    duration = time.perf_counter() - start
+                    if latency is not None:
+                        latency.observe(duration)
+                    exit_span(service, state, duration)
+                if row_counter is not None:
+                    row_counter.inc(_count_rows(result))
+                return result
+            return coroutine_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            state = enter_span(service)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                if errors is not None:
+                    errors.inc()
+                raise
+            finally:
+                duration = time.perf_counter() - start
+                if latency is not None:
+                    latency.observe(duration)
+                exit_span(service, state, duration)
+            if row_counter is not None:
+                row_counter.inc(_count_rows(result))
+            return result
+        return wrapper
+
+    return decorator
+
+
+def observe_log_bytes(source, size):
+    """
+    累计返回给客户端的日志字节数
+
+    Args:
+        source: 日志来源（cache、airflow_api、local、remote）
+        size: 字节数
+    """
+    if ENABLED and size:
+        LOG_BYTES.labels(source).inc(size)
+
+
+def count_log_bytes(source, chunks):
+    """透传字节块并累计日志字节数，迭代结束时一次性计数"""
+    if not ENABLED:
+        yield from chunks
+        return
+
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    finally:
+        LOG_BYTES.labels(source).inc(size)
+
+
+def observe_request(endpoint, method, status, duration):
+    """记录一次HTTP请求的状态码和耗时"""
+    if ENABLED:
+        HTTP_REQUESTS.labels(endpoint, method, status).inc()
+        HTTP_LATENCY.labels(endpoint, method).observe(duration)
+
+
+class _ServiceStateCollector:
+    """
+    抓取时读取各共享组件的stats()，导出连接池占用、缓存命中和熔断器状态
+
+    只读取已创建的单例，不会因为抓取指标而建立连接或创建缓存；
+    异步组件只在ASGI应用已导入对应模块时导出，抓取指标不会导入asyncpg、httpx
+    """
+
+    def collect(self):
+        for collect in (self._db_pool, self._async_db_pool, self._caches, self._airflow_client,
+                        self._async_airflow_client, self._log_pipeline):
+            try:
+                yield from collect()
+            except Exception as e:
+                logger.warning(f"采集指标失败: {collect.__name__}, 错误={e}")
+
+    def _db_pool(self):
+        from services import db_pool
+        pool = db_pool._pool
+        if pool is None:
+            return
+        stats = pool.stats()
+        gauge = GaugeMetricFamily('monitor_db_pool_connections', '数据库连接池连接数', labels=['state'])
+        for state in ('size', 'max_size', 'idle', 'in_use', 'waiting'):
+            gauge.add_metric([state], stats[state])
+        yield gauge
+        counter = CounterMetricFamily('monitor_db_pool_events', '数据库连接池累计事件数', labels=['event'])
+        for event in ('created', 'closed', 'checkouts', 'timeouts', 'health_check_failures'):
+            counter.add_metric([event], stats[event])
+        yield counter
+
+    def _async_db_pool(self):
+        async_db_service = sys.modules.get('services.async_db_service')
+        pool = async_db_service._pool if async_db_service else None
+        if pool is None:
+            return
+        size = pool.get_size()
+        idle = pool.get_idle_size()
+        gauge = GaugeMetricFamily('monitor_async_db_pool_connections', '异步数据库连接池（asyncpg）连接数',
+                                  labels=['state'])
+        gauge.add_metric(['size'], size)
+        gauge.add_metric(['min_size'], pool.get_min_size())
+        gauge.add_metric(['max_size'], pool.get_max_size())
+        gauge.add_metric(['idle'], idle)
+        gauge.add_metric(['in_use'], size - idle)
+        yield gauge
+
+    def _caches(self):
+        from services import log_cache, log_sources, neo4j_service, node_catalog
+        lookups = CounterMetricFamily('monitor_cache_lookups', '缓存查找次数', labels=['cache', 'result'])
+        ratio = GaugeMetricFamily('monitor_cache_hit_ratio', '进程启动以来的缓存命中率', labels=['cache'])
+
+        def add(cache, hits, misses, **other):
+            lookups.add_metric([cache, 'hit'], hits)
+            lookups.add_metric([cache, 'miss'], misses)
+            for result, value in other.items():
+                lookups.add_metric([cache, result], value)
+            total = hits + misses + sum(other.values())
+            if total:
+                ratio.add_metric([cache], (hits + sum(other.values())) / total)
+
+        stats = neo4j_service._unscheduled_cache.stats()
+        add('unscheduled', stats['hits'], stats['misses'], stale_hit=stats['stale_hits'])
+        if node_catalog._catalog is not None:
+            stats = node_catalog._catalog.stats()
+            add('node_catalog', stats['hits'], stats['misses'], negative_hit=stats['negative_hits'])
+        if log_cache._cache is not None:
+            stats = log_cache._cache.stats()
+            add('task_log', stats['memory_hits'], stats['misses'], disk_hit=stats['disk_hits'])
+            usage = GaugeMetricFamily('monitor_log_cache_bytes', '日志缓存占用字节数', labels=['tier'])
+            usage.add_metric(['memory'], stats['memory_bytes'])
+            usage.add_metric(['disk'], stats['disk_bytes'])
+            yield usage
+        if log_sources._remote_source is not None:
+            stats = log_sources._remote_source.stats()
+            add('remote_log_metadata', stats['metadata_hits'], stats['head_requests'])
+        yield lookups
+        yield ratio
+
+    def _airflow_client(self):
+        from services import airflow_client
+        client = airflow_client._client
+        if client is None:
+            return
+        stats = client.stats()
+        counter = CounterMetricFamily('monitor_airflow_api_requests', 'Airflow API请求数', labels=['result'])
+        counter.add_metric(['sent'], stats['requests'])
+        counter.add_metric(['error'], stats['errors'])
+        counter.add_metric(['server_error'], stats['server_errors'])
+        counter.add_metric(['rejected'], stats['circuit_breaker']['rejected'])
+        yield counter
+        gauge = GaugeMetricFamily('monitor_airflow_api_circuit_open', 'Airflow API熔断器是否打开（half_open计为0.5）')
+        gauge.add_metric([], {'closed': 0, 'half_open': 0.5, 'open': 1}[stats['circuit_breaker']['state']])
+        yield gauge
+
+    def _async_airflow_client(self):
+        async_log_service = sys.modules.get('services.async_log_service')
+        if async_log_service is None:
+            return
+        stats = async_log_service._breaker.stats()
+        counter = CounterMetricFamily('monitor_async_airflow_api_rejected', 'Airflow API异步客户端被熔断器拒绝的请求数')
+        counter.add_metric([], stats['rejected'])
+        yield counter
+        gauge = GaugeMetricFamily('monitor_async_airflow_api_circuit_open',
+                                  'Airflow API异步客户端熔断器是否打开（half_open计为0.5）')
+        gauge.add_metric([], {'closed': 0, 'half_open': 0.5, 'open': 1}[stats['state']])
+        yield gauge
+
+    def _log_pipeline(self):
+        from utils import get_log_pipeline_stats
+        counter = CounterMetricFamily('monitor_log_records_dropped', '日志队列已满时丢弃的日志条数', labels=['logger'])
+        gauge = GaugeMetricFamily('monitor_log_queue_depth', '日志队列中待输出的日志条数', labels=['logger'])
+        for name, stats in get_log_pipeline_stats().items():
+            counter.add_metric([name], stats['dropped'])
+            gauge.add_metric([name], stats['queued'])
+        yield counter
+        yield gauge
+
+
+if ENABLED:
+    REGISTRY.register(_ServiceStateCollector())
+
+
+def render_metrics():
+    """
+    生成Prometheus文本格式的指标
+
+    Returns:
+        body: 指标内容，未启用时为None
+        content_type: 响应的Content-Type
+    """
+    if not ENABLED:
+        return None, 'text/plain; charset=utf-8'
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,155 +1,209 @@
+import threading
 from neo4j import GraphDatabase
-from config import NEO4J_CONFIG
+from config import NEO4J_CONFIG, NEO4J_POOL_CONFIG, NODE_CATALOG_CONFIG, UNSCHEDULED_CACHE_CONFIG
+from services.metrics import timed
+from services.node_catalog import get_node_catalog
+from services.ttl_cache import StaleWhileRevalidateCache
 from utils import logger
 
-class Neo4jService:
-    def __init__(self):
-        self.driver = None
+_driver = None
+_driver_lock = threading.Lock()
+
+# 未调度数量与列表共用的缓存，数量可由列表长度直接得出
+_unscheduled_cache = StaleWhileRevalidateCache(
+    'neo4j-unscheduled',
+    ttl=UNSCHEDULED_CACHE_CONFIG['ttl'],
+    stale_ttl=UNSCHEDULED_CACHE_CONFIG['stale_ttl']
+)
+
+# 未调度关系数量与未调度DataResource结构节点数量（同步与异步服务共用）
+UNSCHEDULED_COUNT_QUERY = """
+    CALL {
+        MATCH (target)-[rel:DERIVED_FROM|ORIGINATES_FROM]->(source)
+        WHERE rel.schedule_status IS NOT NULL AND rel.schedule_status = false
+        RETURN COUNT(DISTINCT rel) AS rel_count
+    }
+    CALL {
+        MATCH (n:DataResource)
+        WHERE n.type = 'structure' 
+          AND n.schedule_status IS NOT NULL 
+          AND n.schedule_status = false
+        RETURN COUNT(DISTINCT n) AS node_count
+    }
+    RETURN rel_count, node_count
+"""
+
+# 未调度关系与DataResource Label且type:structure的未调度节点合并为一次查询
+UNSCHEDULED_LIST_QUERY = """
+    MATCH (target)-[rel:DERIVED_FROM|ORIGINATES_FROM]->(source)
+    WHERE rel.schedule_status IS NOT NULL AND rel.schedule_status = false
+    RETURN target.name as target_name, target.en_name as target_en_name,
+        rel.script_name as script_name,
+        rel.schedule_frequency as schedule_frequency
+    UNION ALL
+    MATCH (n:DataResource)
+    WHERE n.type = 'structure' 
+    AND n.schedule_status IS NOT NULL 
+    AND n.schedule_status = false
+    RETURN n.name as target_name, n.en_name as target_en_name,
+        COALESCE(n.script_name, 'load_file.py') as script_name,
+        n.schedule_frequency as schedule_frequency
+"""
+
+# 一次UNWIND查询解析多个英文名
+NODES_BY_EN_NAMES_QUERY = """
+    UNWIND $en_names AS en_name
+    MATCH (n)
+    WHERE n.en_name = en_name
+    RETURN en_name, head(collect(n.name)) AS cn_name
+"""
+
+def unscheduled_script_from_record(record):
+    """将未调度脚本查询的一条记录转换为API返回的结构"""
+    return {
+        "target_table": {
+            "name": record["target_name"],
+            "en_name": record["target_en_name"]
+        },
+        "script_name": record["script_name"],
+        "schedule_frequency": record["schedule_frequency"]
+    }
+
+def get_neo4j_driver():
+    """
+    获取进程内共享的Neo4j驱动，首次调用时创建
     
-    def connect(self):
-        """建立Neo4j数据库连接"""
-        try:
-            self.driver = GraphDatabase.driver(
-                NEO4J_CONFIG['uri'],
-                auth=(NEO4J_CONFIG['user'], NEO4J_CONFIG['password'])
-            )
-            return True
-        except Exception as e:
-            logger.error(f"Neo4j数据库连接失败: {e}")
-            return False
+    驱动内部维护Bolt连接池和路由表，每次查询只需从池中取出会话
+    
+    Returns:
+        driver: Neo4j驱动实例
+    """
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                _driver = GraphDatabase.driver(
+                    NEO4J_CONFIG['uri'],
+                    auth=(NEO4J_CONFIG['user'], NEO4J_CONFIG['password']),
+                    **NEO4J_POOL_CONFIG
+                )
+                logger.info("创建Neo4j驱动: uri=%s, max_connection_pool_size=%s", NEO4J_CONFIG['uri'], NEO4J_POOL_CONFIG['max_connection_pool_size'])
+    return _driver
+
+def close_neo4j_driver():
+    """关闭共享的Neo4j驱动，释放连接池"""
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            try:
+                _driver.close()
+                logger.info("Neo4j驱动已关闭")
+            except Exception as e:
+                logger.warning(f"关闭Neo4j驱动失败: {e}")
+            _driver = None
+
+class Neo4jService:
+    def __init__(self, driver=None):
+        self._driver = driver
     
-    def disconnect(self):
-        """关闭Neo4j数据库连接"""
-        if self.driver:
-            self.driver.close()
+    @property
+    def driver(self):
+        """当前使用的驱动，默认为进程内共享驱动"""
+        return self._driver or get_neo4j_driver()
     
+    @timed('neo4j')
     def get_unscheduled_count(self):
         """
         查询未调度节点的数量，包括：
         1. schedule_status=false的关系
         2. DataResource Label且type:structure的节点中schedule_status=false的节点
         
+        启用缓存时优先由已缓存的未调度列表长度得出，其次使用缓存的计数
+        
         Returns:
             count: 未调度节点的数量
         """
-        if not self.connect():
-            return 0
+        if not UNSCHEDULED_CACHE_CONFIG['enabled']:
+            count = self._query_unscheduled_count()
+            return count if count is not None else 0
         
+        scripts_list = _unscheduled_cache.get_if_present('unscheduled_list', self._query_unscheduled_list)
+        if scripts_list is not None:
+            return len(scripts_list)
+        
+        count = _unscheduled_cache.get('unscheduled_count', self._query_unscheduled_count)
+        return count if count is not None else 0
+
+    @timed('neo4j')
+    def get_unscheduled_list(self):
+        """
+        获取所有未调度脚本及其目标表信息
+        
+        Returns:
+            scripts_list: 包含未调度脚本及目标表信息的列表
+        """
+        if not UNSCHEDULED_CACHE_CONFIG['enabled']:
+            return self._query_unscheduled_list() or []
+        return _unscheduled_cache.get('unscheduled_list', self._query_unscheduled_list) or []
+
+    def get_unscheduled_cache_stats(self):
+        """获取未调度信息缓存状态"""
+        stats = _unscheduled_cache.stats()
+        stats['enabled'] = UNSCHEDULED_CACHE_CONFIG['enabled']
+        return stats
+
+    @timed('neo4j')
+    def _query_unscheduled_count(self):
+        """
+        在一次Cypher查询中统计未调度关系数量和未调度DataResource结构节点数量
+        
+        Returns:
+            count: 未调度节点的数量，查询失败时返回None
+        """
         try:
             with self.driver.session() as session:
-                logger.debug("执行Neo4j查询获取未调度关系数量")
-                
-                # 查询未调度关系数量
-                rel_result = session.run("""
-                    MATCH (target)-[rel:DERIVED_FROM|ORIGINATES_FROM]->(source)
-                    WHERE rel.schedule_status IS NOT NULL AND rel.schedule_status = false
-                    RETURN COUNT(DISTINCT rel) AS count
-                """)
-                
-                rel_count = 0
-                rel_record = rel_result.single()
-                if rel_record:
-                    rel_count = rel_record["count"]
-                    logger.info(f"未调度关系数量: {rel_count}")
+                logger.debug("执行Neo4j查询获取未调度关系及节点数量")
                 
-                # 查询DataResource Label且type:structure的未调度节点数量
-                node_result = session.run("""
-                    MATCH (n:DataResource)
-                    WHERE n.type = 'structure' 
-                      AND n.schedule_status IS NOT NULL 
-                      AND n.schedule_status = false
-                    RETURN COUNT(DISTINCT n) AS count
-                """)
+                result = session.run(UNSCHEDULED_COUNT_QUERY)
                 
-                node_count = 0
-                node_record = node_result.single()
-                if node_record:
-                    node_count = node_record["count"]
-                    logger.info(f"未调度DataResource结构节点数量: {node_count}")
+                record = result.single()
+                rel_count = record["rel_count"] if record else 0
+                node_count = record["node_count"] if record else 0
+                logger.info("未调度关系数量: %s, 未调度DataResource结构节点数量: %s", rel_count, node_count)
                 
                 # 合并结果
                 total_count = rel_count + node_count
-                logger.info(f"未调度总数量: {total_count}")
+                logger.info("未调度总数量: %s", total_count)
                 return total_count
                 
         except Exception as e:
             logger.error(f"查询Neo4j未调度节点数量失败: {e}")
-            return 0
-        finally:
-            self.disconnect()
+            return None
 
-    # 修改 services/neo4j_service.py 中的方法
-    def get_unscheduled_list(self):
+    @timed('neo4j')
+    def _query_unscheduled_list(self):
         """
-        获取所有未调度脚本及其目标表信息
+        在一次Cypher查询中获取未调度关系及未调度DataResource结构节点对应的脚本列表
         
         Returns:
-            scripts_list: 包含未调度脚本及目标表信息的列表
+            scripts_list: 包含未调度脚本及目标表信息的列表，查询失败时返回None
         """
-        if not self.connect():
-            return []
-        
         try:
             with self.driver.session() as session:
                 logger.debug("执行Neo4j查询获取未调度脚本列表")
                 
-                # 查询未调度关系列表，添加schedule_frequency属性
-                rel_result = session.run("""
-                    MATCH (target)-[rel:DERIVED_FROM|ORIGINATES_FROM]->(source)
-                    WHERE rel.schedule_status IS NOT NULL AND rel.schedule_status = false
-                    RETURN target.name as target_name, target.en_name as target_en_name,
-                        rel.script_name as script_name,
-                        rel.schedule_frequency as schedule_frequency
-                """)
-                
-                # 查询DataResource Label且type:structure的未调度节点列表，添加schedule_frequency属性
-                node_result = session.run("""
-                    MATCH (n:DataResource)
-                    WHERE n.type = 'structure' 
-                    AND n.schedule_status IS NOT NULL 
-                    AND n.schedule_status = false
-                    RETURN n.name as target_name, n.en_name as target_en_name,
-                        COALESCE(n.script_name, 'load_file.py') as script_name,
-                        n.schedule_frequency as schedule_frequency
-                """)
+                result = session.run(UNSCHEDULED_LIST_QUERY)
                 
-                # 合并结果
-                scripts_list = []
-                
-                # 处理关系结果
-                for record in rel_result:
-                    item = {
-                        "target_table": {
-                            "name": record["target_name"],
-                            "en_name": record["target_en_name"]
-                        },
-                        "script_name": record["script_name"],
-                        "schedule_frequency": record["schedule_frequency"]
-                    }
-                    scripts_list.append(item)
-                
-                # 处理节点结果
-                for record in node_result:
-                    item = {
-                        "target_table": {
-                            "name": record["target_name"],
-                            "en_name": record["target_en_name"]
-                        },
-                        "script_name": record["script_name"],
-                        "schedule_frequency": record["schedule_frequency"]
-                    }
-                    scripts_list.append(item)
+                scripts_list = [unscheduled_script_from_record(record) for record in result]
                 
-                logger.info(f"查询到 {len(scripts_list)} 条未调度脚本记录")
+                logger.info("查询到 %s 条未调度脚本记录", len(scripts_list))
                 return scripts_list
                 
         except Exception as e:
             logger.error(f"查询Neo4j未调度脚本列表失败: {e}")
-            return []
-        finally:
-            self.disconnect()
-
+            return None
 
+    @timed('neo4j')
     def get_cn_name_by_en_name(self, en_name):
         """
         根据英文名查询节点的中文名
@@ -160,12 +214,12 @@ class Neo4jService:
         Returns:
             cn_name: 节点的中文名称，如果未找到则返回None
         """
-        if not self.connect():
-            return None
+        if NODE_CATALOG_CONFIG['enabled']:
+            return get_node_catalog(self).lookup(en_name)[1]
         
         try:
             with self.driver.session() as session:
-                logger.debug(f"执行Neo4j查询获取节点中文名，英文名: {en_name}")
+                logger.debug("执行Neo4j查询获取节点中文名，英文名: %s", en_name)
                 result = session.run("""
                     MATCH (n)
                     WHERE n.en_name = $en_name
@@ -176,16 +230,15 @@ class Neo4jService:
                 record = result.single()
                 if record:
                     cn_name = record["cn_name"]
-                    logger.info(f"找到节点中文名: {cn_name}")
+                    logger.info("找到节点中文名: %s", cn_name)
                     return cn_name
-                logger.info(f"未找到英文名为 {en_name} 的节点")
+                logger.info("未找到英文名为 %s 的节点", en_name)
                 return None
         except Exception as e:
             logger.error(f"查询Neo4j节点中文名失败: {e}")
             return None
-        finally:
-            self.disconnect()
 
+    @timed('neo4j')
     def check_node_by_en_name(self, en_name):
         """
         根据英文名查询节点是否存在及其中文名
@@ -197,12 +250,12 @@ class Neo4jService:
             exists: 节点是否存在
             cn_name: 节点的中文名称，如果未找到或为空则返回None
         """
-        if not self.connect():
-            return False, None
+        if NODE_CATALOG_CONFIG['enabled']:
+            return get_node_catalog(self).lookup(en_name)
         
         try:
             with self.driver.session() as session:
-                logger.debug(f"执行Neo4j查询检查节点，英文名: {en_name}")
+                logger.debug("执行Neo4j查询检查节点，英文名: %s", en_name)
                 result = session.run("""
                     MATCH (n)
                     WHERE n.en_name = $en_name
@@ -212,14 +265,107 @@ class Neo4jService:
                 # 获取结果
                 record = result.single()
                 if record:
-                    logger.info(f"找到英文名为 {en_name} 的节点")
+                    logger.info("找到英文名为 %s 的节点", en_name)
                     cn_name = record["cn_name"]  # 可能为None
                     return True, cn_name
                 
-                logger.info(f"未找到英文名为 {en_name} 的节点")
+                logger.info("未找到英文名为 %s 的节点", en_name)
                 return False, None
         except Exception as e:
             logger.error(f"查询Neo4j节点信息失败: {e}")
             return False, None
-        finally:
-            self.disconnect() 
\ No newline at end of file
+
+    @timed('neo4j')
+    def check_nodes_by_en_names(self, en_names):
+        """
+        批量查询节点是否存在及其中文名，启用节点目录缓存时直接从缓存读取
+        
+        Args:
+            en_names: 节点英文名称列表
+            
+        Returns:
+            nodes: 以英文名为键、(exists, cn_name)为值的字典
+        """
+        if NODE_CATALOG_CONFIG['enabled']:
+            return get_node_catalog(self).lookup_many(en_names)
+        nodes = self.query_nodes_by_en_names(en_names)
+        if nodes is None:
+            # 查询失败时所有英文名均视为不存在
+            return {name: (False, None) for name in en_names if name}
+        return nodes
+
+    @timed('neo4j')
+    def query_nodes_by_en_names(self, en_names):
+        """
+        直接查询Neo4j（不经过缓存），一次UNWIND查询完成所有英文名的解析
+        
+        Args:
+            en_names: 节点英文名称列表
+            
+        Returns:
+            nodes: 以英文名为键、(exists, cn_name)为值的字典，查询失败时返回None
+        """
+        unique_names = list(dict.fromkeys(name for name in en_names if name))
+        nodes = {name: (False, None) for name in unique_names}
+        if not unique_names:
+            return nodes
+        
+        try:
+            with self.driver.session() as session:
+                logger.debug("执行Neo4j批量查询检查节点，英文名数量: %s", len(unique_names))
+                result = session.run(NODES_BY_EN_NAMES_QUERY, en_names=unique_names)
+                
+                for record in result:
+                    nodes[record["en_name"]] = (True, record["cn_name"])
+                
+                found = sum(1 for exists, _ in nodes.values() if exists)
+                logger.info("批量查询节点完成: 请求 %s 个，找到 %s 个", len(unique_names), found)
+                return nodes
+        except Exception as e:
+            logger.error(f"批量查询Neo4j节点信息失败: {e}")
+            return None
+
+    @timed('neo4j')
+    def load_node_catalog(self, limit):
+        """
+        批量加载所有节点的英文名和中文名，用于构建节点目录缓存
+        
+        Args:
+            limit: 最多加载的条目数
+            
+        Returns:
+            catalog: 以英文名为键、中文名为值的字典，查询失败时返回None
+        """
+        try:
+            with self.driver.session() as session:
+                logger.debug("执行Neo4j查询加载节点目录")
+                result = session.run("""
+                    MATCH (n)
+                    WHERE n.en_name IS NOT NULL
+                    RETURN n.en_name AS en_name, head(collect(n.name)) AS cn_name
+                    LIMIT $limit
+                """, limit=limit)
+                
+                catalog = {record["en_name"]: record["cn_name"] for record in result}
+                logger.info("加载节点目录 %s 条", len(catalog))
+                return catalog
+        except Exception as e:
+            logger.error(f"加载Neo4j节点目录失败: {e}")
+            return None
+
+    def invalidate_node_catalog(self):
+        """
+        失效并重新加载节点目录缓存
+        
+        Returns:
+            stats: 重新加载后的缓存状态
+        """
+        catalog = get_node_catalog(self)
+        catalog.invalidate()
+        return catalog.stats()
+
+    def get_node_catalog_stats(self):
+        """获取节点目录缓存状态"""
+        stats = get_node_catalog(self).stats()
+        stats['enabled'] = NODE_CATALOG_CONFIG['enabled']
+        return stats
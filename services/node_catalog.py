@@ -0,0 +1,233 @@
+import threading
+import time
+from collections import OrderedDict
+from config import NODE_CATALOG_CONFIG
+from utils import logger
+
+
+class NodeCatalogCache:
+    """
+    Neo4j节点 en_name -> cn_name 的进程内目录缓存
+
+    - 启动时批量加载全部en_name/name对，之后由后台线程按refresh_interval定期刷新
+    - 查询直接读取字典，刷新时整体替换字典引用，读路径无需加锁
+    - 目录被max_entries截断时，未命中的英文名回源Neo4j批量查询
+    - 不存在的英文名以negative_ttl为有效期缓存，避免重复回源
+    """
+
+    def __init__(self, neo4j_service, refresh_interval=300, negative_ttl=60, max_entries=100000):
+        self.neo4j_service = neo4j_service
+        self.refresh_interval = refresh_interval
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self._entries = {}
+        self._negative = OrderedDict()
+        self._complete = False
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresh_thread = None
+        self._stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_failures': 0
+        }
+
+    def _ensure_loaded(self):
+        """首次使用时同步加载目录并启动后台刷新线程"""
+        if self._loaded_at is not None:
+            return
+        with self._load_lock:
+            if self._loaded_at is None:
+                self.refresh()
+                self.start()
+
+    def refresh(self):
+        """
+        从Neo4j重新加载完整目录，成功后替换当前字典并清空负缓存
+
+        Returns:
+            success: 是否加载成功
+        """
+        started = time.monotonic()
+        entries = self.neo4j_service.load_node_catalog(self.max_entries + 1)
+        if entries is None:
+            with self._lock:
+                self._stats['refresh_failures'] += 1
+                # 加载失败时也记录时间，避免每次请求都同步重试；目录保持旧数据
+                if self._loaded_at is None:
+                    self._loaded_at = time.time()
+            return False
+
+        complete = len(entries) <= self.max_entries
+        if not complete:
+            entries = dict(list(entries.items())[:self.max_entries])
+
+        with self._lock:
+            self._entries = entries
+            self._negative = OrderedDict()
+            self._complete = complete
+            self._loaded_at = time.time()
+            self._stats['refreshes'] += 1
+
+        logger.info(f"节点目录缓存刷新完成: {len(entries)} 条, 完整={complete}, 耗时 {time.monotonic() - started:.3f}s")
+        return True
+
+    def _refresh_loop(self):
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"节点目录缓存后台刷新失败: {e}")
+
+    def start(self):
+        """启动后台刷新线程"""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, name='node-catalog-refresh', daemon=True)
+        self._refresh_thread.start()
+
+    def stop(self):
+        """停止后台刷新线程"""
+        self._stop_event.set()
+
+    def invalidate(self):
+        """
+        手动失效目录缓存并立即重新加载
+
+        Returns:
+            success: 是否重新加载成功
+        """
+        with self._lock:
+            self._negative = OrderedDict()
+        logger.info("手动失效节点目录缓存")
+        success = self.refresh()
+        self.start()
+        return success
+
+    def lookup(self, en_name):
+        """
+        查询单个英文名
+
+        Args:
+            en_name: 节点的英文名称
+
+        Returns:
+            exists: 节点是否存在
+            cn_name: 节点的中文名称，如果未找到或为空则返回None
+        """
+        return self.lookup_many([en_name]).get(en_name, (False, None))
+
+    def lookup_many(self, en_names):
+        """
+        批量查询英文名，未命中部分合并为一次Neo4j回源查询
+
+        Args:
+            en_names: 节点英文名称列表
+
+        Returns:
+            nodes: 以英文名为键、(exists, cn_name)为值的字典
+        """
+        self._ensure_loaded()
+        entries = self._entries
+        now = time.monotonic()
+        nodes = {}
+        missing = []
+
+        for en_name in en_names:
+            if not en_name or en_name in nodes:
+                continue
+            if en_name in entries:
+                nodes[en_name] = (True, entries[en_name])
+                self._stats['hits'] += 1
+                continue
+            expires_at = self._negative.get(en_name)
+            if expires_at is not None and expires_at > now:
+                nodes[en_name] = (False, None)
+                self._stats['negative_hits'] += 1
+                continue
+            missing.append(en_name)
+
+        if not missing:
+            return nodes
+
+        self._stats['misses'] += len(missing)
+        if self._complete:
+            # 目录完整时未命中即为不存在，无需回源
+            resolved = {en_name: (False, None) for en_name in missing}
+        else:
+            resolved = self.neo4j_service.query_nodes_by_en_names(missing)
+            if resolved is None:
+                # 查询失败时本次视为不存在，但不写入负缓存，避免Neo4j短暂故障后在negative_ttl内持续隐藏任务
+                nodes.update((en_name, (False, None)) for en_name in missing)
+                return nodes
+
+        with self._lock:
+            for en_name, (exists, cn_name) in resolved.items():
+                if exists:
+                    if len(self._entries) < self.max_entries:
+                        self._entries[en_name] = cn_name
+                else:
+                    self._negative[en_name] = now + self.negative_ttl
+                    self._negative.move_to_end(en_name)
+                    while len(self._negative) > self.max_entries:
+                        self._negative.popitem(last=False)
+
+        nodes.update(resolved)
+        return nodes
+
+    def stats(self):
+        """
+        获取目录缓存状态
+
+        Returns:
+            stats: 包含条目数、负缓存条目数、命中计数的字典
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'negative_entries': len(self._negative),
+                'complete': self._complete,
+                'loaded_at': self._loaded_at,
+                'refresh_interval': self.refresh_interval,
+                'max_entries': self.max_entries,
+                **self._stats
+            }
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_node_catalog(neo4j_service):
+    """
+    获取进程内共享的节点目录缓存，首次调用时使用传入的服务创建
+
+    Args:
+        neo4j_service: 用于加载目录和回源查询的Neo4jService实例
+
+    Returns:
+        catalog: NodeCatalogCache实例
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = NodeCatalogCache(
+                    neo4j_service,
+                    refresh_interval=NODE_CATALOG_CONFIG['refresh_interval'],
+                    negative_ttl=NODE_CATALOG_CONFIG['negative_ttl'],
+                    max_entries=NODE_CATALOG_CONFIG['max_entries']
+                )
+    return _catalog
+
+
+def stop_node_catalog():
+    """停止共享目录缓存的后台刷新"""
+    if _catalog is not None:
+        _catalog.stop()
@@ -0,0 +1,175 @@
+import contextvars
+import cProfile
+import functools
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from config import REQUEST_TIMING_CONFIG
+
+# 当前请求的耗时记录，请求之外为None
+_current = contextvars.ContextVar('request_timings', default=None)
+# 当前调用链中已在计时的类别，嵌套的同类调用（如服务方法互相调用）只计最外层
+_active = contextvars.ContextVar('request_timing_active', default=frozenset())
+
+# cProfile同一时刻只能有一个实例处于启用状态（Python 3.12起为进程级），用锁保证只分析一个请求
+_profile_lock = threading.Lock()
+
+
+class RequestTimings:
+    """
+    单个请求内按类别累计的耗时
+
+    工作线程中的调用通过contextvars.copy_context共享同一个实例，累计时加锁
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def add(self, category, duration):
+        with self._lock:
+            total, count = self._spans.get(category, (0.0, 0))
+            self._spans[category] = (total + duration, count + 1)
+
+    def server_timing_header(self):
+        """
+        生成Server-Timing响应头
+
+        Returns:
+            header: 如 db;dur=12.3;desc="calls=2", total;dur=45.6（响应头只能使用ASCII）
+        """
+        with self._lock:
+            spans = sorted(self._spans.items())
+        parts = [f'{category};dur={total * 1000:.1f};desc="calls={count}"' for category, (total, count) in spans]
+        parts.append(f'total;dur={(time.perf_counter() - self.started_at) * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def start_request_timing():
+    """
+    开始记录当前请求的耗时
+
+    Returns:
+        timings: RequestTimings实例，未启用时返回None
+    """
+    if not REQUEST_TIMING_CONFIG['enabled']:
+        return None
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def end_request_timing():
+    """结束当前请求的耗时记录，避免线程复用时记录到下一个请求"""
+    _current.set(None)
+
+
+def get_request_timings():
+    """获取当前请求的耗时记录，请求之外返回None"""
+    return _current.get()
+
+
+def enter_span(category):
+    """
+    开始计时category类别，与exit_span成对使用（供装饰器等热点路径避免上下文管理器开销）
+
+    Returns:
+        state: 传给exit_span的状态，不在请求中或外层已在计同一类别时为None
+    """
+    timings = _current.get()
+    if timings is None:
+        return None
+    active = _active.get()
+    if category in active:
+        return None
+    return timings, _active.set(active | {category})
+
+
+def exit_span(category, state, duration):
+    """结束enter_span开始的计时，累计duration秒"""
+    if state is None:
+        return
+    timings, token = state
+    timings.add(category, duration)
+    _active.reset(token)
+
+
+@contextmanager
+def span(category):
+    """
+    将代码块的耗时累计到当前请求的category类别
+
+    不在请求中或外层已在计同一类别时不重复计时
+    """
+    state = enter_span(category)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        exit_span(category, state, time.perf_counter() - start)
+
+
+def timed_span(category):
+    """span的装饰器形式"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_profile():
+    """
+    为当前请求启动cProfile，只分析调用线程
+
+    Returns:
+        profiler: cProfile.Profile实例，已有其他请求在分析时返回None
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except Exception:
+        _profile_lock.release()
+        raise
+    return profiler
+
+
+def finish_profile(profiler, top_n=None):
+    """
+    停止分析并汇总耗时最多的函数
+
+    Args:
+        profiler: start_profile返回的实例
+        top_n: 返回的函数数，默认为None表示使用配置
+
+    Returns:
+        summary: 包含总调用次数、总耗时和按累计耗时排序的函数列表的字典
+    """
+    try:
+        profiler.disable()
+    finally:
+        _profile_lock.release()
+
+    stats = pstats.Stats(profiler)
+    entries = []
+    for (filename, line, function), (_, calls, total_time, cumulative_time, _) in stats.stats.items():
+        entries.append({
+            'function': function,
+            'file': filename,
+            'line': line,
+            'calls': calls,
+            'total_ms': round(total_time * 1000, 3),
+            'cumulative_ms': round(cumulative_time * 1000, 3)
+        })
+    entries.sort(key=lambda entry: entry['cumulative_ms'], reverse=True)
+    return {
+        'total_calls': stats.total_calls,
+        'total_ms': round(stats.total_tt * 1000, 3),
+        'functions': entries[:top_n or REQUEST_TIMING_CONFIG['profile_top_n']]
+    }
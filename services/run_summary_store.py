@@ -0,0 +1,219 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from config import RUN_SUMMARY_STORE_CONFIG
+from utils import logger
+
+# 需要序列化为ISO字符串保存的时间字段
+_DATETIME_FIELDS = ('logical_date', 'dag_run_start_date', 'dag_run_updated_at')
+
+
+class RunSummaryStore:
+    """
+    已结束DAG Run统计的本地持久化存储（嵌入式SQLite）
+
+    - run_summary: 处于终态的DAG Run统计，写入后不再变化
+    - sealed_day: 某DAG在某个中国时区日期的全部运行均已结束且日期已过去，
+      之后该日期的统计由本地存储提供；同时记录当天DAG Run数量和最大updated_at，
+      查询时与Airflow数据库比对，不一致（如运行被清除重跑）时解除封存
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS run_summary (
+                dag_id TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                exec_date TEXT NOT NULL,
+                start_date TEXT,
+                summary TEXT NOT NULL,
+                PRIMARY KEY (dag_id, run_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_run_summary_day ON run_summary (dag_id, exec_date, start_date);
+            CREATE TABLE IF NOT EXISTS sealed_day (
+                dag_id TEXT NOT NULL,
+                exec_date TEXT NOT NULL,
+                sealed_at TEXT NOT NULL,
+                run_count INTEGER,
+                max_updated_at TEXT,
+                PRIMARY KEY (dag_id, exec_date)
+            );
+        """)
+        # 旧版本创建的表没有校验字段，补充后旧的封存记录在首次校验时解除封存并重新保存
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sealed_day)")}
+        for column, column_type in (('run_count', 'INTEGER'), ('max_updated_at', 'TEXT')):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE sealed_day ADD COLUMN {column} {column_type}")
+        self._conn.commit()
+        logger.info(f"DAG Run统计本地存储已打开: {path}")
+
+    def _serialize(self, run_summary):
+        data = dict(run_summary)
+        for field in _DATETIME_FIELDS:
+            if isinstance(data.get(field), datetime.datetime):
+                data[field] = data[field].isoformat()
+        return json.dumps(data, ensure_ascii=False)
+
+    def _deserialize(self, text):
+        data = json.loads(text)
+        for field in _DATETIME_FIELDS:
+            if data.get(field):
+                data[field] = datetime.datetime.fromisoformat(data[field])
+        return data
+
+    def save_runs(self, exec_date, run_summaries):
+        """
+        保存已结束的DAG Run统计，已存在的记录会被覆盖
+
+        Args:
+            exec_date: DAG Run开始时间所在的中国时区日期（YYYY-MM-DD）
+            run_summaries: DAG Run统计列表
+        """
+        if not run_summaries:
+            return
+        rows = [
+            (
+                summary['dag_id'],
+                summary['dag_run_id'],
+                exec_date,
+                summary['dag_run_start_date'].isoformat() if summary.get('dag_run_start_date') else None,
+                self._serialize(summary)
+            )
+            for summary in run_summaries
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO run_summary (dag_id, run_id, exec_date, start_date, summary) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+        logger.debug("保存 %s 个已结束的DAG Run统计: exec_date=%s", len(rows), exec_date)
+
+    def seal_day(self, dag_id, exec_date, run_count, max_updated_at):
+        """
+        标记DAG在指定日期的运行记录已全部保存
+
+        Args:
+            dag_id: DAG ID
+            exec_date: 中国时区日期（YYYY-MM-DD）
+            run_count: 当天的DAG Run数量
+            max_updated_at: 当天DAG Run的最大updated_at，用于之后校验封存是否仍然有效
+        """
+        sealed_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sealed_day (dag_id, exec_date, sealed_at, run_count, max_updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (dag_id, exec_date, sealed_at, run_count, max_updated_at.isoformat() if max_updated_at else None)
+            )
+            self._conn.commit()
+        logger.info(f"DAG {dag_id} 在 {exec_date} 的运行记录已全部结束并保存到本地")
+
+    def get_sealed_days(self, dag_ids, exec_dates):
+        """
+        查询已封存的(DAG, 日期)组合
+
+        Args:
+            dag_ids: DAG ID 列表
+            exec_dates: 中国时区日期列表（YYYY-MM-DD）
+
+        Returns:
+            sealed: 以(dag_id, exec_date)为键、(run_count, max_updated_at)为值的字典，
+                    旧版本封存的记录两项均为None
+        """
+        if not dag_ids or not exec_dates:
+            return {}
+        dag_placeholders = ','.join('?' * len(dag_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT dag_id, exec_date, run_count, max_updated_at FROM sealed_day "
+                f"WHERE dag_id IN ({dag_placeholders}) AND exec_date BETWEEN ? AND ?",
+                (*dag_ids, min(exec_dates), max(exec_dates))
+            ).fetchall()
+        requested = set(exec_dates)
+        return {
+            (dag_id, exec_date): (run_count, datetime.datetime.fromisoformat(max_updated_at) if max_updated_at else None)
+            for dag_id, exec_date, run_count, max_updated_at in rows
+            if exec_date in requested
+        }
+
+    def unseal_day(self, dag_id, exec_date):
+        """
+        解除封存并删除该日期已保存的DAG Run统计，之后的查询重新从Airflow数据库获取
+
+        Args:
+            dag_id: DAG ID
+            exec_date: 中国时区日期（YYYY-MM-DD）
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM sealed_day WHERE dag_id = ? AND exec_date = ?", (dag_id, exec_date))
+            self._conn.execute("DELETE FROM run_summary WHERE dag_id = ? AND exec_date = ?", (dag_id, exec_date))
+            self._conn.commit()
+        logger.info(f"DAG {dag_id} 在 {exec_date} 的运行记录已变化，解除本地封存")
+
+    def get_runs(self, dag_id, exec_date):
+        """
+        读取DAG在指定日期已保存的DAG Run统计
+
+        Args:
+            dag_id: DAG ID
+            exec_date: 中国时区日期（YYYY-MM-DD）
+
+        Returns:
+            run_summaries: 按开始时间排序的DAG Run统计列表
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT summary FROM run_summary WHERE dag_id = ? AND exec_date = ? ORDER BY start_date ASC",
+                (dag_id, exec_date)
+            ).fetchall()
+        return [self._deserialize(row[0]) for row in rows]
+
+    def close(self):
+        """关闭SQLite连接"""
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_run_summary_store():
+    """
+    获取进程内共享的DAG Run统计本地存储，首次调用时打开
+
+    Returns:
+        store: RunSummaryStore实例，未启用或打开失败时返回None
+    """
+    global _store
+    if not RUN_SUMMARY_STORE_CONFIG['enabled']:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                try:
+                    _store = RunSummaryStore(RUN_SUMMARY_STORE_CONFIG['path'])
+                except Exception as e:
+                    logger.error(f"打开DAG Run统计本地存储失败: {e}")
+                    return None
+    return _store
+
+
+def close_run_summary_store():
+    """关闭共享的DAG Run统计本地存储"""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
@@ -0,0 +1,254 @@
+import queue
+import threading
+import time
+from config import RUN_STREAM_CONFIG
+from services.db_service import DBService
+from utils import categorize_task_state, logger
+
+
+class RunSubscription:
+    """单个客户端的事件队列，容量有限"""
+
+    def __init__(self, poller, maxsize):
+        self.poller = poller
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def get(self, timeout):
+        """
+        等待下一条事件
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            event: (事件类型, 数据)元组，超时返回None
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def offer(self, event, snapshot_factory):
+        """
+        非阻塞地投递事件；队列已满说明客户端消费过慢，
+        此时丢弃积压事件并以一份最新快照代替，保证内存有界且客户端状态最终一致
+        """
+        try:
+            self.queue.put_nowait(event)
+            return
+        except queue.Full:
+            pass
+
+        while True:
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                break
+        try:
+            self.queue.put_nowait(snapshot_factory())
+        except queue.Full:
+            pass
+
+
+class RunPoller:
+    """
+    单个DAG Run的后台轮询器
+
+    每个轮询周期只查询一次数据库，将任务状态变化推送给该Run的所有订阅者；
+    没有订阅者时自动停止
+    """
+
+    def __init__(self, registry, dag_id, run_id, db_service, poll_interval, queue_size):
+        self.registry = registry
+        self.dag_id = dag_id
+        self.run_id = run_id
+        self.db_service = db_service
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._states = {}
+        self._ready = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'run-poller-{dag_id}-{run_id}', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def add_subscriber(self):
+        """
+        新增订阅者（不阻塞），需随后调用send_snapshot发送首条快照
+
+        Returns:
+            subscription: RunSubscription实例
+        """
+        subscription = RunSubscription(self, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def send_snapshot(self, subscription):
+        """向订阅者发送当前状态快照，首次轮询完成前最多等待一个周期"""
+        self._ready.wait(self.poll_interval)
+        with self._lock:
+            subscription.offer(self._snapshot_locked(), self._snapshot_locked)
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _snapshot_locked(self):
+        tasks = [
+            self._task_payload(task_id, raw_state, try_number)
+            for task_id, (raw_state, try_number) in sorted(self._states.items())
+        ]
+        return 'snapshot', {'dag_id': self.dag_id, 'run_id': self.run_id, 'tasks': tasks}
+
+    def _task_payload(self, task_id, raw_state, try_number):
+        return {
+            'task_id': task_id,
+            'raw_state': raw_state,
+            'state': categorize_task_state(raw_state),
+            'try_number': try_number
+        }
+
+    def _poll_once(self):
+        tasks = self.db_service.get_tasks_by_run_id(self.dag_id, self.run_id)
+        events = []
+        with self._lock:
+            for task in tasks:
+                task_id = task['task_id']
+                current = (task['raw_state'], task['try_number'])
+                previous = self._states.get(task_id)
+                if previous == current:
+                    continue
+                self._states[task_id] = current
+                if previous is not None or self._ready.is_set():
+                    payload = self._task_payload(task_id, *current)
+                    payload['previous_raw_state'] = previous[0] if previous else None
+                    events.append(('task_state', {'dag_id': self.dag_id, 'run_id': self.run_id, **payload}))
+
+            for event in events:
+                for subscription in self._subscribers:
+                    subscription.offer(event, self._snapshot_locked)
+        self._ready.set()
+        if events:
+            logger.debug("DAG Run %s/%s 推送 %s 个状态变化", self.dag_id, self.run_id, len(events))
+
+    def _run(self):
+        logger.info(f"启动DAG Run轮询: dag_id={self.dag_id}, run_id={self.run_id}")
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                self._poll_once()
+            except Exception as e:
+                logger.error(f"DAG Run轮询失败: dag_id={self.dag_id}, run_id={self.run_id}, 错误={e}")
+            finally:
+                self._ready.set()
+
+            if self.registry.release_if_idle(self):
+                break
+            self._stop_event.wait(max(0, self.poll_interval - (time.monotonic() - started)))
+        logger.info(f"停止DAG Run轮询: dag_id={self.dag_id}, run_id={self.run_id}")
+
+
+class RunWatcherRegistry:
+    """按(dag_id, run_id)共享轮询器，订阅者数量不影响数据库查询次数"""
+
+    def __init__(self, db_service=None, poll_interval=5, queue_size=100, max_watched_runs=50):
+        self.db_service = db_service or DBService()
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.max_watched_runs = max_watched_runs
+        self._pollers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, dag_id, run_id):
+        """
+        订阅DAG Run的任务状态变化
+
+        Returns:
+            subscription: RunSubscription实例
+
+        Raises:
+            RuntimeError: 同时监视的DAG Run数量超过上限
+        """
+        key = (dag_id, run_id)
+        with self._lock:
+            poller = self._pollers.get(key)
+            if poller is None:
+                if len(self._pollers) >= self.max_watched_runs:
+                    raise RuntimeError(f"同时监视的DAG Run数量已达上限: {self.max_watched_runs}")
+                poller = RunPoller(self, dag_id, run_id, self.db_service, self.poll_interval, self.queue_size)
+                self._pollers[key] = poller
+                poller.start()
+            # 在注册表锁内登记订阅者，避免轮询器在此期间因无订阅者而停止
+            subscription = poller.add_subscriber()
+        poller.send_snapshot(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.poller.unsubscribe(subscription)
+
+    def release_if_idle(self, poller):
+        """
+        轮询器在每个周期结束时调用，没有订阅者时从注册表移除
+
+        Returns:
+            released: 是否已移除（轮询器应停止）
+        """
+        with self._lock:
+            if poller.subscriber_count > 0:
+                return False
+            if self._pollers.get((poller.dag_id, poller.run_id)) is poller:
+                del self._pollers[(poller.dag_id, poller.run_id)]
+            return True
+
+    def stop_all(self):
+        with self._lock:
+            pollers = list(self._pollers.values())
+            self._pollers.clear()
+        for poller in pollers:
+            poller.stop()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'watched_runs': len(self._pollers),
+                'subscribers': sum(poller.subscriber_count for poller in self._pollers.values())
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_run_watcher():
+    """获取进程内共享的DAG Run监视注册表"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = RunWatcherRegistry(
+                    poll_interval=RUN_STREAM_CONFIG['poll_interval'],
+                    queue_size=RUN_STREAM_CONFIG['queue_size'],
+                    max_watched_runs=RUN_STREAM_CONFIG['max_watched_runs']
+                )
+    return _registry
+
+
+def stop_run_watcher():
+    """停止所有DAG Run轮询器"""
+    if _registry is not None:
+        _registry.stop_all()
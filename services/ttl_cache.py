@@ -0,0 +1,154 @@
+import threading
+import time
+from utils import logger
+
+
+class StaleWhileRevalidateCache:
+    """
+    带过期时间的进程内缓存，支持stale-while-revalidate
+
+    - 缓存年龄小于ttl时直接返回
+    - 年龄在ttl与ttl+stale_ttl之间时返回旧值，同时在后台线程刷新
+    - 超过ttl+stale_ttl或不存在时同步加载，同一键的并发加载只执行一次
+    - loader返回None表示加载失败，结果不会被缓存
+    """
+
+    def __init__(self, name, ttl=60, stale_ttl=300):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._refreshing = set()
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'load_failures': 0
+        }
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _load(self, key, loader):
+        value = loader()
+        with self._lock:
+            if value is None:
+                self._stats['load_failures'] += 1
+            else:
+                self._entries[key] = (value, time.monotonic())
+        return value
+
+    def _revalidate(self, key, loader):
+        """在后台线程中刷新过期条目，同一键同时只有一个刷新线程"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._load(key, loader)
+                logger.debug("缓存 %s 后台刷新完成: key=%s", self.name, key)
+            except Exception as e:
+                logger.warning(f"缓存 {self.name} 后台刷新失败: key={key}, 错误={e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f'{self.name}-revalidate', daemon=True).start()
+
+    def get_if_present(self, key, loader=None):
+        """
+        获取可用的缓存值，不会同步加载
+
+        Args:
+            key: 缓存键
+            loader: 值已过期但仍在stale窗口内时用于后台刷新的加载函数
+
+        Returns:
+            value: 缓存值，不存在或已超过stale窗口时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, loaded_at = entry
+        age = time.monotonic() - loaded_at
+        if age < self.ttl:
+            self._stats['hits'] += 1
+            return value
+        if age < self.ttl + self.stale_ttl:
+            self._stats['stale_hits'] += 1
+            if loader is not None:
+                self._revalidate(key, loader)
+            return value
+        return None
+
+    def get(self, key, loader):
+        """
+        获取缓存值，必要时调用loader加载
+
+        Args:
+            key: 缓存键
+            loader: 无参加载函数，返回None表示加载失败
+
+        Returns:
+            value: 缓存值或新加载的值，加载失败时返回None
+        """
+        value = self.get_if_present(key, loader)
+        if value is not None:
+            return value
+
+        with self._key_lock(key):
+            # 等待期间其他线程可能已完成加载
+            value = self.get_if_present(key, loader)
+            if value is not None:
+                return value
+            self._stats['misses'] += 1
+            return self._load(key, loader)
+
+    def set(self, key, value):
+        """
+        写入缓存值，用于调用方自行加载（如异步查询）后回填缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值，None不会被缓存
+        """
+        if value is None:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+
+    def invalidate(self, key=None):
+        """
+        失效缓存条目
+
+        Args:
+            key: 缓存键，默认为None表示清空全部条目
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """
+        获取缓存状态
+
+        Returns:
+            stats: 包含条目数和命中计数的字典
+        """
+        with self._lock:
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                **self._stats
+            }
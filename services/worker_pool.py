@@ -0,0 +1,45 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils import logger
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """在提交任务时的contextvars上下文中执行任务，使请求级的耗时记录能覆盖工作线程中的调用"""
+    
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_worker_pool(name, max_workers):
+    """
+    获取指定名称的共享线程池，首次调用时创建
+    
+    同名线程池在进程内只创建一次，用于限制对各后端的并发请求数
+    
+    Args:
+        name: 线程池名称，同时作为线程名前缀
+        max_workers: 最大工作线程数
+        
+    Returns:
+        executor: ContextThreadPoolExecutor实例
+    """
+    executor = _pools.get(name)
+    if executor is None:
+        with _pools_lock:
+            executor = _pools.get(name)
+            if executor is None:
+                executor = ContextThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+                _pools[name] = executor
+                logger.info(f"创建线程池: name={name}, max_workers={max_workers}")
+    return executor
+
+def shutdown_worker_pools():
+    """关闭所有共享线程池，不等待正在执行的任务"""
+    with _pools_lock:
+        pools = list(_pools.items())
+        _pools.clear()
+    for name, executor in pools:
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.info(f"线程池已关闭: name={name}")
@@ -1,8 +1,17 @@
+import atexit
+import base64
 import datetime
+import hashlib
+import json
 import pytz
 import logging
+import logging.handlers
 import os
-from config import TIMEZONE, UTC_OFFSET, TASK_STATES, LOG_LEVEL, LOG_FILE, LOG_FORMAT, LOG_DATE_FORMAT
+import queue
+import threading
+import time
+from config import (TIMEZONE, UTC_OFFSET, TASK_STATES, LOG_LEVEL, LOG_FILE, LOG_FORMAT, LOG_DATE_FORMAT,
+                    LOG_PIPELINE_CONFIG)
 
 # 转换字符串日志级别为logging对象
 def get_log_level(level_str):
@@ -24,11 +33,139 @@ def get_log_level(level_str):
     }
     return levels.get(level_str.upper(), logging.INFO)
 
+class LogSampler(logging.Filter):
+    """
+    按调用位置限流的采样过滤器
+
+    每个window秒内同一调用位置（日志器名称+源文件+行号）最多放行burst条，超出的丢弃；
+    窗口结束后该位置放行的第一条日志附带被抑制的条数。级别高于max_level的日志全部放行
+    """
+
+    def __init__(self, window, burst, max_level=logging.INFO):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.max_level = max_level
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.window <= 0 or record.levelno > self.max_level:
+            return True
+
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or now - counter[0] >= self.window:
+                suppressed = counter[2] if counter else 0
+                self._counters[key] = [now, 1, 0]
+            elif counter[1] < self.burst:
+                counter[1] += 1
+                return True
+            else:
+                counter[2] += 1
+                return False
+
+        if suppressed:
+            record.msg = f"{record.msg} （此前{self.window:g}秒内同一位置另有{suppressed}条日志被抑制）"
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    只负责入队的日志处理器，格式化和写控制台/文件由QueueListener的后台线程完成
+
+    与标准QueueHandler不同，入队前不格式化消息（进程内队列无需序列化），
+    因此日志参数应为不会再被修改的对象；队列已满时丢弃日志并计数，不阻塞调用线程
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _TruncatedValue:
+    """日志参数的延迟截断包装，只在日志实际输出时才转换为字符串"""
+
+    __slots__ = ('value', 'max_chars')
+
+    def __init__(self, value, max_chars):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self):
+        text = self.value if isinstance(self.value, str) else str(self.value)
+        if len(text) <= self.max_chars:
+            return text
+        return f"{text[:self.max_chars]}...（共{len(text)}字符，已截断）"
+
+
+def truncate_for_log(value, max_chars=None):
+    """
+    包装较大的日志参数（SQL、API响应等），输出时截断到max_chars个字符
+
+    用法: logger.debug("Airflow API原始响应数据: %s", truncate_for_log(data))，
+    日志级别未启用时不会进行任何字符串转换
+
+    Args:
+        value: 任意对象
+        max_chars: 最大字符数，默认为None表示使用LOG_PIPELINE_CONFIG中的配置
+
+    Returns:
+        wrapped: 可作为%s参数的包装对象
+    """
+    return _TruncatedValue(value, max_chars or LOG_PIPELINE_CONFIG['max_payload_chars'])
+
+
+# 异步日志管道：日志器名称 -> (队列处理器, 监听器)
+_log_pipelines = {}
+
+
+def stop_log_listeners():
+    """停止后台日志线程，先输出队列中剩余的日志"""
+    for handler, listener in list(_log_pipelines.values()):
+        try:
+            listener.stop()
+        except Exception:
+            pass
+    _log_pipelines.clear()
+
+
+def get_log_pipeline_stats():
+    """
+    获取异步日志管道的状态
+
+    Returns:
+        stats: 以日志器名称为键，包含队列长度、容量和丢弃条数的字典
+    """
+    return {
+        name: {
+            'queued': handler.queue.qsize(),
+            'queue_size': handler.queue.maxsize,
+            'dropped': handler.dropped
+        }
+        for name, (handler, listener) in _log_pipelines.items()
+    }
+
+
 # 日志配置
 def setup_logger(name=None, log_level=None, log_file=None):
     """
     创建并配置日志器
     
+    启用LOG_PIPELINE_CONFIG['async']时，日志器只挂一个入队处理器，
+    控制台和文件处理器在QueueListener的后台线程中执行，写日志不会阻塞请求线程
+    
     Args:
         name: 日志器名称，默认为None表示使用root logger
         log_level: 日志级别，默认为None表示使用配置中的级别
@@ -56,21 +193,17 @@ def setup_logger(name=None, log_level=None, log_file=None):
     # 设置日志级别
     logger.setLevel(log_level)
     
-    # 创建控制台处理器
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(log_level)
-    
     # 创建格式化器
     formatter = logging.Formatter(
         LOG_FORMAT,
         LOG_DATE_FORMAT
     )
     
-    # 设置控制台处理器的格式
+    # 创建控制台处理器
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
-    
-    # 添加控制台处理器到日志器
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
     
     # 如果指定了日志文件，创建文件处理器
     if log_file:
@@ -79,16 +212,33 @@ def setup_logger(name=None, log_level=None, log_file=None):
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
         
-        # 创建文件处理器
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
         file_handler.setLevel(log_level)
         file_handler.setFormatter(formatter)
-        
-        # 添加文件处理器到日志器
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     
+    # 高频日志按调用位置采样
+    logger.addFilter(LogSampler(
+        LOG_PIPELINE_CONFIG['sample_window'],
+        LOG_PIPELINE_CONFIG['sample_burst'],
+        get_log_level(LOG_PIPELINE_CONFIG['sample_max_level'])
+    ))
+    
+    if not LOG_PIPELINE_CONFIG['async']:
+        for handler in handlers:
+            logger.addHandler(handler)
+        return logger
+    
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_PIPELINE_CONFIG['queue_size']))
+    listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    logger.addHandler(queue_handler)
+    _log_pipelines[logger.name] = (queue_handler, listener)
     return logger
 
+# 进程退出时输出队列中剩余的日志
+atexit.register(stop_log_listeners)
+
 # 创建默认日志器
 logger = setup_logger('dataops_airflow_monitor')
 
@@ -141,6 +291,50 @@ def convert_utc_to_cn_time(utc_time):
     # 格式化时间字符串
     return cn_time.isoformat()
 
+def convert_utc_to_cn_date(utc_time):
+    """
+    将UTC时区的时间转换为中国时区的日期字符串
+    
+    Args:
+        utc_time: UTC时区的datetime对象
+        
+    Returns:
+        cn_date_str: 格式为'YYYY-MM-DD'的中国时区日期字符串
+    """
+    if not utc_time:
+        return None
+    
+    if utc_time.tzinfo is None:
+        utc_time = pytz.UTC.localize(utc_time)
+    
+    return utc_time.astimezone(pytz.timezone(TIMEZONE)).strftime('%Y-%m-%d')
+
+def get_cn_today():
+    """
+    获取中国时区的当前日期
+    
+    Returns:
+        cn_date_str: 格式为'YYYY-MM-DD'的日期字符串
+    """
+    return convert_utc_to_cn_date(datetime.datetime.now(pytz.UTC))
+
+def iter_cn_dates(start_date, end_date):
+    """
+    按天遍历中国时区的日期区间（包含首尾）
+    
+    Args:
+        start_date: 格式为 'YYYY-MM-DD' 的开始日期
+        end_date: 格式为 'YYYY-MM-DD' 的结束日期
+        
+    Yields:
+        date_str: 格式为 'YYYY-MM-DD' 的日期字符串
+    """
+    current = datetime.datetime.strptime(start_date, '%Y-%m-%d').date()
+    last = datetime.datetime.strptime(end_date, '%Y-%m-%d').date()
+    while current <= last:
+        yield current.strftime('%Y-%m-%d')
+        current += datetime.timedelta(days=1)
+
 def categorize_task_state(state):
     """
     根据任务状态进行分类
@@ -162,40 +356,30 @@ def categorize_task_state(state):
     else:
         return 'unknown'  # 处理未知状态
 
-def format_dag_run_result(dag_run_data, task_data):
+def format_dag_run_summary(run_summary):
     """
-    格式化DAG Run和Task执行数据为API响应格式
+    将数据库聚合得到的DAG Run统计格式化为API响应格式
     
     Args:
-        dag_run_data: 包含DAG Run信息的字典
-        task_data: 包含任务执行信息的列表
+        run_summary: 包含DAG Run信息及各状态任务数量的字典
         
     Returns:
         formatted_result: 格式化后的结果字典
     """
-    # 统计任务状态
     task_summary = {
-        'success': 0,
-        'failed': 0,
-        'running': 0,
-        'stopped': 0,
-        'scheduled_total': len(task_data)
+        'success': run_summary['success'],
+        'failed': run_summary['failed'],
+        'running': run_summary['running'],
+        'stopped': run_summary['stopped'],
+        'scheduled_total': run_summary['total']
     }
     
-    for task in task_data:
-        state_category = categorize_task_state(task['task_state'])
-        if state_category in task_summary:
-            task_summary[state_category] += 1
-    
-    # 格式化单个DAG Run结果
-    run_result = {
-        'run_id': dag_run_data['dag_run_id'],
-        'logical_date_local': convert_utc_to_cn_time(dag_run_data['logical_date']),
-        'state': dag_run_data['dag_run_state'],
-        'tasks': task_summary  # 直接使用task_summary作为tasks字段的值
+    return {
+        'run_id': run_summary['dag_run_id'],
+        'logical_date_local': convert_utc_to_cn_time(run_summary['logical_date']),
+        'state': run_summary['dag_run_state'],
+        'tasks': task_summary
     }
-    
-    return run_result
 
 # utils.py 添加的函数
 def parse_state_parameter(state_param):
@@ -238,4 +422,108 @@ def get_actual_states_by_category(state_categories):
         elif category == 'stopped':
             actual_states.extend(TASK_STATES['stopped_states'])
     
-    return actual_states
\ No newline at end of file
+    return actual_states
+
+def encode_opaque_token(data):
+    """
+    将字典编码为不透明的令牌字符串
+    
+    Args:
+        data: 可JSON序列化的字典
+        
+    Returns:
+        token: URL安全的base64字符串
+    """
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_opaque_token(token):
+    """
+    解析encode_opaque_token生成的令牌
+    
+    Args:
+        token: 令牌字符串
+        
+    Returns:
+        data: 字典
+        
+    Raises:
+        ValueError: 令牌格式无效
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception as e:
+        raise ValueError(f"无效的令牌: {token}") from e
+    if not isinstance(data, dict):
+        raise ValueError(f"无效的令牌: {token}")
+    return data
+
+def encode_watermark_cursor(watermarks, seen=None):
+    """
+    将水位字典编码为不透明的游标字符串
+    
+    Args:
+        watermarks: 以名称为键、UTC datetime（或None）为值的字典
+        seen: 以名称为键、水位附近已返回记录的指纹列表为值的字典，可选
+        
+    Returns:
+        cursor: URL安全的base64字符串
+    """
+    return encode_opaque_token({
+        'watermarks': {key: value.isoformat() if value else None for key, value in watermarks.items()},
+        'seen': seen or {}
+    })
+
+def decode_watermark_cursor(cursor):
+    """
+    解析encode_watermark_cursor生成的游标
+    
+    Args:
+        cursor: 游标字符串
+        
+    Returns:
+        watermarks: 以名称为键、UTC datetime（或None）为值的字典
+        seen: 以名称为键、已返回记录指纹集合为值的字典
+        
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        data = decode_opaque_token(cursor)
+        watermarks = {
+            key: datetime.datetime.fromisoformat(value) if value else None
+            for key, value in data['watermarks'].items()
+        }
+        seen = {key: set(value) for key, value in data['seen'].items()}
+        return watermarks, seen
+    except Exception as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
+
+def change_fingerprint(row, key_fields):
+    """
+    计算变化记录的指纹，用于增量游标识别已返回的记录
+    
+    Args:
+        row: 包含主键字段和updated_at的记录
+        key_fields: 主键字段名
+        
+    Returns:
+        fingerprint: 由主键和updated_at计算的短摘要
+    """
+    updated_at = row['updated_at'].isoformat() if row['updated_at'] else ''
+    raw = '\x1f'.join([str(row[field]) for field in key_fields] + [updated_at])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+def format_sse_event(event, data):
+    """
+    将事件格式化为Server-Sent Events文本
+    
+    Args:
+        event: 事件类型
+        data: 可JSON序列化的事件数据
+        
+    Returns:
+        text: SSE格式的事件文本
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"